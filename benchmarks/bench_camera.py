@@ -0,0 +1,54 @@
+"""Time rendering the board through a camera, which only draws the blocks in view,
+against drawing all blocks, as the board grows
+
+The layer of settled blocks is rendered again in every frame, as when the camera
+moves.
+
+Run from the root directory:
+
+    python -m benchmarks.bench_camera
+
+"""
+
+import os
+import timeit
+
+import pygame
+
+from citytetris.constants import SCREEN_HEIGHT, SCREEN_WIDTH
+from citytetris.tetris import Tetris
+
+from benchmarks.boards import make_dense_board, tile_board
+
+
+def main() -> None:
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    pygame.display.init()
+    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    tetris = Tetris(screen=screen, seed=0, use_camera=True)
+
+    board_small = make_dense_board(50, 100)
+    print("board       blocks   all blocks       camera")
+    for num_tiles in [1, 2, 4, 8]:
+        tetris.board = tile_board(board_small, num_tiles, num_tiles)
+        tetris.board.spawn_block(tetris.get_random_block())
+        tetris.board.update_highlights()
+        layer = pygame.Surface(tetris.screen.get_size())
+
+        def draw_camera() -> None:
+            tetris.layer_version = None
+            tetris.draw()
+
+        times = [
+            min(timeit.repeat(draw, number=5, repeat=3)) / 5
+            for draw in [lambda: tetris.board.draw_blocks(layer), draw_camera]
+        ]
+        name = f"{tetris.board.height}x{tetris.board.width}"
+        print(
+            f"{name:<10} {len(tetris.board.block_list):>7} {1e3 * times[0]:9.2f} ms "
+            f"{1e3 * times[1]:9.2f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
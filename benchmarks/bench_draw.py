@@ -0,0 +1,97 @@
+"""Compare drawing the blocks by blitting pre-rendered tiles with drawing every
+square with rects and lines, and time whole game frames, where the settled blocks
+are drawn from a cached layer
+
+Run from the root directory:
+
+    python -m benchmarks.bench_draw
+
+"""
+
+import os
+import timeit
+from typing import Callable
+
+import pygame
+
+from citytetris.board import Board
+from citytetris.constants import BS
+from citytetris.tetris import Tetris
+from citytetris.tiles import draw_square
+
+from benchmarks.boards import make_dense_board
+
+NUM_BLOCKS = 200
+
+
+def draw_blocks_reference(board: Board, screen: pygame.surface.Surface) -> None:
+    # previous implementation, draws each square with draw calls
+    for block in board.block_list:
+        for x, y in block.squares:
+            draw_square(
+                screen,
+                block.shades,
+                block.x + x * BS,
+                block.y + y * BS,
+                block.highlight,
+            )
+
+
+def draw_frame_uncached(tetris: Tetris) -> None:
+    # previous frame, draws the background, grid and settled blocks every time
+    tetris.screen.fill(tetris.gray_shade.dark)
+    tetris.draw_grid()
+    tetris.board.update_highlights()
+    tetris.draw_ghost()
+    tetris.board.block_active.draw(tetris.screen)
+    tetris.board.draw_blocks(tetris.screen)
+    tetris.block_queue[0].draw(tetris.screen_preview)
+
+
+def main() -> None:
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    pygame.display.init()
+
+    board = make_dense_board(30, 40)
+    board = Board(
+        width=board.width,
+        height=board.height,
+        block_list=board.block_list[:NUM_BLOCKS],
+        centered=False,
+    )
+    board.update_highlights()
+    screen = pygame.display.set_mode((board.width * BS, board.height * BS))
+    print(
+        f"{len(board.block_list)} settled blocks on a {board.height}x{board.width} board"
+    )
+
+    draws: list[tuple[str, Callable[[], None]]] = [
+        ("draw calls", lambda: draw_blocks_reference(board, screen)),
+        ("tile blits", lambda: board.draw_blocks(screen)),
+    ]
+    for name, draw in draws:
+        draw()  # the tiles are created on first use
+        seconds = min(timeit.repeat(draw, number=10, repeat=5)) / 10
+        print(f"{name}: {1e3 * seconds:6.2f} ms per frame")
+
+    print("\ngame frame        uncached    cached layer")
+    screen_game = pygame.display.set_mode((2 * board.width * BS, board.height * BS))
+    tetris = Tetris(screen=screen_game)
+    for num_blocks in [0, 50, NUM_BLOCKS]:
+        tetris.board = Board(
+            width=board.width,
+            height=board.height,
+            block_list=board.block_list[:num_blocks],
+        )
+        tetris.screen = tetris._make_game_screen(screen_game)
+        times = [
+            min(timeit.repeat(draw, number=10, repeat=5)) / 10
+            for draw in [lambda: draw_frame_uncached(tetris), tetris.draw]
+        ]
+        print(
+            f"{num_blocks:>4} blocks  {1e3 * times[0]:8.2f} ms  {1e3 * times[1]:8.2f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
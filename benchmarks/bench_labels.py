@@ -0,0 +1,49 @@
+"""Compare the score methods of the board, see Board.calculate_score
+
+Run from the root directory:
+
+    python -m benchmarks.bench_labels
+
+The highlights are computed once before timing, so only the score itself is timed.
+
+"""
+
+import timeit
+
+from citytetris.board import Board, ScoreMethod
+
+from benchmarks.boards import make_dense_board, tile_board
+
+METHODS: tuple[ScoreMethod, ...] = ("incremental", "network", "labels")
+
+
+def time_method(board: Board, method: ScoreMethod, repeat: int) -> float:
+    return min(
+        timeit.repeat(
+            lambda: board.calculate_score(method=method), number=1, repeat=repeat
+        )
+    )
+
+
+def main() -> None:
+    board_small = make_dense_board(10, 20)
+    board_medium = make_dense_board(100, 200)
+    board_large = tile_board(board_medium, 10, 10)
+
+    print("board        blocks   " + "".join(f"{method:>14}" for method in METHODS))
+    print(" " * 23 + "".join(f"{'[ms]':>14}" for _ in METHODS))
+    for board, repeat in [(board_small, 100), (board_medium, 10), (board_large, 3)]:
+        scores = [board.calculate_score(method=method) for method in METHODS]
+        assert all(score == scores[0] for score in scores)
+
+        times = [1e3 * time_method(board, method, repeat) for method in METHODS]
+
+        size = f"{board.height}x{board.width}"
+        print(
+            f"{size:<12} {len(board.block_list):>7}   "
+            + "".join(f"{time:>14.3f}" for time in times)
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Compare drawing the settled blocks tile by tile with the palette renderer on big
+boards
+
+Both draw into a window sized viewport. The tiles are drawn at full size, so most of
+them are clipped, but each block still costs its blits. The palette renderer scales
+the whole board into the viewport.
+
+Run from the root directory:
+
+    python -m benchmarks.bench_palette
+
+"""
+
+import os
+import timeit
+
+import pygame
+
+from citytetris.board import Board
+from citytetris.colors import GrayShade
+from citytetris.palette import PaletteRenderer
+from citytetris.store import StoreBoard
+
+from benchmarks.boards import make_dense_board, tile_board
+
+VIEWPORT = (500, 1000)
+
+
+def main() -> None:
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    pygame.display.init()
+    screen = pygame.display.set_mode(VIEWPORT)
+    renderer = PaletteRenderer(GrayShade().dark)
+
+    board_medium = make_dense_board(100, 200)
+    board_large = tile_board(board_medium, 10, 10)
+    boards: list[tuple[str, Board]] = [
+        ("200x100", board_medium),
+        ("2000x1000", board_large),
+        (
+            "2000x1000 StoreBoard",
+            StoreBoard(
+                width=board_large.width,
+                height=board_large.height,
+                block_list=board_large.block_list,
+                centered=False,
+            ),
+        ),
+    ]
+
+    print("board                 blocks       tiles     palette")
+    for name, board in boards:
+        board.update_highlights()
+
+        def draw_tiles() -> None:
+            board.draw_blocks(screen)
+
+        def draw_palette() -> None:
+            renderer.draw_blocks(board, screen)
+
+        times = []
+        for draw in [draw_tiles, draw_palette]:
+            draw()  # the tiles and surfaces are created on first use
+            number = 3
+            times.append(min(timeit.repeat(draw, number=number, repeat=3)) / number)
+        print(
+            f"{name:<20} {len(board.block_list):>7} {1e3 * times[0]:8.1f} ms "
+            f"{1e3 * times[1]:8.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Compare the longest road with the per-block implementation it replaced
+
+Run from the root directory:
+
+    python -m benchmarks.bench_road
+
+The worst case is a single road, where the previous implementation traversed the
+whole road once for every I block in it.
+
+"""
+
+import timeit
+from typing import Sequence
+
+import numpy as np
+
+from citytetris.blocks import Block, IBlock
+from citytetris.board import Board
+from citytetris.network import get_graph, get_longest_I_block_distance
+
+from benchmarks.boards import make_dense_board
+
+
+def min_max_indices(blocks: Sequence[Block]) -> tuple[int, int, int, int]:
+    indices = [index for block in blocks for index in block.yield_indices()]
+    xs, ys = [x for x, _ in indices], [y for _, y in indices]
+    return min(xs), min(ys), max(xs), max(ys)
+
+
+def get_longest_I_block_distance_reference(
+    block_list: list[Block], piece_ids: np.ndarray | None = None
+) -> tuple[int, set[Block]]:
+    # previous implementation, visits the component of every single block
+    graph, blocks = get_graph(block_list, (IBlock,), piece_ids)
+    if len(graph) < 2:
+        return 0, set()
+
+    max_distance = 0
+    blocks_to_hightlight: list[Block] = []
+    for node in range(len(graph)):
+        component = graph.node_connected_component(node)
+        if len(component) < 2:
+            continue
+        blocks_connected = [blocks[node] for node in component.tolist()]
+        x_min, y_min, x_max, y_max = min_max_indices(blocks_connected)
+        distance = x_max - x_min + y_max - y_min
+        if distance > max_distance:
+            max_distance = distance
+            blocks_to_hightlight = blocks_connected
+    return max_distance, set(blocks_to_hightlight)
+
+
+def make_single_road(num_blocks: int) -> Board:
+    """A board with one row that is a single road of horizontal I blocks"""
+    board = Board(width=4 * num_blocks, height=1, centered=False)
+    for i in range(num_blocks):
+        block = IBlock()
+        block.move_right(4 * i)
+        board.add_block(block)
+    return board
+
+
+def main() -> None:
+    print("board                     blocks   reference [ms]   single pass [ms]")
+    for name, board in [
+        ("dense 200x100", make_dense_board(100, 200)),
+        ("single road of 500 I", make_single_road(500)),
+    ]:
+        block_list, piece_ids = board.block_list, board.piece_ids
+        result = get_longest_I_block_distance(block_list, piece_ids)
+        assert result == get_longest_I_block_distance_reference(block_list, piece_ids)
+
+        times = [
+            1e3
+            * min(
+                timeit.repeat(lambda: func(block_list, piece_ids), number=1, repeat=5)
+            )
+            for func in [
+                get_longest_I_block_distance_reference,
+                get_longest_I_block_distance,
+            ]
+        ]
+        print(f"{name:<24} {len(block_list):>7} {times[0]:>16.2f} {times[1]:>18.2f}")
+
+
+if __name__ == "__main__":
+    main()
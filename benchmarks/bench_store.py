@@ -0,0 +1,96 @@
+"""Compare memory and speed of Board and StoreBoard
+
+The memory of the whole boards includes the grids, the score tracker and, for
+Board, the Block objects.
+
+Run from the root directory:
+
+    python -m benchmarks.bench_store
+
+"""
+
+import timeit
+import tracemalloc
+from typing import Callable, TypeVar
+
+import pygame
+
+from citytetris.blocks import Block
+from citytetris.board import Board
+from citytetris.constants import BS
+from citytetris.store import BlockStore, StoreBoard
+
+from benchmarks.boards import make_dense_board
+
+T = TypeVar('T')
+
+
+def measure_memory(func: Callable[[], T]) -> tuple[T, int]:
+    tracemalloc.start()
+    result = func()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, size
+
+
+def main() -> None:
+    width, height = 100, 400
+    board = make_dense_board(width, height)
+    blocks = board.block_list
+    n = len(blocks)
+    print(f"board {height}x{width} with {n} blocks\n")
+
+    def copy_blocks() -> list[Block]:
+        return [store.get_block(i) for i in range(n)]
+
+    def fill_store() -> BlockStore:
+        store = BlockStore()
+        for block in blocks:
+            store.append(block)
+        return store
+
+    store, mem_store = measure_memory(fill_store)
+    block_list, mem_list = measure_memory(copy_blocks)
+    # block.indices is cached on first access, e.g. when drawing
+    _, mem_indices = measure_memory(lambda: [block.indices for block in copy_blocks()])
+    print("memory per block [bytes]")
+    print(f"  list of Block objects: {mem_list / n:8.1f}")
+    print(f"    incl. cached indices: {mem_indices / n:7.1f}")
+    print(f"  BlockStore (allocated): {store.nbytes / n:7.1f}")
+    print(f"  BlockStore (used):      {store.itemsize:7.1f}")
+
+    board_list, mem_board_list = measure_memory(
+        lambda: Board(width, height, block_list=copy_blocks(), centered=False)
+    )
+    board_store, mem_board_store = measure_memory(
+        lambda: StoreBoard(width, height, block_list=copy_blocks(), centered=False)
+    )
+    assert repr(board_store) == repr(board_list)
+    mem_grids = board_store.occupancy.nbytes + board_store.piece_ids.nbytes
+    print("\nmemory of the whole board per block [bytes]")
+    print(f"  Board:                  {mem_board_list / n:7.1f}")
+    print(f"  StoreBoard:             {mem_board_store / n:7.1f}")
+    print(f"    grids:                {mem_grids / n:7.1f}")
+    print(f"    score tracker:        {board_store.tracker.nbytes / n:7.1f}")
+    print(f"    BlockStore:           {board_store.store.nbytes / n:7.1f}")
+
+    def score_from_scratch(board: Board) -> None:
+        # a new version, so that StoreBoard labels the communities again
+        board.version += 1
+        board.recalculate_score()
+
+    screen = pygame.Surface((width * BS, height * BS))
+    print("\ntime [ms]               Board  StoreBoard")
+    for name, func in [
+        ("repr", repr),
+        ("full rows", lambda board: board._calculate_full_rows()),
+        ("score from scratch", score_from_scratch),
+        ("draw blocks", lambda board: board.draw_blocks(screen)),
+    ]:
+        t_list = min(timeit.repeat(lambda: func(board_list), number=1, repeat=5))
+        t_store = min(timeit.repeat(lambda: func(board_store), number=1, repeat=5))
+        print(f"  {name:<20} {1e3 * t_list:7.2f} {1e3 * t_store:10.2f}")
+
+
+if __name__ == "__main__":
+    main()
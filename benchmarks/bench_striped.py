@@ -0,0 +1,53 @@
+"""Scaling of the striped score with the number of worker processes
+
+Run from the root directory:
+
+    python -m benchmarks.bench_striped
+
+The speedup is limited by the number of CPU cores of the machine.
+
+"""
+
+import os
+import timeit
+
+from citytetris.board import Board, ScoreMethod
+
+from benchmarks.boards import make_dense_board, tile_board
+
+
+def time_score(board: Board, num_workers: int | None) -> float:
+    method: ScoreMethod = "striped"
+    if num_workers is None:
+        method, num_workers = "labels", 1
+    return min(
+        timeit.repeat(
+            lambda: board.calculate_score(method=method, num_workers=num_workers),
+            number=1,
+            repeat=3,
+        )
+    )
+
+
+def main() -> None:
+    board = tile_board(make_dense_board(100, 200), 5, 20)
+    score = board.score()
+    print(f"board {board.height}x{board.width} with {len(board.block_list)} blocks")
+    print(f"{os.cpu_count()} CPU cores\n")
+
+    # warm up the process pools and the highlights, which are not timed
+    for num_workers in [1, 2, 4, 8]:
+        assert board.calculate_score("striped", num_workers=num_workers) == score
+
+    time_serial = time_score(board, None)
+    print(f"labels (serial)   {1e3 * time_serial:8.1f} ms")
+    for num_workers in [1, 2, 4, 8]:
+        seconds = time_score(board, num_workers)
+        print(
+            f"striped {num_workers} worker{'s' if num_workers > 1 else ' '}  "
+            f"{1e3 * seconds:8.1f} ms  speedup {time_serial / seconds:4.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Compare blocks_touch with the coordinate based implementation it replaced
+
+Run from the root directory:
+
+    python -m benchmarks.bench_touch
+
+"""
+
+import itertools
+import random
+import timeit
+from typing import Callable
+
+from citytetris.blocks import Block
+from citytetris.constants import BS
+from citytetris.network import MAX_TOUCH_DISTANCE, blocks_touch
+
+from benchmarks.boards import make_dense_board
+
+
+def blocks_touch_reference(block0: Block, block1: Block) -> bool:
+    # previous implementation, compares all 4x4 pairs of coordinates
+    for (x0, y0), (x1, y1) in itertools.product(
+        block0.yield_indices(), block1.yield_indices()
+    ):
+        if abs(x0 - x1) + abs(y0 - y1) == 1:
+            return True
+    return False
+
+
+Pairs = list[tuple[Block, Block]]
+
+
+def get_pairs(
+    block_list: list[Block], num_pairs: int, seed: int = 0
+) -> tuple[Pairs, Pairs]:
+    """Get random pairs of blocks and pairs of blocks close to each other
+
+    Close pairs cannot be rejected by their bounding box.
+
+    """
+    rng = random.Random(seed)
+    if len(block_list) ** 2 <= num_pairs:
+        pairs = list(itertools.combinations(block_list, 2))
+    else:
+        pairs = []
+        for _ in range(num_pairs):
+            block0, block1 = rng.sample(block_list, 2)
+            pairs.append((block0, block1))
+
+    max_distance = MAX_TOUCH_DISTANCE * BS
+    pairs_close = [
+        (block0, block1)
+        for block0, block1 in pairs
+        if (abs(block0.x - block1.x) <= max_distance)
+        and (abs(block0.y - block1.y) <= max_distance)
+    ]
+    return pairs, pairs_close
+
+
+def time_pairs(
+    func: Callable[[Block, Block], bool], pairs: Pairs, repeat: int = 5
+) -> float:
+    def run() -> None:
+        for block0, block1 in pairs:
+            func(block0, block1)
+
+    return min(timeit.repeat(run, number=1, repeat=repeat)) / max(1, len(pairs))
+
+
+def main() -> None:
+    print(
+        f"{'board':>9} {'pairs':>8} {'n':>7} {'old [us]':>9} {'new [us]':>9} {'x':>6}"
+    )
+    for width, height in [(10, 20), (100, 200)]:
+        board = make_dense_board(width, height)
+        pairs_all, pairs_close = get_pairs(board.block_list, num_pairs=100_000)
+        for name, pairs in [("random", pairs_all), ("close", pairs_close)]:
+            assert all(
+                blocks_touch(*pair) == blocks_touch_reference(*pair) for pair in pairs
+            )
+            t_old = time_pairs(blocks_touch_reference, pairs)
+            t_new = time_pairs(blocks_touch, pairs)
+            print(
+                f"{height:>4}x{width:<4} {name:>8} {len(pairs):>7} "
+                f"{1e6 * t_old:>9.3f} {1e6 * t_new:>9.3f} {t_old / t_new:>6.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
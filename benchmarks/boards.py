@@ -0,0 +1,54 @@
+"""Helpers to create densely filled boards for the benchmarks"""
+
+import copy
+import itertools
+import random
+
+from citytetris.blocks import BLOCKS_ALL
+from citytetris.board import Board
+
+
+def make_dense_board(
+    width: int, height: int, seed: int = 0, max_failures: int = 20
+) -> Board:
+    """Drop random blocks, each at the lowest of a few random positions, until no
+    more blocks fit
+
+    """
+    rng = random.Random(seed)
+    board = Board(width=width, height=height, centered=False)
+    failures = 0
+    while failures < max_failures:
+        candidates = []
+        for _ in range(4):
+            block = rng.choice(BLOCKS_ALL)()
+            block.rotation = rng.randrange(4)
+            block.move_right(rng.randrange(width - max(x for x, _ in block.squares)))
+            if not any(board.is_occupied(*index) for index in block.yield_indices()):
+                candidates.append((board.drop_distance(block), block))
+        if not candidates:
+            failures += 1
+            continue
+
+        failures = 0
+        distance, block = max(candidates, key=lambda candidate: candidate[0])
+        block.move_down(distance)
+        board.add_block(block)
+    return board
+
+
+def tile_board(board: Board, num_x: int, num_y: int) -> Board:
+    """Repeat the blocks of a board to get a board num_x times wider and num_y
+    times higher, much faster than filling a board that big with make_dense_board
+
+    """
+    board_tiled = Board(
+        width=num_x * board.width, height=num_y * board.height, centered=False
+    )
+    for tile_x, tile_y in itertools.product(range(num_x), range(num_y)):
+        for block in board.block_list:
+            block = copy.copy(block)
+            block.move_right(tile_x * board.width)
+            block.move_down(tile_y * board.height)
+            board_tiled.add_block(block)
+    return board_tiled
@@ -0,0 +1,63 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from citytetris.board import Board
+
+
+def _evaluate(board: Board) -> Board:
+    board.get_blocks_to_highlight()
+    return board
+
+
+class BackgroundScorer:
+    """Evaluate the scoring rules of a board on a worker thread
+
+    Call update once per frame. When the board has changed, a snapshot of it is
+    evaluated on the worker thread while the game keeps showing the last highlights.
+    The board version serves as the generation of a result: results for an older
+    version are discarded and the current version is submitted instead.
+
+    The score itself is kept up to date by the board's score tracker, only the
+    highlights lag behind.
+
+    """
+
+    def __init__(self, board: Board) -> None:
+        self.board = board
+        self.stale_results = 0
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="score")
+        self._future: Future[Board] | None = None
+
+    @property
+    def pending(self) -> bool:
+        return self._future is not None
+
+    def update(self) -> bool:
+        """Apply a finished result and submit the board if it changed since
+
+        Returns whether new highlights were applied. This never waits for the worker.
+
+        """
+        applied = False
+        if (self._future is not None) and self._future.done():
+            snapshot = self._future.result()
+            self._future = None
+            if snapshot.version == self.board.version:
+                self.board.adopt_snapshot(snapshot)
+                self.board.update_highlights()
+                applied = True
+            else:
+                self.stale_results += 1
+
+        if (self._future is None) and not self.board.highlights_up_to_date:
+            self._future = self._executor.submit(_evaluate, self.board.snapshot())
+        return applied
+
+    def wait(self) -> None:
+        """Wait until the highlights are up to date"""
+        while not self.board.highlights_up_to_date:
+            if self._future is not None:
+                self._future.result()
+            self.update()
+
+    def close(self) -> None:
+        self._executor.shutdown(cancel_futures=True)
@@ -2,6 +2,7 @@ import pygame
 from typing import Iterator
 
 from citytetris.constants import BS
+from citytetris.tiles import blit_squares
 from citytetris.colors import (
     ColorShade,
     OrangeShade,
@@ -16,29 +17,121 @@ from citytetris.colors import (
 Coord = tuple[int, int]
 Coord4Cells = tuple[Coord, Coord, Coord, Coord]
 Variants = tuple[Coord4Cells, Coord4Cells, Coord4Cells, Coord4Cells]
+# for each column of a block variant: the column offset and the lowest row offset
+Skirt = tuple[Coord, ...]
+
+
+def _make_skirts(block_variants: Variants) -> tuple[Skirt, Skirt, Skirt, Skirt]:
+    skirts = []
+    for squares in block_variants:
+        bottom: dict[int, int] = {}
+        for x, y in squares:
+            bottom[x] = max(bottom.get(x, y), y)
+        skirts.append(tuple(sorted(bottom.items())))
+    return skirts[0], skirts[1], skirts[2], skirts[3]
+
+
+class BlockKind:
+    """Everything that is the same for all blocks of one type
+
+    A single instance is shared by all blocks of that type.
+
+    """
+
+    def __init__(
+        self, symbol: str, code: int, shades: ColorShade, block_variants: Variants
+    ) -> None:
+        self.symbol = symbol
+        # type code stored in the board's occupancy grid, 0 marks an empty cell
+        self.code = code
+        self.shades = shades
+        self.block_variants = block_variants
+        self.skirts = _make_skirts(block_variants)
 
 
 class Block:
-    def __init__(self) -> None:
-        self.x: int = 0
-        self.y: int = 0
-        self.rotation: int = 0
-        self.block_variants: Variants = (
+    __slots__ = ("_x", "_y", "_rotation", "highlight", "_indices")
+
+    kind = BlockKind(
+        symbol="x",
+        code=8,
+        shades=RedShade(),
+        block_variants=(
             ((0, 0), (0, 1), (0, 2), (0, 3)),
             ((0, 0), (1, 0), (2, 0), (3, 0)),
             ((0, 0), (0, 1), (0, 2), (0, 3)),
             ((0, 0), (1, 0), (2, 0), (3, 0)),
-        )
-        self.shades: ColorShade = RedShade()
-        self.symbol: str = "x"
+        ),
+    )
+
+    def __init__(self) -> None:
+        self._x: int = 0
+        self._y: int = 0
+        self._rotation: int = 0
         self.highlight: bool = False
+        # absolute cell coordinates, reset whenever the block moves or rotates
+        self._indices: tuple[Coord, ...] | None = None
 
     def __hash__(self) -> int:
-        return hash((self.x, self.y, self.rotation))
+        return hash((self._x, self._y, self._rotation))
+
+    @property
+    def x(self) -> int:
+        return self._x
+
+    @x.setter
+    def x(self, value: int) -> None:
+        self._x = value
+        self._indices = None
+
+    @property
+    def y(self) -> int:
+        return self._y
+
+    @y.setter
+    def y(self, value: int) -> None:
+        self._y = value
+        self._indices = None
+
+    @property
+    def rotation(self) -> int:
+        return self._rotation
+
+    @rotation.setter
+    def rotation(self, value: int) -> None:
+        self._rotation = value
+        self._indices = None
+
+    @property
+    def symbol(self) -> str:
+        return self.kind.symbol
+
+    @property
+    def code(self) -> int:
+        return self.kind.code
+
+    @property
+    def shades(self) -> ColorShade:
+        return self.kind.shades
+
+    @property
+    def block_variants(self) -> Variants:
+        return self.kind.block_variants
 
     @property
     def squares(self) -> Coord4Cells:
-        return self.block_variants[self.rotation]
+        return self.kind.block_variants[self._rotation]
+
+    @property
+    def skirt(self) -> Skirt:
+        return self.kind.skirts[self._rotation]
+
+    @property
+    def indices(self) -> tuple[Coord, ...]:
+        if self._indices is None:
+            offset_x, offset_y = self._x // BS, self._y // BS
+            self._indices = tuple((x + offset_x, y + offset_y) for x, y in self.squares)
+        return self._indices
 
     def get_rects(self) -> list[pygame.Rect]:
         return [
@@ -52,24 +145,19 @@ class Block:
         ]
 
     def yield_indices(self) -> Iterator[Coord]:
-        for x, y in self.squares:
-            offset_x, offset_y = self.x // BS, self.y // BS
-            yield x + offset_x, y + offset_y
+        return iter(self.indices)
 
     def rotate(self) -> None:
-        self.rotation = (self.rotation + 1) % 4
+        self.rotation = (self._rotation + 1) % 4
 
     def move_left(self, n: int = 1) -> None:
-        for _ in range(n):
-            self.x -= BS
+        self.x -= n * BS
 
     def move_right(self, n: int = 1) -> None:
-        for _ in range(n):
-            self.x += BS
+        self.x += n * BS
 
     def move_down(self, n: int = 1) -> None:
-        for _ in range(n):
-            self.y += BS
+        self.y += n * BS
 
     def get_rightmost_x(self) -> int:
         return (1 + max(self.squares, key=lambda x: x[0])[0]) * BS + self.x
@@ -78,59 +166,16 @@ class Block:
         return (1 + max(self.squares, key=lambda x: x[1])[1]) * BS + self.y
 
     def draw(self, screen: pygame.surface.Surface) -> None:
+        blit_squares(screen, self.yield_squares_to_draw())
+
+    def yield_squares_to_draw(self) -> Iterator[tuple[ColorShade, bool, int, int]]:
+        # shades, highlight and position in pixels of each square, see blit_squares
         for block_x, block_y in self.squares:
-            rect = pygame.draw.rect(
-                screen,
-                self.shades.fill,
-                (
-                    self.x + block_x * BS,
-                    self.y + block_y * BS,
-                    BS,
-                    BS,
-                ),
-            )
-            if self.highlight:
-                # draw a smaller rect into the center of the rect
-                pygame.draw.rect(
-                    screen,
-                    self.shades.light,
-                    (
-                        self.x + block_x * BS + BS // 2,
-                        self.y + block_y * BS + BS // 2,
-                        BS // 2,
-                        BS // 2,
-                    ),
-                )
-
-            # draw block borders
-            width = 3  # line width
-            pygame.draw.line(
-                screen,
-                self.shades.light,
-                (self.x + block_x * BS, self.y + block_y * BS),
-                (self.x + (1 + block_x) * BS, self.y + block_y * BS),
-                width=width,
-            )
-            pygame.draw.line(
-                screen,
-                self.shades.light,
-                (self.x + block_x * BS, self.y + block_y * BS),
-                (self.x + block_x * BS, self.y + (1 + block_y) * BS),
-                width=width,
-            )
-            pygame.draw.line(
-                screen,
-                self.shades.dark,
-                (self.x + (1 + block_x) * BS, self.y + block_y * BS),
-                (self.x + (1 + block_x) * BS, self.y + (1 + block_y) * BS),
-                width=width,
-            )
-            pygame.draw.line(
-                screen,
-                self.shades.dark,
-                (self.x + block_x * BS, self.y + (1 + block_y) * BS),
-                (self.x + (1 + block_x) * BS, self.y + (1 + block_y) * BS),
-                width=width,
+            yield (
+                self.kind.shades,
+                self.highlight,
+                self.x + block_x * BS,
+                self.y + block_y * BS,
             )
 
     def collides_bottom(self, rect_list: list[pygame.Rect]) -> bool:
@@ -174,94 +219,115 @@ class Block:
 
 
 class IBlock(Block):
-    def __init__(self) -> None:
-        super().__init__()
-        self.shades = GreenShade()
-        self.symbol = "I"
-        self.block_variants = (
+    __slots__ = ()
+
+    kind = BlockKind(
+        symbol="I",
+        code=1,
+        shades=GreenShade(),
+        block_variants=(
             ((0, 0), (1, 0), (2, 0), (3, 0)),
             ((0, 0), (0, 1), (0, 2), (0, 3)),
             ((0, 0), (1, 0), (2, 0), (3, 0)),
             ((0, 0), (0, 1), (0, 2), (0, 3)),
-        )
+        ),
+    )
 
 
 class LBlock(Block):
-    def __init__(self) -> None:
-        super().__init__()
-        self.shades = BlueShade()
-        self.symbol = "L"
-        self.block_variants = (
+    __slots__ = ()
+
+    kind = BlockKind(
+        symbol="L",
+        code=2,
+        shades=BlueShade(),
+        block_variants=(
             ((0, 0), (1, 0), (2, 0), (0, 1)),
             ((0, 0), (1, 0), (1, 1), (1, 2)),
             ((0, 1), (1, 1), (2, 1), (2, 0)),
             ((0, 0), (0, 1), (0, 2), (1, 2)),
-        )
+        ),
+    )
 
 
 class JBlock(Block):
-    def __init__(self) -> None:
-        super().__init__()
-        self.shades = CyanShade()
-        self.symbol = "J"
-        self.block_variants = (
+    __slots__ = ()
+
+    kind = BlockKind(
+        symbol="J",
+        code=3,
+        shades=CyanShade(),
+        block_variants=(
             ((0, 0), (1, 0), (2, 0), (2, 1)),
             ((1, 0), (1, 1), (1, 2), (0, 2)),
             ((0, 0), (0, 1), (1, 1), (2, 1)),
             ((0, 0), (1, 0), (0, 1), (0, 2)),
-        )
+        ),
+    )
 
 
 class OBlock(Block):
-    def __init__(self) -> None:
-        super().__init__()
-        self.shades = OrangeShade()
-        self.symbol = "O"
-        self.block_variants = (
+    __slots__ = ()
+
+    kind = BlockKind(
+        symbol="O",
+        code=4,
+        shades=OrangeShade(),
+        block_variants=(
             ((0, 0), (0, 1), (1, 0), (1, 1)),
             ((0, 0), (0, 1), (1, 0), (1, 1)),
             ((0, 0), (0, 1), (1, 0), (1, 1)),
             ((0, 0), (0, 1), (1, 0), (1, 1)),
-        )
+        ),
+    )
 
 
 class SBlock(Block):
-    def __init__(self) -> None:
-        super().__init__()
-        self.shades = RedShade()
-        self.symbol = "S"
-        self.block_variants = (
+    __slots__ = ()
+
+    kind = BlockKind(
+        symbol="S",
+        code=5,
+        shades=RedShade(),
+        block_variants=(
             ((0, 1), (1, 1), (1, 0), (2, 0)),
             ((0, 0), (0, 1), (1, 1), (1, 2)),
             ((0, 1), (1, 1), (1, 0), (2, 0)),
             ((0, 0), (0, 1), (1, 1), (1, 2)),
-        )
+        ),
+    )
 
 
 class ZBlock(Block):
-    def __init__(self) -> None:
-        super().__init__()
-        self.shades = PurpleShade()
-        self.symbol = "Z"
-        self.block_variants = (
+    __slots__ = ()
+
+    kind = BlockKind(
+        symbol="Z",
+        code=6,
+        shades=PurpleShade(),
+        block_variants=(
             ((0, 0), (1, 0), (1, 1), (2, 1)),
             ((1, 0), (1, 1), (0, 1), (0, 2)),
             ((0, 0), (1, 0), (1, 1), (2, 1)),
             ((1, 0), (1, 1), (0, 1), (0, 2)),
-        )
+        ),
+    )
 
 
 class TBlock(Block):
-    def __init__(self) -> None:
-        super().__init__()
-        self.shades = YellowShade()
-        self.symbol = "T"
-        self.block_variants = (
+    __slots__ = ()
+
+    kind = BlockKind(
+        symbol="T",
+        code=7,
+        shades=YellowShade(),
+        block_variants=(
             ((0, 0), (1, 0), (2, 0), (1, 1)),
             ((0, 1), (1, 1), (1, 0), (1, 2)),
             ((0, 1), (1, 1), (2, 1), (1, 0)),
             ((0, 0), (0, 1), (0, 2), (1, 1)),
-        )
+        ),
+    )
 
 
 BLOCKS_ALL = [
@@ -1,16 +1,38 @@
+import copy
 import random
+import time
+from collections import Counter
 from dataclasses import dataclass, field
+from typing import Callable, Collection, Literal
 
+import numpy as np
 import pygame
 
 from citytetris.blocks import BLOCKS_ALL, Block
-from citytetris.constants import BLOCKS_HEIGHT, BLOCKS_WIDTH
+from citytetris.constants import BLOCKS_HEIGHT, BLOCKS_WIDTH, BS
+from citytetris.incremental import ScoreTracker
+from citytetris.labels import (
+    calculate_score_and_highlights as calculate_score_and_highlights_labels,
+)
+from citytetris.rules import RULES, Rule, RuleResult
 from citytetris.network import (
     get_largest_T_community,
     get_longest_I_block_distance,
     get_number_of_disconnected_L_J_graphs,
 )
-from citytetris.score import Score
+from citytetris.score import SCORE_FIELDS, Score
+from citytetris.striped import (
+    calculate_score_and_highlights as calculate_score_and_highlights_striped,
+)
+from citytetris.tiles import blit_squares
+
+# how Board.calculate_score determines the score:
+# - incremental: read the score that is kept up to date while blocks are added
+# - network: calculate it from scratch with the graph based functions
+# - labels: calculate it from scratch with array operations on the grids
+# - rules: evaluate the scoring rules, only re-running the invalidated ones
+# - striped: like labels, but on horizontal stripes of the grids in parallel
+ScoreMethod = Literal["incremental", "network", "labels", "rules", "striped"]
 
 
 def _rand_block() -> Block:
@@ -23,20 +45,144 @@ class Board:
     height: int = BLOCKS_HEIGHT
     block_list: list[Block] = field(default_factory=list)
     block_active: Block = field(default_factory=_rand_block)
-    rect_list: list[pygame.Rect] = field(default_factory=list)
     centered: bool = True
+    # scoring rules used for the highlights and the "rules" score method
+    rules: list[Rule] = field(default_factory=lambda: list(RULES), repr=False)
+    # cell-indexed view of the settled blocks: the type code (0 means empty) and the
+    # index into block_list (-1 means empty) of the block occupying each cell
+    occupancy: np.ndarray = field(init=False, repr=False)
+    piece_ids: np.ndarray = field(init=False, repr=False)
+    # skyline: row of the topmost occupied cell per column (height if empty)
+    column_tops: np.ndarray = field(init=False, repr=False)
+    tracker: ScoreTracker = field(init=False, repr=False)
+    # increased whenever a block is added, used to cache the highlights
+    version: int = field(init=False, default=0)
+    highlight_cache_hits: int = field(init=False, default=0, repr=False)
+    highlight_cache_misses: int = field(init=False, default=0, repr=False)
+    _highlight_cache: tuple[int, set[Block]] | None = field(
+        init=False, default=None, repr=False
+    )
+    _highlight_version: int = field(init=False, default=-1, repr=False)
+    # total time in seconds and number of runs per rule, including updates
+    rule_timings: dict[str, float] = field(init=False, repr=False)
+    rule_evaluations: dict[str, int] = field(init=False, repr=False)
+    _rule_results: dict[str, RuleResult] = field(init=False, repr=False)
+    _dirty_rules: set[str] = field(init=False, repr=False)
 
     def __post_init__(self) -> None:
+        self._make_grids()
+        self.column_tops = np.full(self.width, self.height, dtype=np.int32)
+        self.tracker = ScoreTracker(self.width, self.height)
+        self.rule_timings = {rule.name: 0.0 for rule in self.rules}
+        self.rule_evaluations = {rule.name: 0 for rule in self.rules}
+        self._rule_results = {}
+        self._dirty_rules = {rule.name for rule in self.rules}
+        for block in self.block_list:
+            self._register_block(block)
+
         if self.centered:
             self.block_active.move_right(self.width // 2 - 1)
 
+    def _make_grids(self) -> None:
+        # subclasses may store the grids differently, e.g. in chunks, so code that
+        # needs arrays goes through get_built_grids
+        self.occupancy = np.zeros((self.height, self.width), dtype=np.int8)
+        self.piece_ids = np.full((self.height, self.width), -1, dtype=np.int32)
+
+    @property
+    def rect_list(self) -> list[pygame.Rect]:
+        # only kept for backwards compatibility, collisions are checked on the grid
+        return [rect for block in self.block_list for rect in block.get_rects()]
+
+    def _in_bounds(self, x: int, y: int) -> bool:
+        return (0 <= x < self.width) and (0 <= y < self.height)
+
+    def _fill_cells(self, block: Block, piece_id: int) -> None:
+        for x, y in block.yield_indices():
+            if self._in_bounds(x, y):
+                self.occupancy[y, x] = block.code
+                self.piece_ids[y, x] = piece_id
+                self.column_tops[x] = min(self.column_tops[x], y)
+
+    def _get_neighbor_ids(self, block: Block) -> set[int]:
+        neighbor_ids = set()
+        for x, y in block.yield_indices():
+            for x_n, y_n in ((x - 1, y), (x + 1, y), (x, y - 1), (x, y + 1)):
+                if self._in_bounds(x_n, y_n):
+                    neighbor_ids.add(int(self.piece_ids[y_n, x_n]))
+        neighbor_ids.discard(-1)
+        return neighbor_ids
+
+    def _register_block(self, block: Block) -> None:
+        # register a block of block_list in the grids and the score tracker
+        piece_id = self.tracker.add_block(block, self._get_neighbor_ids(block))
+        self._fill_cells(block, piece_id)
+        self._invalidate_rules(block)
+        self.version += 1
+
     def add_block(self, block: Block) -> None:
         # the None check below is theoretically unnecessary, but for scripting/testing,
         # we set the active block to None in order to prevent the board from starting
         # with a random block
         if self.block_active is not None:
             self.block_list.append(block)
-            self.rect_list.extend(block.get_rects())
+            self._register_block(block)
+
+    def is_occupied(self, x: int, y: int) -> bool:
+        # cells outside of the board are never occupied, borders are checked separately
+        return self._in_bounds(x, y) and bool(self.occupancy[y, x])
+
+    def _collides(self, block: Block, dx: int, dy: int) -> bool:
+        return any(self.is_occupied(x + dx, y + dy) for x, y in block.yield_indices())
+
+    def collides_bottom(self, block: Block) -> bool:
+        return self._collides(block, 0, 1)
+
+    def collides_left(self, block: Block) -> bool:
+        return self._collides(block, -1, 0)
+
+    def collides_right(self, block: Block) -> bool:
+        return self._collides(block, 1, 0)
+
+    def drop_distance(self, block: Block) -> int:
+        """Number of rows the block can fall before it lands"""
+        offset_x, offset_y = block.x // BS, block.y // BS
+        distance = self.height
+        for dx, dy in block.skirt:
+            x, y = offset_x + dx, offset_y + dy
+            if not (0 <= x < self.width):
+                distance = min(distance, self.height - 1 - y)
+                continue
+
+            top = int(self.column_tops[x])
+            if top <= y:
+                # the block is below the skyline (e.g. slid under an overhang), so
+                # search the column for the next occupied cell
+                top = self._find_occupied_row(x, y + 1)
+            distance = min(distance, top - 1 - y)
+        return max(distance, 0)
+
+    def _find_occupied_row(self, x: int, row: int) -> int:
+        # first occupied row of column x from row down, height if there is none
+        (rows,) = np.nonzero(self.occupancy[row:, x])
+        return row + int(rows[0]) if len(rows) else self.height
+
+    def get_building_front(self) -> int:
+        # the topmost occupied row, height on an empty board
+        return int(self.column_tops.min())
+
+    def get_built_grids(self) -> tuple[np.ndarray, np.ndarray]:
+        """Get occupancy and piece_ids as arrays, only the rows from the building
+        front down
+
+        All settled blocks are in these rows, which is all that scoring needs.
+
+        """
+        front = min(self.get_building_front(), self.height)
+        return (
+            np.asarray(self.occupancy[front:, :]),
+            np.asarray(self.piece_ids[front:, :]),
+        )
 
     def spawn_block(self, block: Block) -> None:
         self.add_block(self.block_active)
@@ -46,6 +192,39 @@ class Board:
             # move block to the middle of the board
             self.block_active.move_right(self.width // 2 - 1)
 
+    def _get_blocks(self) -> list[Block]:
+        # the settled blocks as Block objects
+        return self.block_list
+
+    def get_blocks_in_area(
+        self, x_start: int, y_start: int, x_stop: int, y_stop: int
+    ) -> list[Block]:
+        """Get the settled blocks with cells in the area, found on the piece id grid
+        instead of by going through all blocks
+
+        """
+        ids = np.unique(self.piece_ids[y_start:y_stop, x_start:x_stop])
+        return [self.block_list[piece_id] for piece_id in ids[ids >= 0].tolist()]
+
+    def get_highlight_flags(self) -> np.ndarray:
+        # highlight flag of each settled block, indexed by piece id
+        return np.fromiter(
+            (block.highlight for block in self.block_list),
+            dtype=bool,
+            count=len(self.block_list),
+        )
+
+    def draw_blocks(self, screen: pygame.surface.Surface) -> None:
+        # all squares are blitted in one batch
+        blit_squares(
+            screen,
+            (
+                square
+                for block in self.block_list
+                for square in block.yield_squares_to_draw()
+            ),
+        )
+
     def remove_highlight_from_blocks(self) -> None:
         for block in self.block_list:
             block.highlight = False
@@ -54,47 +233,209 @@ class Board:
         for block in blocks:
             block.highlight = True
 
-    def calculate_score(self) -> Score:
-        self.remove_highlight_from_blocks()
+    def set_highlight_flags(self, flags: np.ndarray) -> None:
+        """Set the highlight flag of the blocks, indexed by piece id, like
+        update_highlights does
+
+        """
+        for block, flag in zip(self.block_list, flags.tolist()):
+            block.highlight = flag
+        self._highlight_version = self.version
+
+    def score(self) -> Score:
+        """Get the current score, this does not touch the blocks' highlights"""
+        # the score is kept up to date while blocks are added
+        score = self.tracker.score()
+        score.extra = self._score_other_rules()
+        return score
+
+    def _get_other_rules(self) -> list[Rule]:
+        # rules without a field in Score, which the tracker and the scorers don't know
+        return [rule for rule in self.rules if rule.name not in SCORE_FIELDS]
+
+    def _score_other_rules(self) -> dict[str, int]:
+        rules = self._get_other_rules()
+        if not rules:
+            return {}
+        results = self.evaluate_rules({rule.name for rule in rules})
+        return {rule.name: results[rule.name][0] for rule in rules}
+
+    def _run_rule(self, rule: Rule, func: Callable[[], RuleResult]) -> None:
+        tic = time.perf_counter()
+        self._rule_results[rule.name] = func()
+        self.rule_timings[rule.name] += time.perf_counter() - tic
+        self.rule_evaluations[rule.name] += 1
+
+    def _invalidate_rules(self, block: Block) -> None:
+        for rule in self.rules:
+            if (rule.name in self._dirty_rules) or not rule.is_invalidated_by(block):
+                continue
+            if rule.update is None:
+                self._dirty_rules.add(rule.name)
+            else:
+                update = rule.update
+                result = self._rule_results[rule.name]
+                self._run_rule(rule, lambda: update(self, block, result))
+
+    def evaluate_rules(
+        self, names: Collection[str] | None = None
+    ) -> dict[str, RuleResult]:
+        """Get the value and the blocks to highlight per rule
+
+        Only the rules that were invalidated since their last evaluation are run,
+        and only the ones in names if it is given.
+
+        """
+        for rule in self.rules:
+            if (names is not None) and (rule.name not in names):
+                continue
+            if rule.name in self._dirty_rules:
+                self._run_rule(rule, lambda: rule.calculate(self))
+                self._dirty_rules.discard(rule.name)
+        return self._rule_results
+
+    def get_blocks_to_highlight(self) -> set[Block]:
+        # highlights only change when a block is added
+        if (self._highlight_cache is not None) and (
+            self._highlight_cache[0] == self.version
+        ):
+            self.highlight_cache_hits += 1
+            return self._highlight_cache[1]
+
+        self.highlight_cache_misses += 1
         blocks_to_highlight = set()
+        for _, blocks in self.evaluate_rules().values():
+            blocks_to_highlight.update(blocks)
+
+        self._highlight_cache = self.version, blocks_to_highlight
+        return blocks_to_highlight
+
+    @property
+    def drawn_version(self) -> tuple[int, int]:
+        # changes whenever draw_blocks would draw something different
+        return self.version, self._highlight_version
+
+    @property
+    def highlights_up_to_date(self) -> bool:
+        return self._highlight_version == self.version
+
+    def snapshot(self) -> "Board":
+        """Get a copy of the board that can be scored on another thread
 
-        full_rows = self._calculate_full_rows()
+        The settled blocks are shared, everything that changes when a block is added
+        or the rules are evaluated is copied.
 
-        longest_road, blocks = self._calculate_longest_road()
-        blocks_to_highlight.update(blocks)
+        """
+        board = copy.copy(self)
+        board.block_list = copy.copy(self.block_list)
+        board.occupancy = self.occupancy.copy()
+        board.piece_ids = self.piece_ids.copy()
+        board.column_tops = self.column_tops.copy()
+        board.rule_timings = self.rule_timings.copy()
+        board.rule_evaluations = self.rule_evaluations.copy()
+        board._rule_results = self._rule_results.copy()
+        board._dirty_rules = self._dirty_rules.copy()
+        return board
 
-        num_l_j_communities, blocks = self._calculate_L_J_communities()
-        blocks_to_highlight.update(blocks)
+    def adopt_snapshot(self, board: "Board") -> None:
+        """Take over the evaluated rules and highlights of a snapshot
 
-        largest_T_community, blocks = self._calculate_largest_T_community()
-        blocks_to_highlight.update(blocks)
+        The snapshot must be of the current version of this board.
 
+        """
+        if board.version != self.version:
+            raise ValueError(
+                f"snapshot of version {board.version} is stale, the board is at "
+                f"version {self.version}"
+            )
+        self.rule_timings = board.rule_timings
+        self.rule_evaluations = board.rule_evaluations
+        self._rule_results = board._rule_results
+        self._dirty_rules = board._dirty_rules
+        self._highlight_cache = board._highlight_cache
+
+    def update_highlights(self) -> None:
+        """Set the highlight flag of the blocks, this is only needed for rendering"""
+        if self.highlights_up_to_date:
+            self.highlight_cache_hits += 1
+            return
+
+        blocks_to_highlight = self.get_blocks_to_highlight()
+        self.remove_highlight_from_blocks()
         self.add_highlight_to_blocks(blocks_to_highlight)
+        self._highlight_version = self.version
 
+    def calculate_score(
+        self, method: ScoreMethod = "incremental", num_workers: int = 1
+    ) -> Score:
+        # calculate the score and highlight the scoring blocks; num_workers is the
+        # number of processes for the striped method
+        if method in ("labels", "striped"):
+            # the highlights come from the same label arrays as the score
+            occupancy, piece_ids = self.get_built_grids()
+            if method == "labels":
+                score, flags = calculate_score_and_highlights_labels(
+                    occupancy, piece_ids, len(self.block_list)
+                )
+            else:
+                score, flags = calculate_score_and_highlights_striped(
+                    occupancy, piece_ids, len(self.block_list), num_workers
+                )
+            self.set_highlight_flags(flags)
+            score.extra = self._score_other_rules()
+            for rule in self._get_other_rules():
+                self.add_highlight_to_blocks(self._rule_results[rule.name][1])
+            return score
+
+        self.update_highlights()
+        if method == "incremental":
+            return self.score()
+        if method == "network":
+            return self.recalculate_score()
+        if method == "rules":
+            results = self.evaluate_rules()
+            return Score.from_values(
+                {name: value for name, (value, _) in results.items()}
+            )
+        raise ValueError(f"unknown score method {method!r}")
+
+    def recalculate_score(self) -> Score:
+        """Calculate the score from scratch, without using the score tracker"""
+        longest_road, _ = self._calculate_longest_road()
+        num_l_j_communities, _ = self._calculate_L_J_communities()
+        largest_T_community, _ = self._calculate_largest_T_community()
         return Score(
-            full_rows=full_rows,
+            full_rows=self._calculate_full_rows(),
             longest_road=longest_road,
             l_j_communities=num_l_j_communities,
             t_community=largest_T_community,
+            extra={
+                rule.name: rule.calculate(self)[0] for rule in self._get_other_rules()
+            },
         )
 
     def _calculate_full_rows(self) -> int:
         # number of rows that are full of squares
-        squares_per_row = [0 for _ in range(self.height)]
+        squares_per_row: Counter[int] = Counter()
         for block in self.block_list:
             for _, y in block.yield_indices():
                 squares_per_row[y] += 1
-        full_rows = sum(num_squares == self.width for num_squares in squares_per_row)
+        full_rows = sum(
+            num_squares == self.width for num_squares in squares_per_row.values()
+        )
         return full_rows
 
     def _calculate_longest_road(self) -> tuple[int, set[Block]]:
-        return get_longest_I_block_distance(self.block_list)
+        _, piece_ids = self.get_built_grids()
+        return get_longest_I_block_distance(self._get_blocks(), piece_ids)
 
     def _calculate_L_J_communities(self) -> tuple[int, set[Block]]:
-        return get_number_of_disconnected_L_J_graphs(self.block_list)
+        _, piece_ids = self.get_built_grids()
+        return get_number_of_disconnected_L_J_graphs(self._get_blocks(), piece_ids)
 
     def _calculate_largest_T_community(self) -> tuple[int, set[Block]]:
-        return get_largest_T_community(self.block_list)
+        _, piece_ids = self.get_built_grids()
+        return get_largest_T_community(self._get_blocks(), piece_ids)
 
     def __repr__(self) -> str:
         grid = [[" " for _ in range(self.width)] for _ in range(self.height)]
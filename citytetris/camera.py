@@ -0,0 +1,96 @@
+"""Scrollable and zoomable view of boards that do not fit on the screen"""
+
+import math
+from dataclasses import dataclass
+
+import pygame
+
+from citytetris.constants import BS
+
+# cells that are visible, as (x_start, y_start, x_stop, y_stop)
+CellArea = tuple[int, int, int, int]
+
+
+def _clamp(position: int, size_view: int, size_board: int) -> int:
+    if size_board <= size_view:
+        return (size_board - size_view) // 2
+    return min(max(position, 0), size_board - size_view)
+
+
+@dataclass
+class Camera:
+    """Part of the board shown in a viewport of width x height pixels
+
+    Each cell is drawn as a tile of tile_size pixels, which is the zoom level. x and
+    y is the top left corner of the view, in pixels of the board drawn at that zoom
+    level. Block positions are in pixels at BS per cell, see to_screen.
+
+    """
+
+    width: int
+    height: int
+    x: int = 0
+    y: int = 0
+    tile_size: int = BS
+    min_tile_size: int = 1
+    max_tile_size: int = 2 * BS
+
+    def get_visible_cells(self, board_width: int, board_height: int) -> CellArea:
+        """Get the cells that are at least partly inside the view"""
+        x_start = max(0, self.x // self.tile_size)
+        y_start = max(0, self.y // self.tile_size)
+        x_stop = min(board_width, math.ceil((self.x + self.width) / self.tile_size))
+        y_stop = min(board_height, math.ceil((self.y + self.height) / self.tile_size))
+        return x_start, y_start, max(x_start, x_stop), max(y_start, y_stop)
+
+    def to_screen(self, x: int, y: int) -> tuple[int, int]:
+        """Convert a position in board pixels at BS per cell to the viewport"""
+        return (
+            x * self.tile_size // BS - self.x,
+            y * self.tile_size // BS - self.y,
+        )
+
+    def rect_to_screen(self, rect: pygame.Rect) -> pygame.Rect:
+        x, y = self.to_screen(rect.x, rect.y)
+        return pygame.Rect(
+            x, y, rect.width * self.tile_size // BS, rect.height * self.tile_size // BS
+        )
+
+    def scroll(self, dx: int, dy: int) -> None:
+        self.x += dx
+        self.y += dy
+
+    def zoom(self, tile_size: int, anchor: tuple[int, int] | None = None) -> None:
+        """Change the tile size, keeping the board position at anchor in place
+
+        anchor is a position in the viewport, by default its center.
+
+        """
+        tile_size = min(max(tile_size, self.min_tile_size), self.max_tile_size)
+        anchor_x, anchor_y = anchor or (self.width // 2, self.height // 2)
+        self.x = (self.x + anchor_x) * tile_size // self.tile_size - anchor_x
+        self.y = (self.y + anchor_y) * tile_size // self.tile_size - anchor_y
+        self.tile_size = tile_size
+
+    def follow(self, rect: pygame.Rect, margin: int = 2) -> None:
+        """Scroll just enough to show rect, given in board pixels at BS per cell,
+        with margin cells around it
+
+        """
+        rect = self.rect_to_screen(rect).inflate(
+            2 * margin * self.tile_size, 2 * margin * self.tile_size
+        )
+        if rect.width <= self.width:
+            self.x += min(0, rect.left) + max(0, rect.right - self.width)
+        if rect.height <= self.height:
+            self.y += min(0, rect.top) + max(0, rect.bottom - self.height)
+
+    def clamp(self, board_width: int, board_height: int) -> None:
+        """Keep the view on the board, a board smaller than the view is centered"""
+        self.x = _clamp(self.x, self.width, board_width * self.tile_size)
+        self.y = _clamp(self.y, self.height, board_height * self.tile_size)
+
+    @property
+    def state(self) -> tuple[int, int, int]:
+        # changes whenever the view changes
+        return self.x, self.y, self.tile_size
@@ -0,0 +1,312 @@
+"""Sparse grids for the endless city, where the board is far higher than what is
+actually built
+
+The cells are stored in chunks of CHUNK_SIZE x CHUNK_SIZE that are only allocated
+when a cell in them is set, so memory grows with the built area. The city grows
+upwards, and chunks far below the building front are rarely read again. These are
+compacted: compressed in memory, or spilled to files in a directory. Compacted
+chunks are loaded again transparently when they are accessed.
+
+"""
+
+import itertools
+import zlib
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from citytetris.blocks import Block
+from citytetris.board import Board
+from citytetris.constants import BLOCKS_HEIGHT, BLOCKS_WIDTH
+from citytetris.store import SYMBOLS
+
+CHUNK_SIZE = 32
+# rows of the endless city, far more than will ever be built
+ENDLESS_HEIGHT = 1_000_000
+
+ChunkKey = tuple[int, int]
+
+# spilled files are never overwritten, so copies of a grid can share them
+_spill_numbers = itertools.count()
+
+
+def _to_slice(index: int | slice, size: int) -> slice:
+    if isinstance(index, slice):
+        start, stop, step = index.indices(size)
+        if step != 1:
+            raise IndexError("chunked grids only support slices with step 1")
+        return slice(start, max(start, stop))
+    index = int(index)
+    if not (-size <= index < size):
+        raise IndexError(f"index {index} is out of bounds for size {size}")
+    index %= size
+    return slice(index, index + 1)
+
+
+class ChunkedGrid:
+    """2d grid of shape (height, width) that allocates its chunks lazily
+
+    Reading works like for a numpy array with a cell index grid[y, x] or slices with
+    step 1, which return a new array. Only single cells can be set. np.asarray gives
+    the whole grid as a dense array, which is only meant for small grids and tests.
+
+    """
+
+    ndim = 2
+
+    def __init__(
+        self,
+        height: int,
+        width: int,
+        dtype: Any,
+        fill_value: int = 0,
+        chunk_size: int = CHUNK_SIZE,
+        spill_dir: str | Path | None = None,
+    ) -> None:
+        self.shape = height, width
+        self.dtype = np.dtype(dtype)
+        self.fill_value = fill_value
+        self.chunk_size = chunk_size
+        self.spill_dir = None if spill_dir is None else Path(spill_dir)
+        self.chunks: dict[ChunkKey, np.ndarray] = {}
+        # compacted chunks, compressed in memory or spilled to a file
+        self.compressed: dict[ChunkKey, bytes] = {}
+        self.spilled: dict[ChunkKey, Path] = {}
+
+    @property
+    def nbytes(self) -> int:
+        """Memory used by the cells, compressed chunks included"""
+        return sum(chunk.nbytes for chunk in self.chunks.values()) + sum(
+            len(data) for data in self.compressed.values()
+        )
+
+    def __len__(self) -> int:
+        return self.shape[0]
+
+    def _new_chunk(self) -> np.ndarray:
+        return np.full((self.chunk_size, self.chunk_size), self.fill_value, self.dtype)
+
+    def _load_chunk(self, key: ChunkKey) -> np.ndarray | None:
+        if key in self.chunks:
+            return self.chunks[key]
+        if key in self.compressed:
+            data = zlib.decompress(self.compressed[key])
+            chunk = np.frombuffer(data, dtype=self.dtype)
+            return chunk.reshape(self.chunk_size, self.chunk_size).copy()
+        if key in self.spilled:
+            chunk_spilled: np.ndarray = np.load(self.spilled[key])
+            return chunk_spilled
+        return None
+
+    def _get_writable_chunk(self, key: ChunkKey) -> np.ndarray:
+        chunk = self._load_chunk(key)
+        if chunk is None:
+            chunk = self._new_chunk()
+        self.chunks[key] = chunk
+        self.compressed.pop(key, None)
+        self.spilled.pop(key, None)
+        return chunk
+
+    def __getitem__(self, index: tuple[int | slice, int | slice]) -> Any:
+        index_y, index_x = index
+        rows = _to_slice(index_y, self.shape[0])
+        columns = _to_slice(index_x, self.shape[1])
+        size = self.chunk_size
+        if not isinstance(index_y, slice) and not isinstance(index_x, slice):
+            chunk = self._load_chunk((rows.start // size, columns.start // size))
+            if chunk is None:
+                return self.dtype.type(self.fill_value)
+            return chunk[rows.start % size, columns.start % size]
+
+        cells = np.full(
+            (rows.stop - rows.start, columns.stop - columns.start),
+            self.fill_value,
+            dtype=self.dtype,
+        )
+        for chunk_y, chunk_x in itertools.product(
+            range(rows.start // size, -(-rows.stop // size)),
+            range(columns.start // size, -(-columns.stop // size)),
+        ):
+            chunk = self._load_chunk((chunk_y, chunk_x))
+            if chunk is None:
+                continue
+            # overlap of the chunk and the requested cells, in grid coordinates
+            y0, y1 = max(rows.start, chunk_y * size), min(
+                rows.stop, (chunk_y + 1) * size
+            )
+            x0, x1 = max(columns.start, chunk_x * size), min(
+                columns.stop, (chunk_x + 1) * size
+            )
+            cells[
+                y0 - rows.start : y1 - rows.start,
+                x0 - columns.start : x1 - columns.start,
+            ] = chunk[
+                y0 - chunk_y * size : y1 - chunk_y * size,
+                x0 - chunk_x * size : x1 - chunk_x * size,
+            ]
+
+        if not isinstance(index_y, slice):
+            return cells[0]
+        if not isinstance(index_x, slice):
+            return cells[:, 0]
+        return cells
+
+    def __setitem__(self, index: tuple[int, int], value: int) -> None:
+        y, x = index
+        if not ((0 <= y < self.shape[0]) and (0 <= x < self.shape[1])):
+            raise IndexError(f"cell {(y, x)} is out of bounds for shape {self.shape}")
+        size = self.chunk_size
+        self._get_writable_chunk((y // size, x // size))[y % size, x % size] = value
+
+    def __array__(self, dtype: Any = None, copy: bool | None = None) -> np.ndarray:
+        cells: np.ndarray = self[:, :]
+        return cells if dtype is None else cells.astype(dtype)
+
+    def find_in_column(self, x: int, row: int) -> int | None:
+        """Get the first row from row down where column x is not the fill value, None
+        if there is none
+
+        Only the chunks that exist are searched, top down, until the row is found.
+
+        """
+        size = self.chunk_size
+        chunk_x = x // size
+        chunk_rows = sorted(
+            {
+                chunk_y
+                for chunk_y, key_x in itertools.chain(
+                    self.chunks, self.compressed, self.spilled
+                )
+                if (key_x == chunk_x) and ((chunk_y + 1) * size > row)
+            }
+        )
+        for chunk_y in chunk_rows:
+            chunk = self._load_chunk((chunk_y, chunk_x))
+            assert chunk is not None
+            start = max(row - chunk_y * size, 0)
+            (rows,) = np.nonzero(chunk[start:, x % size] != self.fill_value)
+            if len(rows):
+                return chunk_y * size + start + int(rows[0])
+        return None
+
+    def copy(self) -> "ChunkedGrid":
+        grid = ChunkedGrid(
+            *self.shape,
+            dtype=self.dtype,
+            fill_value=self.fill_value,
+            chunk_size=self.chunk_size,
+            spill_dir=self.spill_dir,
+        )
+        grid.chunks = {key: chunk.copy() for key, chunk in self.chunks.items()}
+        # compressed data and spilled files are never changed
+        grid.compressed = self.compressed.copy()
+        grid.spilled = self.spilled.copy()
+        return grid
+
+    def compact(self, row: int) -> int:
+        """Compact the loaded chunks that lie completely below row, returns their
+        number
+
+        With a spill directory, the chunks are written to files there, otherwise
+        they are compressed in memory.
+
+        """
+        size = self.chunk_size
+        keys = [key for key in self.chunks if key[0] * size >= row]
+        for key in keys:
+            chunk = self.chunks.pop(key)
+            if self.spill_dir is None:
+                self.compressed[key] = zlib.compress(chunk.tobytes())
+            else:
+                self.spill_dir.mkdir(parents=True, exist_ok=True)
+                path = self.spill_dir / f"chunk-{next(_spill_numbers)}.npy"
+                np.save(path, chunk)
+                self.spilled[key] = path
+        return len(keys)
+
+
+@dataclass
+class ChunkedBoard(Board):
+    """Board of the endless city, with its grids in chunks
+
+    The board is very high by default, and new blocks spawn spawn_distance rows
+    above the building front instead of at the top of the board. Chunks more than
+    compact_distance rows below the lowest column top are compacted, None keeps all
+    chunks loaded.
+
+    """
+
+    width: int = BLOCKS_WIDTH
+    height: int = ENDLESS_HEIGHT
+    spawn_distance: int = BLOCKS_HEIGHT
+    chunk_size: int = CHUNK_SIZE
+    compact_distance: int | None = 4 * CHUNK_SIZE
+    spill_dir: str | Path | None = field(default=None, repr=False)
+    compacted_chunks: int = field(init=False, default=0, repr=False)
+
+    def __post_init__(self) -> None:
+        super().__post_init__()
+        if self.block_active is not None:
+            self.block_active.move_down(self.get_spawn_row())
+
+    def _make_grids(self) -> None:
+        self.occupancy = ChunkedGrid(  # type: ignore[assignment]
+            self.height,
+            self.width,
+            np.int8,
+            chunk_size=self.chunk_size,
+            spill_dir=self.spill_dir,
+        )
+        self.piece_ids = ChunkedGrid(  # type: ignore[assignment]
+            self.height,
+            self.width,
+            np.int32,
+            fill_value=-1,
+            chunk_size=self.chunk_size,
+            spill_dir=self.spill_dir,
+        )
+
+    @property
+    def grids(self) -> tuple[ChunkedGrid, ChunkedGrid]:
+        return self.occupancy, self.piece_ids  # type: ignore[return-value]
+
+    @property
+    def nbytes(self) -> int:
+        """Memory used by the grids"""
+        return sum(grid.nbytes for grid in self.grids) + self.column_tops.nbytes
+
+    def get_spawn_row(self) -> int:
+        return max(0, self.get_building_front() - self.spawn_distance)
+
+    def _find_occupied_row(self, x: int, row: int) -> int:
+        # search the chunks instead of slicing the whole column
+        found = self.grids[0].find_in_column(x, row)
+        return self.height if found is None else found
+
+    def _register_block(self, block: Block) -> None:
+        super()._register_block(block)
+        if self.compact_distance is not None:
+            # every column is built up above this row
+            row = int(self.column_tops.max()) + self.compact_distance
+            for grid in self.grids:
+                self.compacted_chunks += grid.compact(row)
+
+    def spawn_block(self, block: Block) -> None:
+        super().spawn_block(block)
+        self.block_active.move_down(self.get_spawn_row())
+
+    def __repr__(self) -> str:
+        # only the rows from the building front down, the board itself is endless
+        row_start = min(self.get_building_front(), self.height - 1)
+        row_stop = min(row_start + 2 * BLOCKS_HEIGHT, self.height)
+        symbols = SYMBOLS[self.occupancy[row_start:row_stop, :]]
+        lines = [
+            f"# rows {row_start} to {row_stop - 1} of {self.height}",
+            "#" * (2 * self.width + 1),
+        ]
+        for row in symbols.tolist():
+            lines.append("#" + " ".join(row) + "#")
+        lines.append("#" * (2 * self.width + 1))
+        return "\n".join(lines)
@@ -7,6 +7,8 @@ pygame.font.init()
 # graphical constants
 BS = 30
 CLOCKTICK = 15
+# frames per second drawn during a game, the logic runs at CLOCKTICK steps per second
+FRAME_RATE = 60
 CLOCK_BLOCK_MOVE = 50
 BLOCKS_WIDTH = 10
 BLOCKS_HEIGHT = 20
@@ -22,6 +24,7 @@ BOX_BORDER_Y = 5
 TIME_BETWEEN_BLOCKS = 50
 TIME_BEFORE_GAME_OVER = 500
 TIME_BEFORE_NEW_SPAWN = 150
+TIME_GAME_OVER_INPUT = 2000
 
 # paths
 PATH_REPLAYS = 'replays'
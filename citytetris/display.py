@@ -0,0 +1,65 @@
+"""Push only the changed parts of the window to the display"""
+
+import logging
+import time
+
+import pygame
+
+logger = logging.getLogger(__name__)
+
+# outline color of the dirty rects in the debug overlay
+OVERLAY_COLOR = pygame.Color(255, 0, 255)
+
+
+def get_window_rect(surface: pygame.surface.Surface) -> pygame.Rect:
+    """Get the area of a (sub)surface of the window in window coordinates"""
+    return pygame.Rect(surface.get_abs_offset(), surface.get_size())
+
+
+class DisplayUpdater:
+    """Collect the rects of the window that changed and push only those
+
+    With the debug overlay, each pushed rect is outlined. The number of pixels pushed
+    per second is measured over windows of one second.
+
+    """
+
+    def __init__(self, debug_overlay: bool = False) -> None:
+        self.debug_overlay = debug_overlay
+        self.pixels_pushed = 0
+        self.pixels_per_second = 0.0
+        self._rects: list[pygame.Rect] = []
+        self._pixels_interval = 0
+        self._interval_start = time.perf_counter()
+
+    def add(self, rect: pygame.Rect) -> None:
+        self._rects.append(pygame.Rect(rect))
+
+    def add_surface(self, surface: pygame.surface.Surface) -> None:
+        self.add(get_window_rect(surface))
+
+    def update(self) -> list[pygame.Rect]:
+        """Push the collected rects to the display and return them"""
+        window = pygame.display.get_surface()
+        rects = [rect.clip(window.get_rect()) for rect in self._rects]
+        rects = [rect for rect in rects if rect.width and rect.height]
+        self._rects = []
+
+        if self.debug_overlay:
+            for rect in rects:
+                pygame.draw.rect(window, OVERLAY_COLOR, rect, width=1)
+        pygame.display.update(rects)
+        self._count_pixels(sum(rect.width * rect.height for rect in rects))
+        return rects
+
+    def _count_pixels(self, num_pixels: int) -> None:
+        self.pixels_pushed += num_pixels
+        self._pixels_interval += num_pixels
+        now = time.perf_counter()
+        if now - self._interval_start >= 1.0:
+            self.pixels_per_second = self._pixels_interval / (
+                now - self._interval_start
+            )
+            self._pixels_interval = 0
+            self._interval_start = now
+            logger.debug(f"{self.pixels_per_second:.0f} pixels pushed per second")
@@ -0,0 +1,83 @@
+"""Small undirected graph with integer nodes, just enough for scoring the board"""
+
+import numpy as np
+
+
+def label_components(num_nodes: int, edges: np.ndarray) -> np.ndarray:
+    """Get the label of each node, which is the smallest node of its component
+
+    Each round hooks the root of every edge's larger end onto the root of its
+    smaller end, then points every node directly at its root. Since roots only get
+    smaller, this ends after a few rounds.
+
+    """
+    parents = np.arange(num_nodes)
+    if not len(edges):
+        return parents
+
+    nodes0, nodes1 = edges[:, 0], edges[:, 1]
+    while True:
+        roots0, roots1 = parents[nodes0], parents[nodes1]
+        unmerged = roots0 != roots1
+        if not unmerged.any():
+            return parents
+
+        roots0, roots1 = roots0[unmerged], roots1[unmerged]
+        np.minimum.at(parents, np.maximum(roots0, roots1), np.minimum(roots0, roots1))
+        while True:
+            grandparents = parents[parents]
+            if np.array_equal(grandparents, parents):
+                break
+            parents = grandparents
+
+
+class Graph:
+    """Undirected graph with the nodes 0, 1, ..., num_nodes - 1
+
+    edges is an array of shape (num_edges, 2). The adjacency is stored in two
+    arrays (compressed sparse rows): the neighbors of node i are
+    neighbor_nodes[offsets[i]:offsets[i + 1]], sorted in ascending order.
+
+    """
+
+    def __init__(self, num_nodes: int, edges: np.ndarray) -> None:
+        self.num_nodes = num_nodes
+        self.edges = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+
+        sources = np.concatenate([self.edges[:, 0], self.edges[:, 1]])
+        targets = np.concatenate([self.edges[:, 1], self.edges[:, 0]])
+        order = np.lexsort((targets, sources))
+        self.neighbor_nodes = targets[order]
+        self.offsets = np.zeros(num_nodes + 1, dtype=np.int64)
+        np.cumsum(np.bincount(sources, minlength=num_nodes), out=self.offsets[1:])
+
+    def __len__(self) -> int:
+        return self.num_nodes
+
+    def neighbors(self, node: int) -> np.ndarray:
+        return self.neighbor_nodes[self.offsets[node] : self.offsets[node + 1]]
+
+    def component_labels(self) -> np.ndarray:
+        """Get the label of each node, which is the smallest node of its component"""
+        return label_components(self.num_nodes, self.edges)
+
+    def connected_components(self) -> list[np.ndarray]:
+        """Get the nodes of each component, ordered by their smallest node"""
+        labels = self.component_labels()
+        order = np.argsort(labels, kind='stable')
+        boundaries = np.flatnonzero(np.diff(labels[order])) + 1
+        return np.split(order, boundaries) if self.num_nodes else []
+
+    def node_connected_component(self, node: int) -> np.ndarray:
+        """Get the sorted nodes of the component containing node, by breadth-first
+        search
+
+        """
+        seen = np.zeros(self.num_nodes, dtype=bool)
+        seen[node] = True
+        frontier = np.array([node])
+        while len(frontier):
+            neighbors = np.concatenate([self.neighbors(n) for n in frontier.tolist()])
+            frontier = np.unique(neighbors[~seen[neighbors]])
+            seen[frontier] = True
+        return np.flatnonzero(seen)
@@ -2,8 +2,8 @@ import string
 
 import pygame
 
-from citytetris.constants import FONT
 from citytetris.colors import ColorShade, GrayShade, YellowShade
+from citytetris.text import TEXTS
 
 chars_allowed = set(string.digits) | set(string.ascii_lowercase)
 
@@ -24,7 +24,7 @@ class InputDigitBox:
         return color  # type: ignore
 
     def get_text_surface(self) -> pygame.surface.Surface:
-        return FONT.render(self.text, True, self.get_color().light)
+        return TEXTS.render(self.text, self.get_color().light)
 
     def get_seed(self) -> int | str | None:
         if self.text:
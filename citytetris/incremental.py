@@ -0,0 +1,189 @@
+from collections import Counter
+from typing import Iterable
+
+import numpy as np
+
+from citytetris.blocks import Block, IBlock, JBlock, LBlock, TBlock
+from citytetris.score import Score
+
+# blocks only form communities with blocks of the same group
+GROUP_NONE, GROUP_I, GROUP_L_J, GROUP_T = 0, 1, 2, 3
+
+
+def _get_group(block: Block) -> int:
+    if isinstance(block, IBlock):
+        return GROUP_I
+    if isinstance(block, (LBlock, JBlock)):
+        return GROUP_L_J
+    if isinstance(block, TBlock):
+        return GROUP_T
+    return GROUP_NONE
+
+
+class ScoreTracker:
+    """Keep the score up to date while blocks are added to the board
+
+    Blocks never disappear, so communities can only grow or merge. They are tracked
+    with a union-find structure, where the root of each community holds its
+    aggregates: the number of blocks, whether it contains L and J blocks and its
+    bounding box. Adding a block costs O(number of neighbors) and reading the
+    score is O(1).
+
+    Blocks are identified by their index in the board's block list. The union-find
+    structure and the aggregates are stored in numpy arrays that grow by doubling
+    their capacity, like a BlockStore, which needs 27 bytes per block.
+
+    """
+
+    dtypes = {
+        'parent': np.int32,
+        'groups': np.int8,
+        'sizes': np.int32,
+        'has_l': np.bool_,
+        'has_j': np.bool_,
+        'x_min': np.int32,
+        'y_min': np.int32,
+        'x_max': np.int32,
+        'y_max': np.int32,
+    }
+
+    def __init__(self, width: int, height: int, capacity: int = 64) -> None:
+        self.width = width
+        self.height = height
+
+        # only rows with squares are stored, boards can be very high
+        self.squares_per_row: Counter[int] = Counter()
+        self.full_rows: int = 0
+        self.longest_road: int = 0
+        self.l_j_communities: int = 0
+        self.largest_t_community: int = 0
+
+        # union-find and per community aggregates, only valid for root nodes
+        self.size = 0
+        self._arrays: dict[str, np.ndarray] = {
+            name: np.zeros(capacity, dtype=dtype) for name, dtype in self.dtypes.items()
+        }
+
+    def __len__(self) -> int:
+        return self.size
+
+    @property
+    def nbytes(self) -> int:
+        """Number of bytes allocated for the blocks, including unused capacity"""
+        return sum(array.nbytes for array in self._arrays.values())
+
+    @property
+    def parent(self) -> np.ndarray:
+        return self._arrays['parent'][: self.size]
+
+    @property
+    def sizes(self) -> np.ndarray:
+        return self._arrays['sizes'][: self.size]
+
+    def _grow(self) -> None:
+        capacity = max(2 * len(self._arrays['parent']), 1)
+        for name, array in self._arrays.items():
+            array_new = np.zeros(capacity, dtype=array.dtype)
+            array_new[: self.size] = array[: self.size]
+            self._arrays[name] = array_new
+
+    def find(self, piece_id: int) -> int:
+        parent = self._arrays['parent']
+        root = piece_id
+        while parent[root] != root:
+            root = int(parent[root])
+        # path compression
+        while parent[piece_id] != root:
+            parent[piece_id], piece_id = root, int(parent[piece_id])
+        return root
+
+    def _is_l_j_community(self, root: int) -> bool:
+        return bool(self._arrays['has_l'][root] and self._arrays['has_j'][root])
+
+    def _union(self, piece_id0: int, piece_id1: int) -> int:
+        root0, root1 = self.find(piece_id0), self.find(piece_id1)
+        if root0 == root1:
+            return root0
+
+        arrays = self._arrays
+        sizes = arrays['sizes']
+        if sizes[root0] < sizes[root1]:
+            root0, root1 = root1, root0
+        self.l_j_communities -= self._is_l_j_community(root0)
+        self.l_j_communities -= self._is_l_j_community(root1)
+
+        arrays['parent'][root1] = root0
+        sizes[root0] += sizes[root1]
+        for name in ('has_l', 'has_j', 'x_max', 'y_max'):
+            arrays[name][root0] = max(arrays[name][root0], arrays[name][root1])
+        for name in ('x_min', 'y_min'):
+            arrays[name][root0] = min(arrays[name][root0], arrays[name][root1])
+
+        self.l_j_communities += self._is_l_j_community(root0)
+        return root0
+
+    def add_block(self, block: Block, neighbor_ids: Iterable[int]) -> int:
+        """Add a block, neighbor_ids are the indices of all blocks it touches
+
+        Returns the index of the new block.
+
+        """
+        if self.size == len(self._arrays['parent']):
+            self._grow()
+        piece_id = self.size
+        self.size += 1
+
+        indices = list(block.yield_indices())
+        for _, y in indices:
+            if 0 <= y < self.height:
+                self.squares_per_row[y] += 1
+                if self.squares_per_row[y] == self.width:
+                    self.full_rows += 1
+
+        group = _get_group(block)
+        xs, ys = [x for x, _ in indices], [y for _, y in indices]
+        for name, value in (
+            ('parent', piece_id),
+            ('groups', group),
+            ('sizes', 1),
+            ('has_l', isinstance(block, LBlock)),
+            ('has_j', isinstance(block, JBlock)),
+            ('x_min', min(xs)),
+            ('y_min', min(ys)),
+            ('x_max', max(xs)),
+            ('y_max', max(ys)),
+        ):
+            self._arrays[name][piece_id] = value
+        if group == GROUP_NONE:
+            return piece_id
+
+        groups = self._arrays['groups']
+        root = piece_id
+        for neighbor_id in neighbor_ids:
+            if groups[neighbor_id] == group:
+                root = self._union(root, neighbor_id)
+
+        # communities only grow, so the maxima can be updated from the new root
+        arrays = self._arrays
+        size = int(arrays['sizes'][root])
+        if (group == GROUP_I) and (size > 1):
+            distance = int(
+                arrays['x_max'][root]
+                - arrays['x_min'][root]
+                + arrays['y_max'][root]
+                - arrays['y_min'][root]
+            )
+            self.longest_road = max(self.longest_road, distance)
+        elif group == GROUP_T:
+            self.largest_t_community = max(self.largest_t_community, size)
+        return piece_id
+
+    def score(self) -> Score:
+        # a single T block is not a community
+        t_community = self.largest_t_community if self.largest_t_community > 1 else 0
+        return Score(
+            full_rows=self.full_rows,
+            longest_road=self.longest_road,
+            l_j_communities=self.l_j_communities,
+            t_community=t_community,
+        )
@@ -0,0 +1,205 @@
+"""Score a board with array operations on its grids of type codes and block indices
+
+Communities are found by connected-component labeling of the block adjacency graph,
+which is built from the grid of block indices. Nothing here loops over blocks in
+Python, which makes this the fastest way to score very big boards from scratch.
+
+"""
+
+import numpy as np
+
+from citytetris.blocks import BLOCKS_ALL, IBlock, JBlock, LBlock, TBlock
+from citytetris.graph import label_components
+from citytetris.incremental import GROUP_I, GROUP_L_J, GROUP_NONE, GROUP_T
+from citytetris.network import get_edges
+from citytetris.score import Score
+
+# community group per type code, code 0 is an empty cell
+GROUPS: np.ndarray = np.full(
+    1 + max(block.kind.code for block in BLOCKS_ALL), GROUP_NONE
+)
+GROUPS[IBlock.kind.code] = GROUP_I
+GROUPS[LBlock.kind.code] = GROUP_L_J
+GROUPS[JBlock.kind.code] = GROUP_L_J
+GROUPS[TBlock.kind.code] = GROUP_T
+
+
+def get_piece_codes(
+    occupancy: np.ndarray, piece_ids: np.ndarray, num_pieces: int
+) -> np.ndarray:
+    """Get the type code of each block from the grids, 0 for blocks outside of it"""
+    codes = np.zeros(num_pieces, dtype=occupancy.dtype)
+    mask = piece_ids >= 0
+    codes[piece_ids[mask]] = occupancy[mask]
+    return codes
+
+
+def filter_community_edges(edges: np.ndarray, codes: np.ndarray) -> np.ndarray:
+    """Only keep edges between blocks of the same group, since only those can form
+    communities
+
+    """
+    if not len(edges):
+        return edges
+    groups = GROUPS[codes]
+    group0 = groups[edges[:, 0]]
+    same_group = (group0 != GROUP_NONE) & (group0 == groups[edges[:, 1]])
+    return edges[np.flatnonzero(same_group)]
+
+
+def get_bounding_boxes(
+    xs: np.ndarray, ys: np.ndarray, cell_labels: np.ndarray, num_labels: int
+) -> np.ndarray:
+    """Get x_min, y_min, x_max and y_max of the cells per label, shape (4, labels)
+
+    Labels without cells get an empty box, so boxes can be merged with the minimum
+    and maximum of their coordinates.
+
+    """
+    big = np.iinfo(np.int64).max
+    bboxes = np.array([[big], [big], [-big], [-big]]).repeat(num_labels, axis=1)
+    np.minimum.at(bboxes[0], cell_labels, xs)
+    np.minimum.at(bboxes[1], cell_labels, ys)
+    np.maximum.at(bboxes[2], cell_labels, xs)
+    np.maximum.at(bboxes[3], cell_labels, ys)
+    return bboxes
+
+
+def get_l_j_edges(edges: np.ndarray, codes: np.ndarray) -> np.ndarray:
+    """Get the edges between an L and a J block, as pairs of (L block, J block)"""
+    if not len(edges):
+        return edges
+    codes0, codes1 = codes[edges[:, 0]], codes[edges[:, 1]]
+    l_first = (codes0 == LBlock.kind.code) & (codes1 == JBlock.kind.code)
+    j_first = (codes0 == JBlock.kind.code) & (codes1 == LBlock.kind.code)
+    return np.concatenate([edges[l_first], edges[j_first][:, ::-1]])
+
+
+def get_longest_road(
+    codes: np.ndarray, labels: np.ndarray, road_bboxes: np.ndarray
+) -> tuple[int, np.ndarray]:
+    """Get the extent of the largest I community and its blocks
+
+    On ties, the community with the first block wins, like in the network module.
+
+    """
+    num_pieces = len(codes)
+    sizes = np.bincount(labels, minlength=num_pieces)
+    is_root = labels == np.arange(num_pieces)
+    (roots,) = np.nonzero(is_root & (GROUPS[codes] == GROUP_I) & (sizes > 1))
+    if not len(roots):
+        return 0, roots
+    x_min, y_min, x_max, y_max = road_bboxes[:, roots]
+    distances = x_max - x_min + y_max - y_min
+    root = int(roots[np.argmax(distances)])
+    return int(distances.max()), np.flatnonzero(labels == root)
+
+
+def get_l_j_communities(
+    codes: np.ndarray, labels: np.ndarray, l_j_edges: np.ndarray
+) -> tuple[int, np.ndarray]:
+    """Get the number of communities with both an L and a J block, and the first L-J
+    pair of each
+
+    The first pair is the first L block that touches a J block, with the first J
+    block it touches, like in the network module.
+
+    """
+    num_pieces = len(codes)
+    num_l = np.bincount(labels, weights=codes == LBlock.kind.code, minlength=num_pieces)
+    num_j = np.bincount(labels, weights=codes == JBlock.kind.code, minlength=num_pieces)
+    num_communities = int(np.count_nonzero((num_l > 0) & (num_j > 0)))
+    if not len(l_j_edges):
+        return num_communities, np.zeros(0, dtype=np.int64)
+
+    # the smallest key of the L-J pairs per community is its first pair
+    keys = l_j_edges[:, 0].astype(np.int64) * num_pieces + l_j_edges[:, 1]
+    first_keys = np.full(num_pieces, np.iinfo(np.int64).max)
+    np.minimum.at(first_keys, labels[l_j_edges[:, 0]], keys)
+    first_keys = first_keys[first_keys < np.iinfo(np.int64).max]
+    return num_communities, np.concatenate(
+        [first_keys // num_pieces, first_keys % num_pieces]
+    )
+
+
+def get_largest_t_community(
+    codes: np.ndarray, labels: np.ndarray
+) -> tuple[int, np.ndarray]:
+    """Get the size of the largest T community and its blocks, a single T block is
+    not a community
+
+    """
+    num_pieces = len(codes)
+    sizes = np.bincount(labels, minlength=num_pieces)
+    is_root = labels == np.arange(num_pieces)
+    (roots,) = np.nonzero(is_root & (GROUPS[codes] == GROUP_T))
+    if not len(roots) or (sizes[roots].max() < 2):
+        return 0, np.zeros(0, dtype=np.int64)
+    root = int(roots[np.argmax(sizes[roots])])
+    return int(sizes[root]), np.flatnonzero(labels == root)
+
+
+def score_components(
+    full_rows: int,
+    codes: np.ndarray,
+    labels: np.ndarray,
+    road_bboxes: np.ndarray,
+    l_j_edges: np.ndarray,
+) -> tuple[Score, np.ndarray]:
+    """Get the score and the highlight flag of each block from the component label
+    of each block
+
+    road_bboxes are the bounding boxes of the I block cells per label, see
+    get_bounding_boxes, and l_j_edges the touching L and J blocks, see
+    get_l_j_edges.
+
+    """
+    longest_road, road = get_longest_road(codes, labels, road_bboxes)
+    l_j_communities, l_j_pairs = get_l_j_communities(codes, labels, l_j_edges)
+    t_community, t_blocks = get_largest_t_community(codes, labels)
+    highlights = np.zeros(len(codes), dtype=bool)
+    for blocks in (road, l_j_pairs, t_blocks):
+        highlights[blocks] = True
+
+    score = Score(
+        full_rows=full_rows,
+        longest_road=longest_road,
+        l_j_communities=l_j_communities,
+        t_community=t_community,
+    )
+    return score, highlights
+
+
+def calculate_score_and_highlights(
+    occupancy: np.ndarray, piece_ids: np.ndarray, num_pieces: int
+) -> tuple[Score, np.ndarray]:
+    """Calculate the score and the highlight flag of each block from the grid of type
+    codes and the grid of block indices
+
+    Both grids are the ones maintained by the board, or the rows of them that
+    contain blocks. num_pieces is the number of blocks on the board.
+
+    """
+    width = occupancy.shape[1]
+    full_rows = int(np.count_nonzero(np.count_nonzero(occupancy, axis=1) == width))
+
+    codes = get_piece_codes(occupancy, piece_ids, num_pieces)
+    edges = filter_community_edges(get_edges(piece_ids), codes)
+    labels = label_components(num_pieces, edges)
+
+    ys, xs = np.nonzero(occupancy == IBlock.kind.code)
+    road_bboxes = get_bounding_boxes(xs, ys, labels[piece_ids[ys, xs]], num_pieces)
+    return score_components(
+        full_rows, codes, labels, road_bboxes, get_l_j_edges(edges, codes)
+    )
+
+
+def calculate_score(
+    occupancy: np.ndarray, piece_ids: np.ndarray, num_pieces: int
+) -> Score:
+    """Calculate the score from the grid of type codes and the grid of block indices,
+    see calculate_score_and_highlights
+
+    """
+    score, _ = calculate_score_and_highlights(occupancy, piece_ids, num_pieces)
+    return score
@@ -9,13 +9,16 @@ from citytetris.colors import DARKGRAY, GrayShade
 from citytetris.constants import (
     BS,
     CLOCKTICK,
-    FONT,
+    FRAME_RATE,
     PATH_REPLAYS,
     SCREEN_HEIGHT,
     SCREEN_WIDTH,
-    SCORES,
+    TIME_GAME_OVER_INPUT,
 )
+from citytetris.display import DisplayUpdater
+from citytetris.pacing import FixedTimestep
 from citytetris.replay import make_replay
+from citytetris.rules import Rule
 from citytetris.score import Score
 from citytetris.screens import (
     GameOverScreen,
@@ -25,6 +28,8 @@ from citytetris.screens import (
     StartScreen,
 )
 from citytetris.tetris import Tetris
+from citytetris.text import TEXTS
+from citytetris.timers import Scheduler
 
 
 logger = logging.getLogger()
@@ -35,43 +40,57 @@ logger.addHandler(handler)
 
 
 class Game:
-    def __init__(self, size: str = "normal", debug: bool = True) -> None:
+    def __init__(
+        self,
+        size: str = "normal",
+        debug: bool = True,
+        async_scoring: bool = False,
+        debug_overlay: bool = False,
+        frame_rate: int = FRAME_RATE,
+    ) -> None:
         self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
         self.size = size
+        self.async_scoring = async_scoring
+        # frames drawn per second during a game, 0 draws as fast as possible
+        self.frame_rate = frame_rate
+        # only the changed parts of the window are pushed to the display
+        self.display = DisplayUpdater(debug_overlay=debug_overlay)
         self.gray_shade = GrayShade()
         self.screen_last_game = LastGameScreen()
+        # the menu screens render their texts once and are reused
+        self.screen_pause = PauseScreen()
+        self.screen_highscore = HighscoreScreen()
+        self.screen_game_over = GameOverScreen()
 
         if debug:
             handler.setLevel(logging.DEBUG)
             logger.setLevel(logging.DEBUG)
 
     def display_preview_text(self, screen: pygame.surface.Surface) -> None:
-        text_surface = FONT.render("PREVIEW", True, self.gray_shade.fill)
+        text_surface = TEXTS.render("PREVIEW", self.gray_shade.fill)
         screen.blit(text_surface, (10, 10))
 
-    def display_score(self, screen: pygame.surface.Surface, score: Score) -> None:
+    def display_score(
+        self, screen: pygame.surface.Surface, score: Score, rules: list[Rule]
+    ) -> None:
         x, y = 10, BS * 5
-        texts = [
-            f"Full rows: {score.full_rows} (x{SCORES.full_rows})",
-            f"Longest road: {score.longest_road} (x{SCORES.longest_road})",
-            (
-                f"L-J communities: {score.l_j_communities} "
-                f"(x{SCORES.l_j_communities})"
-            ),
-            f"Largest T community: {score.t_community} (x{SCORES.t_community})",
-        ]
+        # one line per scoring rule, with its weight
+        texts = [f"{rule.title}: {score[rule.name]} (x{rule.points})" for rule in rules]
 
         for text in texts:
-            text_surface = FONT.render(text, True, self.gray_shade.fill)
+            text_surface = TEXTS.render(text, self.gray_shade.fill)
             screen.blit(text_surface, (x, y))
             y += text_surface.get_height() + 10
 
-        total_score = score.get_total_score()
-        text_surface = FONT.render(
-            f"TOTAL SCORE: {total_score}", True, self.gray_shade.fill
-        )
+        total_score = score.get_total_score(rules)
+        text_surface = TEXTS.render(f"TOTAL SCORE: {total_score}", self.gray_shade.fill)
         screen.blit(text_surface, (x, y))
 
+    def get_score_rect(self) -> pygame.Rect:
+        # area of the score texts drawn by display_score
+        width, height = self.screen.get_size()
+        return pygame.Rect(0, BS * 5, width // 2, height - BS * 5)
+
     def get_screen_left(self) -> pygame.surface.Surface:
         width, height = self.screen.get_size()
         screen_left = self.screen.subsurface((0, 0, width // 2, height))
@@ -94,16 +113,23 @@ class Game:
         pygame.display.set_caption("City Tetris")
         self.screen.fill(self.gray_shade.dark)
         screen_start = StartScreen()
-        self.screen_last_game.draw(self.screen)
+        # the last game is only drawn again after another screen covered it
+        draw_last_game = True
 
         while True:
+            if draw_last_game:
+                self.screen_last_game.draw(self.screen)
+                self.display.add_surface(self.screen)
+                draw_last_game = False
             screen_start.draw(self.get_screen_left())
-            pygame.display.update()
+            self.display.add_surface(self.get_screen_left())
+            self.display.update()
             for event in pygame.event.get():
                 # if player clicks on start button, start the game
                 if event.type == pygame.MOUSEBUTTONDOWN:
                     if screen_start.start_button.collidepoint(event.pos):
                         self.run_tetris(seed=screen_start.seed_input_box.get_seed())
+                        draw_last_game = True
 
                 # if player presses ESC
                 if (event.type == pygame.QUIT) or (
@@ -116,6 +142,7 @@ class Game:
                 if event.type == pygame.MOUSEBUTTONDOWN:
                     if screen_start.highscore_button.collidepoint(event.pos):
                         self.draw_highscore_screen(self.screen)
+                        draw_last_game = True
 
                 # if player clicks on quit button, quit the game
                 if event.type == pygame.MOUSEBUTTONDOWN:
@@ -125,8 +152,6 @@ class Game:
 
                 screen_start.seed_input_box.handle_event(event)
 
-            self.screen_last_game.draw(self.screen)
-
     def pause_screen_interaction(
         self,
         tetris: Tetris,
@@ -139,7 +164,7 @@ class Game:
             pygame.quit()
             sys.exit()
 
-        pause_screen = PauseScreen()
+        pause_screen = self.screen_pause
         # unpause game when player presses ESC
         if (event.type == pygame.KEYDOWN) and (event.key == pygame.K_ESCAPE):
             tetris.paused = False
@@ -171,10 +196,11 @@ class Game:
         tetris: Tetris,
         screen: pygame.surface.Surface,
     ) -> None:
-        pause_screen = PauseScreen()
+        pause_screen = self.screen_pause
         # draw pause screen on right half of screen
         pause_screen.draw(screen)
-        pygame.display.update()
+        self.display.add_surface(screen)
+        self.display.update()
         while tetris.paused and tetris.running:
             for event in pygame.event.get():
                 self.pause_screen_interaction(tetris, event, *screen.get_offset())
@@ -196,9 +222,10 @@ class Game:
         return True
 
     def draw_highscore_screen(self, screen: pygame.surface.Surface) -> None:
-        highscore_screen = HighscoreScreen()
+        highscore_screen = self.screen_highscore
         highscore_screen.draw(screen)
-        pygame.display.update()
+        self.display.add_surface(screen)
+        self.display.update()
         while True:
             for event in pygame.event.get():
                 stay = self.highscore_screen_interactions(event)
@@ -216,15 +243,32 @@ class Game:
 
     def draw_game_over_screen(self, screen: pygame.surface.Surface) -> None:
         # draw transparent screen over right screen
-        game_over_screen = GameOverScreen()
+        game_over_screen = self.screen_game_over
         game_over_screen.draw(screen)
-        pygame.display.update()
+        self.display.add_surface(screen)
+        self.display.update()
+
+        # ignore input for a bit so that player does not accidentally quit, the
+        # window keeps handling events meanwhile
+        scheduler = Scheduler()
+        accepts_input = False
 
-        # wait a bit so that player does not accidentally quit
-        pygame.time.wait(2000)
+        def enable_input() -> None:
+            nonlocal accepts_input
+            accepts_input = True
+
+        scheduler.schedule(TIME_GAME_OVER_INPUT, enable_input)
+        clock = pygame.time.Clock()
         while True:
-            # press ESC to quit game
+            clock.tick(CLOCKTICK)
+            scheduler.poll()
             for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    pygame.quit()
+                    sys.exit()
+                if not accepts_input:
+                    continue
+                # press ESC to quit game
                 if event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
                     pygame.quit()
                     sys.exit()
@@ -238,28 +282,55 @@ class Game:
         # fill screen black
         self.screen.fill(DARKGRAY)
 
-        tetris = Tetris(screen=self.screen, size=self.size, seed=seed)
+        tetris = Tetris(
+            screen=self.screen,
+            size=self.size,
+            seed=seed,
+            async_scoring=self.async_scoring,
+        )
+        # the logic runs in steps of CLOCKTICK game milliseconds, CLOCKTICK times per
+        # second, whatever the frame rate
+        timestep = FixedTimestep(1000 / CLOCKTICK)
         clock = pygame.time.Clock()
         screen_left = self.get_screen_left()
         screen_right = self.get_screen_right()
         running, paused = True, False
+        score_last: Score | None = None
+        self.display.add_surface(self.screen)
         while running:
             screen_left.fill(self.gray_shade.dark)
-            if not paused:
-                clock.tick(CLOCKTICK)
-
-            running, paused = tetris.update(CLOCKTICK)
+            steps = timestep.advance(clock.tick(self.frame_rate))
+            running, paused = tetris.update(CLOCKTICK, steps, timestep.alpha)
 
             score = tetris.calculate_score()
             self.display_preview_text(screen_left)
-            self.display_score(screen_left, score)
-
-            pygame.display.update()
+            self.display_score(screen_left, score, tetris.board.rules)
+
+            for rect in tetris.dirty_rects:
+                self.display.add(rect)
+            if score != score_last:
+                self.display.add(self.get_score_rect())
+                score_last = score
+            self.display.update()
             if running and paused:
                 self.draw_pause_screen(tetris, screen_right)
+                # the pause screen covered the board
+                self.display.add_surface(self.screen)
+                # the time spent paused does not count
+                clock.tick()
                 if not tetris.running:
                     break
 
+        tetris.close()
+        logger.debug(
+            f"highlight cache: {tetris.board.highlight_cache_hits} hits, "
+            f"{tetris.board.highlight_cache_misses} misses"
+        )
+        logger.debug(f"text cache: {TEXTS.hits} hits, {TEXTS.misses} misses")
+        logger.debug(f"frame pacing:\n{timestep.report()}")
+        for name, seconds in tetris.board.rule_timings.items():
+            num_runs = tetris.board.rule_evaluations[name]
+            logger.debug(f"rule {name}: {num_runs} runs, {1e3 * seconds:.1f} ms")
         if tetris.game_over:
             logger.debug(tetris.replay)
             self.save_replay(tetris)
@@ -268,7 +339,8 @@ class Game:
             self.screen_last_game = LastGameScreen()
 
         self.screen.fill(self.gray_shade.dark)
-        pygame.display.update()
+        self.display.add_surface(self.screen)
+        self.display.update()
         return
 
 
@@ -1,18 +1,44 @@
 import itertools
-from typing import Sequence, Type
+from typing import Type
 
-import networkx as nx  # type: ignore
+import numpy as np
 
-from citytetris.blocks import Block, IBlock, JBlock, LBlock, TBlock
+from citytetris.blocks import BLOCKS_ALL, Block, IBlock, JBlock, LBlock, TBlock
+from citytetris.constants import BS
+from citytetris.graph import Graph
 
 Coord = tuple[int, int]
+TouchKey = tuple[Type[Block], int, Type[Block], int]
 
+NEIGHBOR_OFFSETS = ((-1, 0), (1, 0), (0, -1), (0, 1))
+# all squares of a block lie within 4x4 cells of its origin
+MAX_TOUCH_DISTANCE = 4
 
-def _is_neighbor(coord0: Coord, coord1: Coord) -> bool:
-    (x0, y0), (x1, y1) = coord0, coord1
-    dx = abs(x0 - x1)
-    dy = abs(y0 - y1)
-    return dx + dy == 1
+
+def _make_touch_offsets(
+    block_type0: Type[Block],
+    rotation0: int,
+    block_type1: Type[Block],
+    rotation1: int,
+) -> frozenset[Coord]:
+    """Get all offsets (in cells) of block1's origin relative to block0's origin for
+    which the two blocks touch each other
+
+    """
+    squares0 = block_type0.kind.block_variants[rotation0]
+    squares1 = block_type1.kind.block_variants[rotation1]
+    return frozenset(
+        (x0 - x1 + dx, y0 - y1 + dy)
+        for (x0, y0), (x1, y1) in itertools.product(squares0, squares1)
+        for dx, dy in NEIGHBOR_OFFSETS
+    )
+
+
+# precomputed for all regular blocks, other block types are added on first use
+TOUCH_TABLE: dict[TouchKey, frozenset[Coord]] = {
+    key: _make_touch_offsets(*key)
+    for key in itertools.product(BLOCKS_ALL, range(4), BLOCKS_ALL, range(4))
+}
 
 
 def blocks_touch(block0: Block, block1: Block) -> bool:
@@ -21,142 +47,172 @@ def blocks_touch(block0: Block, block1: Block) -> bool:
     If the two blocks are the same, they touch each other.
 
     """
-    # possible optimization: check the first coordinate - if it's too far away, it's
-    # impossble for the blocks to touch and the check can be ended early.
-    for coord0, coord1 in itertools.product(
-        block0.yield_indices(), block1.yield_indices()
-    ):
-        if _is_neighbor(coord0, coord1):
-            return True
-    return False
+    dx = block1.x // BS - block0.x // BS
+    dy = block1.y // BS - block0.y // BS
+    if (abs(dx) > MAX_TOUCH_DISTANCE) or (abs(dy) > MAX_TOUCH_DISTANCE):
+        return False
 
+    key = type(block0), block0.rotation, type(block1), block1.rotation
+    offsets = TOUCH_TABLE.get(key)
+    if offsets is None:
+        offsets = TOUCH_TABLE[key] = _make_touch_offsets(*key)
+    return (dx, dy) in offsets
 
-def get_graph(
-    block_list: list[Block], block_types: tuple[Type[Block], ...] | None
-) -> nx.Graph:
-    """Get the graph of all blocks of a certain type
 
-    If no block type is specified, all blocks are considered.
+def make_piece_ids(block_list: list[Block]) -> np.ndarray:
+    """Get the grid holding the index of the block that occupies each cell
+
+    This is the same grid that the board maintains, cells without a block are -1.
 
     """
-    if not block_types:
-        block_list = block_list[:]
-    else:
-        block_list = [bl for bl in block_list if isinstance(bl, block_types)]
+    indices = [index for block in block_list for index in block.yield_indices()]
+    if not indices:
+        return np.full((0, 0), -1, dtype=np.int32)
+
+    width = 1 + max(x for x, _ in indices)
+    height = 1 + max(y for _, y in indices)
+    piece_ids = np.full((height, width), -1, dtype=np.int32)
+    for piece_id, block in enumerate(block_list):
+        for x, y in block.yield_indices():
+            piece_ids[y, x] = piece_id
+    return piece_ids
 
-    graph = nx.Graph()
-    for block in block_list:
-        graph.add_node(block)
 
-    for block0, block1 in itertools.combinations(block_list, 2):
-        if blocks_touch(block0, block1):
-            graph.add_edge(block0, block1)
-    return graph
+def get_edges(piece_ids: np.ndarray) -> np.ndarray:
+    """Get all pairs of indices of touching blocks
 
+    Comparing every cell with its right and its lower neighbor visits each pair of
+    neighboring cells exactly once. Each pair of blocks is only returned once, with
+    the lower index first.
 
-def get_digraph(
-    block_list: list[Block], block_types: tuple[Type[Block]] | None
-) -> nx.DiGraph:
-    """Get the directed graph of all blocks of a certain type
+    """
+    pairs = []
+    for ids0, ids1 in (
+        (piece_ids[:, :-1], piece_ids[:, 1:]),
+        (piece_ids[:-1, :], piece_ids[1:, :]),
+    ):
+        mask = (ids0 >= 0) & (ids1 >= 0) & (ids0 != ids1)
+        pairs.append(np.stack([ids0[mask], ids1[mask]], axis=1))
+    edges = np.sort(np.concatenate(pairs), axis=1).astype(np.int64)
+    # deduplicate 1d keys by sorting, which is much faster than np.unique(axis=0)
+    num_pieces = int(piece_ids.max(initial=-1)) + 1
+    keys = np.sort(edges[:, 0] * num_pieces + edges[:, 1])
+    keys = keys[np.diff(keys, prepend=-1) != 0]
+    return np.stack([keys // num_pieces, keys % num_pieces], axis=1)
 
-    If no block type is specified, all blocks are considered.
+
+def get_graph(
+    block_list: list[Block],
+    block_types: tuple[Type[Block], ...] | None,
+    piece_ids: np.ndarray | None = None,
+) -> tuple[Graph, list[Block]]:
+    """Get the graph of all blocks of a certain type
+
+    If no block type is specified, all blocks are considered. Returns the graph and
+    the blocks it contains; node i of the graph is the i-th of these blocks. Edges
+    are determined from the grid of block indices; if it is not passed, it is
+    created from the block list.
 
     """
+    if piece_ids is None:
+        piece_ids = make_piece_ids(block_list)
+
     if not block_types:
-        block_list = block_list[:]
+        keep = np.ones(len(block_list), dtype=bool)
     else:
-        block_list = [bl for bl in block_list if isinstance(bl, block_types)]
-
-    graph = nx.DiGraph()
-    for block in block_list:
-        graph.add_node(block)
+        keep = np.array([isinstance(bl, block_types) for bl in block_list], dtype=bool)
 
-    for block0, block1 in itertools.combinations(block_list, 2):
-        if blocks_touch(block0, block1):
-            graph.add_edge(block0, block1)
-    return graph
+    # renumber the kept blocks to 0, 1, ...
+    nodes = np.cumsum(keep) - 1
+    edges = get_edges(piece_ids)
+    edges = edges[keep[edges[:, 0]] & keep[edges[:, 1]]]
+    blocks = [block for block, is_kept in zip(block_list, keep) if is_kept]
+    return Graph(len(blocks), nodes[edges]), blocks
 
 
-def min_max_indices(blocks: Sequence[Block]) -> tuple[int, int, int, int]:
-    """Get the minimum and maximum indices of a block"""
-    x_min, y_min, x_max, y_max = 999, 999, 0, 0
-    for block in blocks:
-        for x, y in block.yield_indices():
-            x_min = min(x_min, x)
-            y_min = min(y_min, y)
-            x_max = max(x_max, x)
-            y_max = max(y_max, y)
-    return x_min, y_min, x_max, y_max
+def get_longest_I_block_distance(
+    block_list: list[Block], piece_ids: np.ndarray | None = None
+) -> tuple[int, set[Block]]:
+    """Get the longest distance of interconnected I-blocks
 
+    The components are labeled once and their bounding boxes are accumulated from
+    the bounding boxes of their blocks in a single pass.
 
-def get_longest_I_block_distance(block_list: list[Block]) -> tuple[int, set[Block]]:
-    """Get the longest distance of interconnected I-blocks"""
-    graph = get_graph(block_list, (IBlock,))
+    """
+    graph, blocks = get_graph(block_list, (IBlock,), piece_ids)
     if len(graph) < 2:
         return 0, set()
 
-    max_distance = 0
-    blocks_to_hightlight = []
-    for block in graph.nodes():
-        # This is actuallly inefficient, because we test the same subgraph multiple
-        # times. There is probably a more efficient algorithm in networkx for this
-        # purpose.
-        blocks_connected = nx.node_connected_component(graph, block)
-        if len(blocks_connected) < 2:
+    labels = graph.component_labels()
+    indices = np.array([block.indices for block in blocks])
+    x_min = np.full(len(graph), np.iinfo(np.int64).max)
+    y_min = np.full(len(graph), np.iinfo(np.int64).max)
+    x_max = np.full(len(graph), np.iinfo(np.int64).min)
+    y_max = np.full(len(graph), np.iinfo(np.int64).min)
+    np.minimum.at(x_min, labels, indices[:, :, 0].min(axis=1))
+    np.minimum.at(y_min, labels, indices[:, :, 1].min(axis=1))
+    np.maximum.at(x_max, labels, indices[:, :, 0].max(axis=1))
+    np.maximum.at(y_max, labels, indices[:, :, 1].max(axis=1))
+
+    # only roots of components with at least 2 blocks count, on ties the component
+    # with the first block wins
+    distances = np.where(
+        (labels == np.arange(len(graph)))
+        & (np.bincount(labels, minlength=len(graph)) > 1),
+        x_max - x_min + y_max - y_min,
+        0,
+    )
+    root = int(np.argmax(distances))
+    max_distance = int(distances[root])
+    if max_distance == 0:
+        return 0, set()
+    return max_distance, {blocks[node] for node in np.flatnonzero(labels == root)}
+
+
+def _first_L_J_pair(
+    graph: Graph, blocks: list[Block], component: np.ndarray
+) -> tuple[Block, Block]:
+    """Get the first L-J pair in a component of the graph"""
+    for node in component.tolist():
+        if not isinstance(blocks[node], LBlock):
             continue
-        x_min, y_min, x_max, y_max = min_max_indices(blocks_connected)
-        distance = x_max - x_min + y_max - y_min
-        if distance > max_distance:
-            max_distance = distance
-            blocks_to_hightlight = blocks_connected
-
-    return max_distance, set(blocks_to_hightlight)
-
-
-def _first_L_J_pair(graph: nx.Graph, blocks: Sequence[Block]) -> tuple[Block, Block]:
-    """Get the first L-J pair in a list of blocks"""
-    blocks_l = [bl for bl in blocks if isinstance(bl, LBlock)]
-    for block_l in blocks_l:
-        neighbors = graph.neighbors(block_l)
-        for neighbor in neighbors:
-            if isinstance(neighbor, JBlock):
-                return block_l, neighbor
+        for neighbor in graph.neighbors(node).tolist():
+            if isinstance(blocks[neighbor], JBlock):
+                return blocks[node], blocks[neighbor]
     raise ValueError("No L-J pair found, this should not happen")
 
 
 def get_number_of_disconnected_L_J_graphs(
-    block_list: list[Block],
+    block_list: list[Block], piece_ids: np.ndarray | None = None
 ) -> tuple[int, set[Block]]:
-    graph = get_graph(block_list, (LBlock, JBlock))
+    graph, blocks = get_graph(block_list, (LBlock, JBlock), piece_ids)
     if len(graph) < 2:
         return 0, set()
 
     blocks_to_hightlight: list[Block] = []
     n = 0
     # count disconnected L-J graphs that have at least one L-J connection
-    for component in nx.connected_components(graph):
-        unique_block_types = set(map(type, component))
+    for component in graph.connected_components():
+        unique_block_types = {type(blocks[node]) for node in component.tolist()}
         if len(unique_block_types) > 1:
             n += 1
-            blocks_to_hightlight.extend(_first_L_J_pair(graph, component))
+            blocks_to_hightlight.extend(_first_L_J_pair(graph, blocks, component))
 
     return n, set(blocks_to_hightlight)
 
 
-def get_largest_T_community(block_list: list[Block]) -> tuple[int, set[Block]]:
-    graph = get_graph(block_list, (TBlock,))
+def get_largest_T_community(
+    block_list: list[Block], piece_ids: np.ndarray | None = None
+) -> tuple[int, set[Block]]:
+    graph, blocks = get_graph(block_list, (TBlock,), piece_ids)
     if len(graph) < 2:
         return 0, set()
 
-    blocks_to_hightlight = []
     # among all distinct T communities, find the largest one
-    n_largest = 0
-    for component in nx.connected_components(graph):
-        if len(component) > n_largest:
-            n_largest = len(component)
-            blocks_to_hightlight = component
+    largest = max(graph.connected_components(), key=len)
+    n_largest = len(largest)
 
     # don't count groups of 0
     if n_largest == 1:
         return 0, set()
-    return n_largest, set(blocks_to_hightlight)
+    return n_largest, {blocks[node] for node in largest.tolist()}
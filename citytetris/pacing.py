@@ -0,0 +1,71 @@
+"""Fixed timestep game logic, independent of the rate at which frames are drawn
+
+The game logic advances in steps of a fixed length, as many as fit into the real time
+that passed since the last frame. The rest is carried over to the next frame, and the
+fraction of a step it makes up is used to interpolate the falling block between its
+last two positions.
+
+"""
+
+from collections import Counter
+from dataclasses import dataclass, field
+
+
+@dataclass
+class FixedTimestep:
+    """Turn the real time per frame, in milliseconds, into logic steps
+
+    After a stall, at most max_steps are run in one frame, the time beyond that is
+    dropped so that the game slows down instead of falling further behind. The
+    number of steps in each frame is counted for the pacing report.
+
+    """
+
+    step: float
+    max_steps: int = 5
+    accumulator: float = 0.0
+    frames: int = field(default=0, repr=False)
+    steps: int = field(default=0, repr=False)
+    dropped_steps: int = field(default=0, repr=False)
+    elapsed: float = field(default=0.0, repr=False)
+    longest_frame: float = field(default=0.0, repr=False)
+    steps_per_frame: Counter[int] = field(default_factory=Counter, repr=False)
+
+    def advance(self, elapsed: float) -> int:
+        """Add the time of a frame, returns the number of steps to run"""
+        self.accumulator += elapsed
+        steps = int(self.accumulator // self.step)
+        self.accumulator -= steps * self.step
+        if steps > self.max_steps:
+            self.dropped_steps += steps - self.max_steps
+            steps = self.max_steps
+
+        self.frames += 1
+        self.steps += steps
+        self.elapsed += elapsed
+        self.longest_frame = max(self.longest_frame, elapsed)
+        self.steps_per_frame[steps] += 1
+        return steps
+
+    @property
+    def alpha(self) -> float:
+        # part of the next step that already passed
+        return self.accumulator / self.step
+
+    def report(self) -> str:
+        """Describe the frame rate and how many logic steps ran per frame"""
+        if not self.frames:
+            return "no frames"
+        seconds = self.elapsed / 1000
+        lines = [
+            f"{self.frames} frames in {seconds:.1f} s "
+            f"({self.frames / max(seconds, 1e-9):.1f} fps), "
+            f"longest frame {self.longest_frame:.0f} ms",
+            f"{self.steps} logic steps, {self.steps / self.frames:.2f} per frame, "
+            f"{self.dropped_steps} dropped",
+        ]
+        for steps, count in sorted(self.steps_per_frame.items()):
+            lines.append(
+                f"{steps} steps: {count} frames ({100 * count / self.frames:.1f}%)"
+            )
+        return "\n".join(lines)
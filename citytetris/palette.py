@@ -0,0 +1,100 @@
+"""Render the settled blocks from the board's grids instead of block by block
+
+Every cell becomes one pixel of an 8 bit surface, written with pygame.surfarray.
+The color index of a cell is the type code of its block, plus HIGHLIGHT_OFFSET if
+the block is highlighted, and 0 for an empty cell. The palette maps these indices to
+the colors of the block types. The image is then scaled to the screen, so the cost
+does not depend on the number of blocks, only on the number of cells and pixels.
+
+Unlike drawing the tiles, this draws neither the grid nor the borders of the
+squares, which could not be seen on very big boards anyway.
+
+"""
+
+import numpy as np
+import pygame
+
+from citytetris.board import Board
+from citytetris.camera import Camera, CellArea
+from citytetris.colors import ColorShade
+from citytetris.constants import BS
+from citytetris.store import BLOCK_TYPES, NUM_CODES
+
+HIGHLIGHT_OFFSET = NUM_CODES
+
+
+def make_palette(background: pygame.Color) -> list[pygame.Color]:
+    """Get the color of each color index"""
+    shades: list[ColorShade | None] = [
+        BLOCK_TYPES[code].kind.shades if code in BLOCK_TYPES else None
+        for code in range(NUM_CODES)
+    ]
+    return [background if shade is None else shade.fill for shade in shades] + [
+        background if shade is None else shade.light for shade in shades
+    ]
+
+
+def get_color_indices(board: Board, area: CellArea | None = None) -> np.ndarray:
+    """Get the color index of each cell in area, by default all cells, shape
+    (height, width)
+
+    """
+    x_start, y_start, x_stop, y_stop = area or (0, 0, board.width, board.height)
+    occupancy = board.occupancy[y_start:y_stop, x_start:x_stop]
+    piece_ids = board.piece_ids[y_start:y_stop, x_start:x_stop]
+    indices = occupancy.astype(np.uint8)
+    # empty cells have the piece id -1, which picks the appended False
+    highlights = np.append(board.get_highlight_flags(), False)
+    indices += HIGHLIGHT_OFFSET * highlights[piece_ids].view(np.uint8)
+    return indices
+
+
+class PaletteRenderer:
+    """Draw the settled blocks of a board with an 8 bit palette surface"""
+
+    def __init__(self, background: pygame.Color) -> None:
+        self.palette = make_palette(background)
+        # one pixel per cell, and the same scaled to the screen
+        self.cells: pygame.surface.Surface | None = None
+        self.scaled: pygame.surface.Surface | None = None
+
+    def _get_surface(
+        self, surface: pygame.surface.Surface | None, size: tuple[int, int]
+    ) -> pygame.surface.Surface:
+        if (surface is not None) and (surface.get_size() == size):
+            return surface
+        surface = pygame.Surface(size, depth=8)
+        surface.set_palette(self.palette)
+        return surface
+
+    def draw_blocks(
+        self,
+        board: Board,
+        screen: pygame.surface.Surface,
+        camera: Camera | None = None,
+    ) -> None:
+        """Draw the settled blocks of board, scaled to fill screen or, with a camera,
+        only the visible cells at its zoom level
+
+        """
+        if camera is None:
+            area = 0, 0, board.width, board.height
+            size, position = screen.get_size(), (0, 0)
+        else:
+            area = camera.get_visible_cells(board.width, board.height)
+            x_start, y_start, x_stop, y_stop = area
+            size = (
+                (x_stop - x_start) * camera.tile_size,
+                (y_stop - y_start) * camera.tile_size,
+            )
+            position = camera.to_screen(x_start * BS, y_start * BS)
+        indices = get_color_indices(board, area)
+        if not indices.size:
+            return
+
+        self.cells = self._get_surface(self.cells, indices.shape[::-1])
+        self.scaled = self._get_surface(self.scaled, size)
+        # surfarray arrays are indexed by x first
+        pygame.surfarray.blit_array(self.cells, indices.T)
+        pygame.transform.scale(self.cells, size, self.scaled)
+        screen.blit(self.scaled, position)
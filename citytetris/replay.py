@@ -19,10 +19,10 @@ from citytetris.blocks import (
     ZBlock,
 )
 from citytetris.board import Board
+from citytetris.chunks import ENDLESS_HEIGHT
 from citytetris.constants import (
     BLOCKS_WIDTH,
     BLOCKS_HEIGHT,
-    BS,
     SCREEN_HEIGHT,
     SCREEN_WIDTH,
 )
@@ -134,12 +134,7 @@ def rotate(board: Board) -> None:
 def move_to_bottom(board: Board) -> None:
     block = board.block_active
     assert block is not None
-    while True:
-        hits_bottom = block.get_bottommost_y() >= (board.height * BS)
-        hits_block = block.collides_bottom(board.rect_list)
-        if hits_bottom or hits_block:
-            break
-        move_down(board)
+    block.move_down(board.drop_distance(block))
 
 
 MOVE_MAPPING: dict[str, Callable[[Board], None]] = {
@@ -155,8 +150,9 @@ def create_board_from_script(
     centered: bool = False,
     width: int = 10,
     height: int = 10,
+    board_cls: Type[Board] = Board,
 ) -> Board:
-    board = Board(width=width, height=height, centered=centered)
+    board = board_cls(width=width, height=height, centered=centered)
     if not moves:
         return board
 
@@ -187,6 +183,8 @@ def load_tetris(filename: str | Path) -> Tetris:
         width, height = 10, 10
     elif tetris.size == "normal":
         width, height = BLOCKS_WIDTH, BLOCKS_HEIGHT
+    elif tetris.size == "endless":
+        width, height = BLOCKS_WIDTH, ENDLESS_HEIGHT
     else:
         raise ValueError(f"size {tetris.size} not supported")
 
@@ -195,6 +193,7 @@ def load_tetris(filename: str | Path) -> Tetris:
         width=width,
         height=height,
         centered=True,
+        board_cls=type(tetris.board),
     )
     tetris.board = board
     return tetris
@@ -0,0 +1,96 @@
+"""Registry of the scoring rules
+
+Each rule determines one value of Score, which adds weight points per unit to the
+total score, and declares which block types can change its value. The board only
+re-runs the rules that were invalidated by the blocks added since their last
+evaluation, so e.g. placing an O block does not recalculate any of the communities.
+
+"""
+
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Callable
+
+from citytetris.blocks import Block, IBlock, JBlock, LBlock, TBlock
+from citytetris.constants import SCORES
+
+if TYPE_CHECKING:
+    from citytetris.board import Board
+
+# value of the rule and the blocks to highlight for it
+RuleResult = tuple[int, set[Block]]
+
+
+@dataclass(frozen=True)
+class Rule:
+    # name of the value in Score
+    name: str
+    # calculate the result from scratch
+    calculate: Callable[["Board"], RuleResult]
+    # adding a block of one of these types can change the result, empty means any
+    invalidated_by: tuple[type[Block], ...] = ()
+    # optional incremental update from the previous result when a block is added,
+    # instead of calculating the result from scratch on the next evaluation
+    update: Callable[["Board", Block, RuleResult], RuleResult] | None = None
+    # points per unit of the value, None takes them from constants.SCORES
+    weight: int | None = None
+    # shown next to the value in the game, by default the name
+    label: str = ""
+
+    def is_invalidated_by(self, block: Block) -> bool:
+        return not self.invalidated_by or isinstance(block, self.invalidated_by)
+
+    @property
+    def points(self) -> int:
+        if self.weight is None:
+            return int(getattr(SCORES, self.name, 0))
+        return self.weight
+
+    @property
+    def title(self) -> str:
+        return self.label or self.name.replace("_", " ").capitalize()
+
+
+RULES: list[Rule] = []
+
+
+def register_rule(rule: Rule) -> Rule:
+    """Add a rule that is used by all boards created afterwards"""
+    if any(rule.name == other.name for other in RULES):
+        raise ValueError(f"rule {rule.name!r} is already registered")
+    RULES.append(rule)
+    return rule
+
+
+register_rule(
+    Rule(
+        name="full_rows",
+        label="Full rows",
+        calculate=lambda board: (board._calculate_full_rows(), set()),
+        # full rows are counted by the score tracker anyway
+        update=lambda board, block, result: (board.tracker.full_rows, set()),
+    )
+)
+register_rule(
+    Rule(
+        name="longest_road",
+        label="Longest road",
+        calculate=lambda board: board._calculate_longest_road(),
+        invalidated_by=(IBlock,),
+    )
+)
+register_rule(
+    Rule(
+        name="l_j_communities",
+        label="L-J communities",
+        calculate=lambda board: board._calculate_L_J_communities(),
+        invalidated_by=(LBlock, JBlock),
+    )
+)
+register_rule(
+    Rule(
+        name="t_community",
+        label="Largest T community",
+        calculate=lambda board: board._calculate_largest_T_community(),
+        invalidated_by=(TBlock,),
+    )
+)
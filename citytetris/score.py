@@ -1,6 +1,7 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field, fields
+from typing import Iterable, Mapping
 
-from citytetris.constants import SCORES
+from citytetris.rules import RULES, Rule
 
 
 @dataclass
@@ -9,12 +10,36 @@ class Score:
     longest_road: int
     l_j_communities: int
     t_community: int
+    # values of the other scoring rules by name, e.g. of rules registered later
+    extra: dict[str, int] = field(default_factory=dict)
 
-    def get_total_score(self) -> int:
-        score_total = (
-            self.full_rows * SCORES.full_rows
-            + self.longest_road * SCORES.longest_road
-            + self.l_j_communities * SCORES.l_j_communities
-            + self.t_community * SCORES.t_community
+    @classmethod
+    def from_values(cls, values: Mapping[str, int]) -> "Score":
+        """Get the score from the values of the rules by name, 0 if missing"""
+        return cls(
+            **{name: values.get(name, 0) for name in SCORE_FIELDS},
+            extra={
+                name: value
+                for name, value in values.items()
+                if name not in SCORE_FIELDS
+            },
         )
-        return score_total
+
+    def __getitem__(self, name: str) -> int:
+        # value of the rule with this name, 0 if it was not evaluated
+        if name in SCORE_FIELDS:
+            value: int = getattr(self, name)
+            return value
+        return self.extra.get(name, 0)
+
+    def get_total_score(self, rules: Iterable[Rule] | None = None) -> int:
+        """Sum up the weighted values of the rules, by default of the registered
+        ones
+
+        """
+        rules = RULES if rules is None else rules
+        return sum(rule.points * self[rule.name] for rule in rules)
+
+
+# the values that every score has, see Score.extra for the others
+SCORE_FIELDS = tuple(f.name for f in fields(Score) if f.name != "extra")
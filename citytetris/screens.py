@@ -6,11 +6,23 @@ from citytetris.colors import ColorShade, GrayShade
 from citytetris.constants import (
     BOX_BORDER_X,
     BOX_BORDER_Y,
-    FONT,
     SCREEN_WIDTH,
 )
 from citytetris.gui import InputDigitBox
 from citytetris.replay import get_high_scores, load_tetris_last
+from citytetris.text import TEXTS
+
+# translucent overlays by size, they are never changed after creation
+_OVERLAYS: dict[tuple[int, int], pygame.surface.Surface] = {}
+
+
+def _get_overlay(size: tuple[int, int]) -> pygame.surface.Surface:
+    """Get a translucent black surface to put above the screen"""
+    if size not in _OVERLAYS:
+        overlay = pygame.Surface(size, pygame.SRCALPHA)
+        overlay.fill(pygame.Color(0, 0, 0, 150))
+        _OVERLAYS[size] = overlay
+    return _OVERLAYS[size]
 
 
 def _draw_border(
@@ -56,7 +68,7 @@ class StartScreen:
         distance_y = 50
         # title on left half of the screen
         y_offset = distance_y
-        self.title_text = FONT.render("C I T Y  T E T R I S", True, self.color.fill)
+        self.title_text = TEXTS.render("C I T Y  T E T R I S", self.color.fill)
         self.title_box = pygame.Rect(
             (SCREEN_WIDTH // 4) - (self.title_text.get_width() // 2),
             y_offset,
@@ -66,7 +78,7 @@ class StartScreen:
 
         # start button on left half of the screen
         y_offset = self.title_box.y + self.title_box.height + distance_y
-        self.start_text = FONT.render("START", True, self.color.fill)
+        self.start_text = TEXTS.render("START", self.color.fill)
         self.start_button = pygame.Rect(
             (SCREEN_WIDTH // 4) - (self.start_text.get_width() // 2),
             y_offset,
@@ -76,7 +88,7 @@ class StartScreen:
 
         # digit input box for random seed
         y_offset = self.start_button.y + self.start_button.height + distance_y
-        self.seed_text = FONT.render("RANDOM SEED", True, self.color.fill)
+        self.seed_text = TEXTS.render("RANDOM SEED", self.color.fill)
         self.seed_box = pygame.Rect(
             (SCREEN_WIDTH // 4) - (self.seed_text.get_width() // 2),
             y_offset,
@@ -95,7 +107,7 @@ class StartScreen:
         y_offset = (
             self.seed_input_box.rect.y + self.seed_input_box.rect.height + distance_y
         )
-        self.highscore_text = FONT.render("HIGHSCORE", True, self.color.fill)
+        self.highscore_text = TEXTS.render("HIGHSCORE", self.color.fill)
         self.highscore_button = pygame.Rect(
             (SCREEN_WIDTH // 4) - (self.highscore_text.get_width() // 2),
             y_offset,
@@ -105,7 +117,7 @@ class StartScreen:
 
         # quit button on left half of the screen
         y_offset = self.highscore_button.y + self.highscore_button.height + distance_y
-        self.quit_text = FONT.render("QUIT", True, self.color.fill)
+        self.quit_text = TEXTS.render("QUIT", self.color.fill)
         self.quit_button = pygame.Rect(
             (SCREEN_WIDTH // 4) - (self.quit_text.get_width() // 2),
             y_offset,
@@ -113,13 +125,23 @@ class StartScreen:
             self.quit_text.get_height() + BOX_BORDER_Y,
         )
 
+        # everything except the seed input is composed once per screen size
+        self.background: pygame.surface.Surface | None = None
+
+    def get_background(self, size: tuple[int, int]) -> pygame.surface.Surface:
+        if (self.background is None) or (self.background.get_size() != size):
+            self.background = pygame.Surface(size)
+            self.background.fill(self.color.dark)
+            self.draw_title(self.background)
+            self.draw_start(self.background)
+            self.draw_seed_text(self.background)
+            self.draw_highscore(self.background)
+            self.draw_quit(self.background)
+        return self.background
+
     def draw(self, screen: pygame.surface.Surface) -> None:
-        screen.fill(self.color.dark)
-        self.draw_title(screen)
-        self.draw_start(screen)
+        screen.blit(self.get_background(screen.get_size()), (0, 0))
         self.draw_seed_input(screen)
-        self.draw_highscore(screen)
-        self.draw_quit(screen)
 
     def draw_title(self, screen: pygame.surface.Surface) -> None:
         # draw title
@@ -146,9 +168,7 @@ class StartScreen:
             ),
         )
 
-    def draw_seed_input(self, screen: pygame.surface.Surface) -> None:
-        # draw seed input box border
-        _draw_border(screen, self.seed_input_box.rect, self.color)
+    def draw_seed_text(self, screen: pygame.surface.Surface) -> None:
         screen.blit(
             self.seed_text,
             (
@@ -156,6 +176,10 @@ class StartScreen:
                 self.seed_box.y + BOX_BORDER_Y // 2,
             ),
         )
+
+    def draw_seed_input(self, screen: pygame.surface.Surface) -> None:
+        # draw seed input box border
+        _draw_border(screen, self.seed_input_box.rect, self.color)
         # draw seed input box input
         _draw_border(
             screen,
@@ -202,7 +226,7 @@ class PauseScreen:
         distance_y = 50
         # pause text
         y_offset = distance_y
-        self.pause_text = FONT.render("P A U S E", True, self.color.fill)
+        self.pause_text = TEXTS.render("P A U S E", self.color.fill)
         self.pause_box = pygame.Rect(
             (SCREEN_WIDTH // 4) - (self.pause_text.get_width() // 2),
             y_offset,
@@ -212,7 +236,7 @@ class PauseScreen:
 
         # resume button on left half of the screen
         y_offset = self.pause_box.y + self.pause_box.height + distance_y
-        self.resume_text = FONT.render("RESUME", True, self.color.fill)
+        self.resume_text = TEXTS.render("RESUME", self.color.fill)
         self.resume_button = pygame.Rect(
             (SCREEN_WIDTH // 4) - (self.resume_text.get_width() // 2),
             y_offset,
@@ -222,7 +246,7 @@ class PauseScreen:
 
         # home button on left half of the screen
         y_offset = self.resume_button.y + self.resume_button.height + distance_y
-        self.home_text = FONT.render("HOME", True, self.color.fill)
+        self.home_text = TEXTS.render("HOME", self.color.fill)
         self.home_button = pygame.Rect(
             (SCREEN_WIDTH // 4) - (self.home_text.get_width() // 2),
             y_offset,
@@ -232,7 +256,7 @@ class PauseScreen:
 
         # quit button on left half of the screen
         y_offset = self.home_button.y + self.home_button.height + distance_y
-        self.quit_text = FONT.render("QUIT", True, self.color.fill)
+        self.quit_text = TEXTS.render("QUIT", self.color.fill)
         self.quit_button = pygame.Rect(
             (SCREEN_WIDTH // 4) - (self.quit_text.get_width() // 2),
             y_offset,
@@ -240,17 +264,22 @@ class PauseScreen:
             self.quit_text.get_height() + BOX_BORDER_Y,
         )
 
+        # texts and buttons are composed once per screen size
+        self.foreground: pygame.surface.Surface | None = None
+
+    def get_foreground(self, size: tuple[int, int]) -> pygame.surface.Surface:
+        if (self.foreground is None) or (self.foreground.get_size() != size):
+            self.foreground = pygame.Surface(size, pygame.SRCALPHA)
+            self.draw_pause(self.foreground)
+            self.draw_resume(self.foreground)
+            self.draw_home(self.foreground)
+            self.draw_quit(self.foreground)
+        return self.foreground
+
     def draw(self, screen: pygame.surface.Surface) -> None:
         # put transparent layer above the screen
-        black_transparent = pygame.Color(0, 0, 0, 150)
-        layer = pygame.Surface(screen.get_size(), pygame.SRCALPHA)
-        layer.fill(black_transparent)
-        screen.blit(layer, (0, 0))
-
-        self.draw_pause(screen)
-        self.draw_resume(screen)
-        self.draw_home(screen)
-        self.draw_quit(screen)
+        screen.blit(_get_overlay(screen.get_size()), (0, 0))
+        screen.blit(self.get_foreground(screen.get_size()), (0, 0))
 
     def draw_pause(self, screen: pygame.surface.Surface) -> None:
         # draw pause text
@@ -315,7 +344,7 @@ class GameOverScreen:
         distance_y = 50
         # game over text
         y_offset = distance_y
-        self.game_over_text = FONT.render("G A M E  O V E R", True, self.color.fill)
+        self.game_over_text = TEXTS.render("G A M E  O V E R", self.color.fill)
         self.game_over_box = pygame.Rect(
             (SCREEN_WIDTH // 4) - (self.game_over_text.get_width() // 2),
             y_offset,
@@ -325,8 +354,8 @@ class GameOverScreen:
 
         # press any button to continue
         y_offset = self.game_over_box.y + self.game_over_box.height + distance_y
-        self.press_any_key_text = FONT.render(
-            "PRESS ANY KEY TO CONTINUE", True, self.color.fill
+        self.press_any_key_text = TEXTS.render(
+            "PRESS ANY KEY TO CONTINUE", self.color.fill
         )
         self.press_any_key_box = pygame.Rect(
             (SCREEN_WIDTH // 4) - (self.press_any_key_text.get_width() // 2),
@@ -335,15 +364,20 @@ class GameOverScreen:
             self.press_any_key_text.get_height() + BOX_BORDER_Y,
         )
 
+        # texts are composed once per screen size
+        self.foreground: pygame.surface.Surface | None = None
+
+    def get_foreground(self, size: tuple[int, int]) -> pygame.surface.Surface:
+        if (self.foreground is None) or (self.foreground.get_size() != size):
+            self.foreground = pygame.Surface(size, pygame.SRCALPHA)
+            self.draw_game(self.foreground)
+            self.draw_press_any_button(self.foreground)
+        return self.foreground
+
     def draw(self, screen: pygame.surface.Surface) -> None:
         # put transparent layer above the screen
-        black_transparent = pygame.Color(0, 0, 0, 150)
-        layer = pygame.Surface(screen.get_size(), pygame.SRCALPHA)
-        layer.fill(black_transparent)
-        screen.blit(layer, (0, 0))
-
-        self.draw_game(screen)
-        self.draw_press_any_button(screen)
+        screen.blit(_get_overlay(screen.get_size()), (0, 0))
+        screen.blit(self.get_foreground(screen.get_size()), (0, 0))
 
     def draw_game(self, screen: pygame.surface.Surface) -> None:
         # draw game over text
@@ -372,12 +406,17 @@ class LastGameScreen:
         self.tetris = load_tetris_last()
 
         if self.tetris is not None:
-            total_score = self.tetris.calculate_score().get_total_score()
-            self.score_text = FONT.render(
-                f"Last game score: {total_score}", True, self.color.fill
+            total_score = self.tetris.calculate_score().get_total_score(
+                self.tetris.board.rules
+            )
+            self.score_text = TEXTS.render(
+                f"Last game score: {total_score}", self.color.fill
             )
         else:
-            self.score_text = FONT.render("", True, self.color.fill)
+            self.score_text = TEXTS.render("", self.color.fill)
+
+        # the last game never changes, so it is composed once per screen size
+        self.composed: pygame.surface.Surface | None = None
 
     def draw_score(self, screen: pygame.surface.Surface) -> None:
         # draw score text into the middle of the screen
@@ -399,15 +438,18 @@ class LastGameScreen:
 
         self.tetris.screen = self.tetris._make_game_screen(screen)
         self.tetris.draw()
+        screen.blit(_get_overlay(screen.get_size()), (0, 0))
 
-        black_transparent = pygame.Color(0, 0, 0, 150)
-        layer = pygame.Surface(screen.get_size(), pygame.SRCALPHA)
-        layer.fill(black_transparent)
-        screen.blit(layer, (0, 0))
+    def get_composed(self, size: tuple[int, int]) -> pygame.surface.Surface:
+        if (self.composed is None) or (self.composed.get_size() != size):
+            self.composed = pygame.Surface(size)
+            self.composed.fill(self.color.dark)
+            self.draw_last_game(self.composed)
+            self.draw_score(self.composed)
+        return self.composed
 
     def draw(self, screen: pygame.surface.Surface) -> None:
-        self.draw_last_game(screen)
-        self.draw_score(screen)
+        screen.blit(self.get_composed(screen.get_size()), (0, 0))
 
 
 class HighscoreScreen:
@@ -424,11 +466,11 @@ class HighscoreScreen:
         high_scores = get_high_scores(topk=self.topk)
         y_offset = 50
         for i, (score, date) in enumerate(high_scores, start=1):
-            text = FONT.render(
-                f"{i}. {score} points  -  date: {date}", True, self.color.fill
+            text = TEXTS.render(
+                f"{i}. {score} points  -  date: {date}", self.color.fill
             )
             screen.blit(text, (50, y_offset))
             y_offset += text.get_height() + 20
 
-        text = FONT.render("PRESS ANY KEY TO CONTINUE", True, self.color.fill)
+        text = TEXTS.render("PRESS ANY KEY TO CONTINUE", self.color.fill)
         screen.blit(text, (50, y_offset))
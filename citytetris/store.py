@@ -0,0 +1,317 @@
+from dataclasses import dataclass, field
+from typing import Iterator, Sequence, overload
+
+import numpy as np
+import pygame
+
+from citytetris.blocks import BLOCKS_ALL, Block, IBlock
+from citytetris.board import Board
+from citytetris.constants import BS
+from citytetris.graph import label_components
+from citytetris.labels import (
+    filter_community_edges,
+    get_bounding_boxes,
+    get_l_j_edges,
+    get_l_j_communities,
+    get_largest_t_community,
+    get_longest_road,
+)
+from citytetris.network import get_edges
+from citytetris.tiles import TILES
+
+# component label of each block, bounding boxes of the roads per label and the
+# touching L and J blocks, see StoreBoard.get_components
+Components = tuple[np.ndarray, np.ndarray, np.ndarray]
+
+BLOCK_TYPES: dict[int, type[Block]] = {
+    block.kind.code: block for block in [Block, *BLOCKS_ALL]
+}
+NUM_CODES = 1 + max(BLOCK_TYPES)
+# symbol per type code, code 0 is an empty cell
+SYMBOLS = np.array(
+    [BLOCK_TYPES[code].kind.symbol if code else " " for code in range(NUM_CODES)]
+)
+# square offsets per type code and rotation, shape (code, rotation, square, xy)
+SQUARE_OFFSETS = np.array(
+    [
+        BLOCK_TYPES[code].kind.block_variants if code else np.zeros((4, 4, 2))
+        for code in range(NUM_CODES)
+    ],
+    dtype=np.int32,
+)
+
+
+class BlockStore:
+    """Store blocks as parallel numpy arrays instead of Block objects
+
+    For each block, the type code, rotation, position (in cells) and highlight flag
+    is stored. Arrays grow by doubling their capacity, blocks can only be appended.
+
+    """
+
+    dtypes = {
+        'codes': np.int8,
+        'rotations': np.int8,
+        'xs': np.int32,
+        'ys': np.int32,
+        'highlights': np.bool_,
+    }
+
+    def __init__(self, capacity: int = 64) -> None:
+        self.size = 0
+        self._arrays: dict[str, np.ndarray] = {
+            name: np.zeros(capacity, dtype=dtype) for name, dtype in self.dtypes.items()
+        }
+
+    def __len__(self) -> int:
+        return self.size
+
+    @property
+    def capacity(self) -> int:
+        return len(self._arrays['codes'])
+
+    @property
+    def itemsize(self) -> int:
+        """Number of bytes needed per block"""
+        return sum(np.dtype(dtype).itemsize for dtype in self.dtypes.values())
+
+    @property
+    def nbytes(self) -> int:
+        """Number of bytes currently allocated, including unused capacity"""
+        return sum(array.nbytes for array in self._arrays.values())
+
+    @property
+    def codes(self) -> np.ndarray:
+        return self._arrays['codes'][: self.size]
+
+    @property
+    def rotations(self) -> np.ndarray:
+        return self._arrays['rotations'][: self.size]
+
+    @property
+    def xs(self) -> np.ndarray:
+        return self._arrays['xs'][: self.size]
+
+    @property
+    def ys(self) -> np.ndarray:
+        return self._arrays['ys'][: self.size]
+
+    @property
+    def highlights(self) -> np.ndarray:
+        return self._arrays['highlights'][: self.size]
+
+    def _grow(self) -> None:
+        capacity = 2 * self.capacity
+        for name, array in self._arrays.items():
+            array_new = np.zeros(capacity, dtype=array.dtype)
+            array_new[: self.size] = array[: self.size]
+            self._arrays[name] = array_new
+
+    def append(self, block: Block) -> int:
+        """Append a block and return its index"""
+        if self.size == self.capacity:
+            self._grow()
+
+        piece_id = self.size
+        self._arrays['codes'][piece_id] = block.code
+        self._arrays['rotations'][piece_id] = block.rotation
+        self._arrays['xs'][piece_id] = block.x // BS
+        self._arrays['ys'][piece_id] = block.y // BS
+        self._arrays['highlights'][piece_id] = block.highlight
+        self.size += 1
+        return piece_id
+
+    def get_block(self, piece_id: int) -> Block:
+        """Create a Block object for the stored block
+
+        The object is a copy, changing it does not change the store.
+
+        """
+        if not (0 <= piece_id < self.size):
+            raise IndexError("block index out of range")
+
+        block = BLOCK_TYPES[int(self._arrays['codes'][piece_id])]()
+        block.rotation = int(self._arrays['rotations'][piece_id])
+        block.x = int(self._arrays['xs'][piece_id]) * BS
+        block.y = int(self._arrays['ys'][piece_id]) * BS
+        block.highlight = bool(self._arrays['highlights'][piece_id])
+        return block
+
+    def copy(self) -> "BlockStore":
+        store = BlockStore(capacity=0)
+        store.size = self.size
+        store._arrays = {name: array.copy() for name, array in self._arrays.items()}
+        return store
+
+    def get_cells(self) -> tuple[np.ndarray, np.ndarray]:
+        """Get the x and y indices of all squares, each with shape (blocks, 4)"""
+        offsets = SQUARE_OFFSETS[self.codes, self.rotations]
+        xs = self.xs[:, None] + offsets[..., 0]
+        ys = self.ys[:, None] + offsets[..., 1]
+        return xs, ys
+
+
+class BlockListView(Sequence[Block]):
+    """List of Block objects on top of a BlockStore
+
+    Only for code that still expects Block objects; every access creates a new
+    Block object and blocks can only be appended.
+
+    """
+
+    def __init__(self, store: BlockStore) -> None:
+        self.store = store
+
+    def __len__(self) -> int:
+        return len(self.store)
+
+    @overload
+    def __getitem__(self, index: int) -> Block: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> list[Block]: ...
+
+    def __getitem__(self, index: int | slice) -> Block | list[Block]:
+        if isinstance(index, slice):
+            return [self.store.get_block(i) for i in range(len(self))[index]]
+        if index < 0:
+            index += len(self)
+        return self.store.get_block(index)
+
+    def __iter__(self) -> Iterator[Block]:
+        for piece_id in range(len(self)):
+            yield self.store.get_block(piece_id)
+
+    def append(self, block: Block) -> None:
+        self.store.append(block)
+
+
+@dataclass(repr=False)
+class StoreBoard(Board):
+    """Board that keeps its settled blocks in a BlockStore
+
+    This needs much less memory per block than a list of Block objects, which
+    matters for very big boards. block_list is a BlockListView of the store. The
+    scoring rules work on the arrays of the store, only the highlighted blocks are
+    created as Block objects.
+
+    """
+
+    store: BlockStore = field(init=False, repr=False)
+    _components: tuple[int, Components] | None = field(
+        init=False, default=None, repr=False
+    )
+
+    def __post_init__(self) -> None:
+        self.store = BlockStore()
+        block_list = list(self.block_list)
+        self.block_list = BlockListView(self.store)  # type: ignore[assignment]
+        super().__post_init__()
+        for block in block_list:
+            self.block_list.append(block)
+            self._register_block(block)
+
+    def snapshot(self) -> Board:
+        board = super().snapshot()
+        assert isinstance(board, StoreBoard)
+        board.store = self.store.copy()
+        board.block_list = BlockListView(board.store)  # type: ignore[assignment]
+        return board
+
+    def remove_highlight_from_blocks(self) -> None:
+        self.store.highlights[:] = False
+
+    def add_highlight_to_blocks(self, blocks: set[Block]) -> None:
+        # Block objects are copies, find the stored block via the first square
+        for block in blocks:
+            x, y = block.indices[0]
+            self.store.highlights[self.piece_ids[y, x]] = True
+
+    def get_highlight_flags(self) -> np.ndarray:
+        return self.store.highlights
+
+    def set_highlight_flags(self, flags: np.ndarray) -> None:
+        self.store.highlights[:] = flags
+        self._highlight_version = self.version
+
+    def get_components(self) -> Components:
+        """Label the communities of the stored blocks, once per board version for
+        all rules
+
+        """
+        if (self._components is not None) and (self._components[0] == self.version):
+            return self._components[1]
+
+        codes = self.store.codes
+        _, piece_ids = self.get_built_grids()
+        edges = filter_community_edges(get_edges(piece_ids), codes)
+        labels = label_components(len(codes), edges)
+        xs, ys = self.store.get_cells()
+        is_road = codes == IBlock.kind.code
+        road_bboxes = get_bounding_boxes(
+            xs[is_road].ravel(),
+            ys[is_road].ravel(),
+            labels[is_road].repeat(xs.shape[1]),
+            len(codes),
+        )
+        components = labels, road_bboxes, get_l_j_edges(edges, codes)
+        self._components = self.version, components
+        return components
+
+    def _get_stored_blocks(self, piece_ids: np.ndarray) -> set[Block]:
+        return {self.store.get_block(piece_id) for piece_id in piece_ids.tolist()}
+
+    def _calculate_longest_road(self) -> tuple[int, set[Block]]:
+        labels, road_bboxes, _ = self.get_components()
+        distance, road = get_longest_road(self.store.codes, labels, road_bboxes)
+        return distance, self._get_stored_blocks(road)
+
+    def _calculate_L_J_communities(self) -> tuple[int, set[Block]]:
+        labels, _, l_j_edges = self.get_components()
+        num_communities, pairs = get_l_j_communities(
+            self.store.codes, labels, l_j_edges
+        )
+        return num_communities, self._get_stored_blocks(pairs)
+
+    def _calculate_largest_T_community(self) -> tuple[int, set[Block]]:
+        labels, _, _ = self.get_components()
+        size, community = get_largest_t_community(self.store.codes, labels)
+        return size, self._get_stored_blocks(community)
+
+    def _calculate_full_rows(self) -> int:
+        _, ys = self.store.get_cells()
+        ys = ys[(ys >= 0) & (ys < self.height)]
+        squares_per_row = np.bincount(ys, minlength=self.height)
+        return int(np.count_nonzero(squares_per_row == self.width))
+
+    def draw_blocks(self, screen: pygame.surface.Surface) -> None:
+        xs, ys = self.store.get_cells()
+        tiles = {
+            (code, highlight): TILES.get_tile(BLOCK_TYPES[code].kind.shades, highlight)
+            for code in np.unique(self.store.codes).tolist()
+            for highlight in (False, True)
+        }
+        screen.blits(
+            [
+                (tiles[code, highlight], (x, y))
+                for code, highlight, cell_xs, cell_ys in zip(
+                    self.store.codes.tolist(),
+                    self.store.highlights.tolist(),
+                    (BS * xs).tolist(),
+                    (BS * ys).tolist(),
+                )
+                for x, y in zip(cell_xs, cell_ys)
+            ],
+            doreturn=False,
+        )
+
+    def __repr__(self) -> str:
+        grid = np.full((self.height, self.width), " ")
+        xs, ys = self.store.get_cells()
+        grid[ys, xs] = SYMBOLS[self.store.codes][:, None]
+
+        lines = ["#" * (2 * self.width + 1)]
+        for row in grid.tolist():
+            lines.append("#" + " ".join(row) + "#")
+        lines.append("#" * (2 * self.width + 1))
+        return "\n".join(lines)
@@ -0,0 +1,242 @@
+"""Score very big boards on multiple processes
+
+The grids of the board are put into shared memory and split into horizontal stripes.
+Each worker labels the components of the blocks in its stripe and accumulates the
+full rows and the bounding boxes of the roads. The stripes are then stitched
+together by labeling the graph of the stripe labels and the edges that cross the
+stripe borders, which gives exactly the same score as labels.calculate_score.
+
+"""
+
+import atexit
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+
+from citytetris.blocks import IBlock
+from citytetris.graph import label_components
+from citytetris.labels import (
+    filter_community_edges,
+    get_bounding_boxes,
+    get_l_j_edges,
+    score_components,
+)
+from citytetris.network import get_edges
+from citytetris.score import Score
+
+_EXECUTORS: dict[int, Executor] = {}
+
+
+@dataclass
+class StripeResult:
+    full_rows: int
+    # the blocks with cells in the stripe, sorted, and their type codes
+    pieces: np.ndarray
+    codes: np.ndarray
+    # label of each of these blocks within the stripe
+    labels: np.ndarray
+    # bounding boxes of the I block cells per stripe label, shape (4, labels)
+    road_labels: np.ndarray
+    road_bboxes: np.ndarray
+    # touching L and J blocks in the stripe, see get_l_j_edges
+    l_j_edges: np.ndarray
+
+
+def _get_executor(num_workers: int) -> Executor:
+    # starting processes is slow, so the pools are kept until the program ends
+    if num_workers not in _EXECUTORS:
+        _EXECUTORS[num_workers] = ProcessPoolExecutor(max_workers=num_workers)
+    return _EXECUTORS[num_workers]
+
+
+@atexit.register
+def _shutdown_executors() -> None:
+    for executor in _EXECUTORS.values():
+        executor.shutdown()
+    _EXECUTORS.clear()
+
+
+def label_stripe(
+    occupancy: np.ndarray, piece_ids: np.ndarray, num_pieces: int, row: int
+) -> StripeResult:
+    """Label the components of the blocks in a stripe of the grids
+
+    num_pieces is the number of blocks on the whole board, row is the index of the
+    first row of the stripe.
+
+    """
+    width = occupancy.shape[1]
+    full_rows = int(np.count_nonzero(np.count_nonzero(occupancy, axis=1) == width))
+
+    # number the blocks of the stripe as 0, 1, ...
+    mask = piece_ids >= 0
+    ids = piece_ids[mask]
+    is_present = np.zeros(num_pieces, dtype=bool)
+    is_present[ids] = True
+    pieces = np.flatnonzero(is_present)
+    local_ids = np.zeros(num_pieces, dtype=np.int64)
+    local_ids[pieces] = np.arange(len(pieces))
+    codes = np.zeros(len(pieces), dtype=occupancy.dtype)
+    codes[local_ids[ids]] = occupancy[mask]
+
+    edges = filter_community_edges(local_ids[get_edges(piece_ids)], codes)
+    labels = label_components(len(pieces), edges)
+
+    ys, xs = np.nonzero(occupancy == IBlock.kind.code)
+    cell_labels = labels[local_ids[piece_ids[ys, xs]]]
+    road_labels = np.unique(cell_labels)
+    road_bboxes = get_bounding_boxes(
+        xs, ys + row, np.searchsorted(road_labels, cell_labels), len(road_labels)
+    )
+    return StripeResult(
+        full_rows=full_rows,
+        pieces=pieces,
+        codes=codes,
+        labels=labels,
+        road_labels=road_labels,
+        road_bboxes=road_bboxes,
+        l_j_edges=pieces[get_l_j_edges(edges, codes)],
+    )
+
+
+def _label_shared_stripe(
+    name: str, shape: tuple[int, int], num_pieces: int, row_start: int, row_stop: int
+) -> StripeResult:
+    # runs on the worker, the shared memory holds occupancy and then piece_ids
+    shm = SharedMemory(name=name)
+    try:
+        occupancy = np.ndarray(shape, dtype=np.int8, buffer=shm.buf)
+        piece_ids = np.ndarray(
+            shape, dtype=np.int32, buffer=shm.buf, offset=occupancy.nbytes
+        )
+        result = label_stripe(
+            occupancy[row_start:row_stop],
+            piece_ids[row_start:row_stop],
+            num_pieces,
+            row_start,
+        )
+        # the result does not reference the shared memory, which can only be closed
+        # once there are no views of it left
+        del occupancy, piece_ids
+        return result
+    finally:
+        shm.close()
+
+
+def _label_stripes(
+    occupancy: np.ndarray,
+    piece_ids: np.ndarray,
+    num_pieces: int,
+    rows: list[int],
+    num_workers: int,
+) -> list[StripeResult]:
+    if num_workers == 1:
+        return [
+            label_stripe(
+                occupancy[start:stop], piece_ids[start:stop], num_pieces, start
+            )
+            for start, stop in zip(rows[:-1], rows[1:])
+        ]
+
+    shm = SharedMemory(create=True, size=occupancy.nbytes + piece_ids.nbytes)
+    try:
+        shared_occupancy = np.ndarray(occupancy.shape, dtype=np.int8, buffer=shm.buf)
+        shared_occupancy[:] = occupancy
+        shared_piece_ids = np.ndarray(
+            piece_ids.shape, dtype=np.int32, buffer=shm.buf, offset=occupancy.nbytes
+        )
+        shared_piece_ids[:] = piece_ids
+        del shared_occupancy, shared_piece_ids
+
+        executor = _get_executor(num_workers)
+        futures = [
+            executor.submit(
+                _label_shared_stripe,
+                shm.name,
+                occupancy.shape,
+                num_pieces,
+                start,
+                stop,
+            )
+            for start, stop in zip(rows[:-1], rows[1:])
+        ]
+        return [future.result() for future in futures]
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+def calculate_score_and_highlights(
+    occupancy: np.ndarray,
+    piece_ids: np.ndarray,
+    num_pieces: int,
+    num_workers: int = 1,
+    num_stripes: int | None = None,
+) -> tuple[Score, np.ndarray]:
+    """Calculate the score and the highlight flag of each block like
+    labels.calculate_score_and_highlights, with the stripes labeled by num_workers
+    processes
+
+    By default, there is one stripe per worker. With a single worker, the stripes
+    are labeled in this process.
+
+    """
+    height = occupancy.shape[0]
+    num_stripes = min(num_stripes or num_workers, max(height, 1))
+    rows = np.linspace(0, height, num_stripes + 1).astype(int).tolist()
+    occupancy = np.ascontiguousarray(occupancy, dtype=np.int8)
+    piece_ids = np.ascontiguousarray(piece_ids, dtype=np.int32)
+    results = _label_stripes(occupancy, piece_ids, num_pieces, rows, num_workers)
+
+    codes = np.zeros(num_pieces, dtype=np.int8)
+    for result in results:
+        codes[result.pieces] = result.codes
+
+    # stitch the stripes: each block is connected to the root of its stripe label,
+    # blocks across a stripe border are connected if they touch
+    edges = [
+        np.stack([result.pieces, result.pieces[result.labels]], axis=1)
+        for result in results
+    ]
+    l_j_edges = [result.l_j_edges for result in results]
+    for row in rows[1:-1]:
+        ids0, ids1 = piece_ids[row - 1], piece_ids[row]
+        touching = (ids0 >= 0) & (ids1 >= 0) & (ids0 != ids1)
+        border_edges = np.stack([ids0[touching], ids1[touching]], axis=1)
+        edges.append(border_edges)
+        l_j_edges.append(get_l_j_edges(border_edges.astype(np.int64), codes))
+    edges_all = filter_community_edges(np.concatenate(edges), codes)
+    labels = label_components(num_pieces, edges_all)
+
+    no_cells = np.zeros(0, dtype=int)
+    road_bboxes = get_bounding_boxes(no_cells, no_cells, no_cells, num_pieces)
+    for result in results:
+        road_roots = labels[result.pieces[result.road_labels]]
+        np.minimum.at(road_bboxes[0], road_roots, result.road_bboxes[0])
+        np.minimum.at(road_bboxes[1], road_roots, result.road_bboxes[1])
+        np.maximum.at(road_bboxes[2], road_roots, result.road_bboxes[2])
+        np.maximum.at(road_bboxes[3], road_roots, result.road_bboxes[3])
+
+    full_rows = sum(result.full_rows for result in results)
+    return score_components(
+        full_rows, codes, labels, road_bboxes, np.concatenate(l_j_edges)
+    )
+
+
+def calculate_score(
+    occupancy: np.ndarray,
+    piece_ids: np.ndarray,
+    num_pieces: int,
+    num_workers: int = 1,
+    num_stripes: int | None = None,
+) -> Score:
+    """Calculate the score like labels.calculate_score, see
+    calculate_score_and_highlights
+
+    """
+    score, _ = calculate_score_and_highlights(
+        occupancy, piece_ids, num_pieces, num_workers, num_stripes
+    )
+    return score
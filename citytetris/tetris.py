@@ -1,12 +1,15 @@
 import logging
 import random
 import sys
-from typing import Type
+from typing import Literal, Type
 
 import pygame
 
+from citytetris.background import BackgroundScorer
 from citytetris.board import Board
 from citytetris.blocks import BLOCKS_ALL, Block
+from citytetris.camera import Camera
+from citytetris.chunks import ChunkedBoard
 from citytetris.colors import GrayShade
 from citytetris.constants import (
     BS,
@@ -16,11 +19,20 @@ from citytetris.constants import (
     TIME_BEFORE_NEW_SPAWN,
     TIME_BETWEEN_BLOCKS,
 )
+from citytetris.display import get_window_rect
+from citytetris.palette import PaletteRenderer
 from citytetris.score import Score
+from citytetris.tiles import blit_squares
+from citytetris.timers import Scheduler
 
 
 logger = logging.getLogger(__name__)
 
+# how the settled blocks are drawn:
+# - tiles: blit a tile per square, with the grid lines
+# - palette: one pixel per cell of an 8 bit surface, scaled to the screen
+DrawMethod = Literal["tiles", "palette"]
+
 
 class Tetris:
     def __init__(
@@ -28,6 +40,10 @@ class Tetris:
         screen: pygame.surface.Surface,
         size: str = "normal",
         seed: int | str | None = None,
+        board_cls: Type[Board] = Board,
+        async_scoring: bool = False,
+        draw_method: DrawMethod = "tiles",
+        use_camera: bool = False,
     ) -> None:
         self.speed = "normal"
         self.size = size
@@ -35,19 +51,51 @@ class Tetris:
 
         random.seed(seed)
         if size == "small":
-            self.board = Board(10, 10)
+            self.board = board_cls(10, 10)
+        elif size == "endless":
+            # the endless city is far higher than the screen, so it needs a camera
+            self.board = ChunkedBoard()
+            use_camera = True
         else:
-            self.board = Board()
+            self.board = board_cls()
+
+        # evaluate the highlights on a worker thread, so that frames never wait for it
+        self.scorer = BackgroundScorer(self.board) if async_scoring else None
 
+        # with a camera, the board is shown in the right half of the screen at any
+        # size, its viewport is sized in _make_game_screen
+        self.camera = Camera(0, 0) if use_camera else None
         self.screen = self._make_game_screen(screen)
         self.screen_preview = self._make_preview_screen(screen)
+        # background, grid and settled blocks, only redrawn when these change
+        self.layer: pygame.surface.Surface | None = None
+        self.layer_version: tuple[int, ...] | None = None
+        self.layer_renders: int = 0
+        # parts of the window that changed in the last frame, see draw
+        self.dirty_rects: list[pygame.Rect] = []
+        self._active_rect: pygame.Rect | None = None
+        self._preview_block: Block | None = None
+        # last move down of the active block, from and to y, and how far below its
+        # position it is drawn, see get_fall_offset
+        self._fall: tuple[Block, int, int] | None = None
+        self.fall_offset: int = 0
         self.running: bool = True
         self.paused: bool = False
         self.game_over: bool = False
         self.time_since_last_block_move: int = 0
         self.clock_block_move: int = CLOCK_BLOCK_MOVE
         self.time_since_touching_bottom: int = 0
+        # milliseconds of game time, which only passes in logic steps
+        self.game_time: int = 0
+        # the gravity hold of new blocks and the end of the game, on game time so
+        # that they wait while paused and catch up with the steps
+        self.scheduler = Scheduler(clock=lambda: self.game_time)
+        # a new block does not fall until its hold is over, but takes input
+        self.block_held: bool = False
         self.gray_shade = GrayShade()
+        self.palette = (
+            PaletteRenderer(self.gray_shade.dark) if draw_method == "palette" else None
+        )
 
         self.block_queue: list[Block] = []
         self._fill_block_queue()
@@ -59,6 +107,13 @@ class Tetris:
     ) -> pygame.surface.Surface:
         screen_width = screen.get_width()
         screen_height = screen.get_height()
+        if self.camera is not None:
+            viewport = screen.subsurface(
+                (screen_width // 2, 0, screen_width - screen_width // 2, screen_height)
+            )
+            self.camera.width, self.camera.height = viewport.get_size()
+            return viewport
+
         board_width = self.board.width * BS
         board_height = self.board.height * BS
         x_offset = 3 * screen_width // 4 - board_width // 2
@@ -78,16 +133,75 @@ class Tetris:
             self.replay.append("")
         self.replay[-1] += move
 
-    def draw_grid(self) -> None:
+    def draw_grid(self, screen: pygame.surface.Surface | None = None) -> None:
+        screen = self.screen if screen is None else screen
+        if self.camera is not None:
+            self._draw_grid_visible(screen, self.camera)
+            return
         for x in range(0, self.board.width * BS, BS):
             pygame.draw.line(
-                self.screen, self.gray_shade.fill, (x, 0), (x, self.board.height * BS)
+                screen, self.gray_shade.fill, (x, 0), (x, self.board.height * BS)
             )
         for y in range(0, self.board.height * BS, BS):
             pygame.draw.line(
-                self.screen, self.gray_shade.fill, (0, y), (self.board.width * BS, y)
+                screen, self.gray_shade.fill, (0, y), (self.board.width * BS, y)
             )
 
+    def _draw_grid_visible(
+        self, screen: pygame.surface.Surface, camera: Camera
+    ) -> None:
+        x_start, y_start, x_stop, y_stop = camera.get_visible_cells(
+            self.board.width, self.board.height
+        )
+        left, top = camera.to_screen(x_start * BS, y_start * BS)
+        right, bottom = camera.to_screen(x_stop * BS, y_stop * BS)
+        for x in range(left, right, camera.tile_size):
+            pygame.draw.line(screen, self.gray_shade.fill, (x, top), (x, bottom))
+        for y in range(top, bottom, camera.tile_size):
+            pygame.draw.line(screen, self.gray_shade.fill, (left, y), (right, y))
+
+    def draw_block(self, block: Block, offset_y: int = 0) -> None:
+        # draw a block onto the game screen, as seen through the camera, offset_y
+        # pixels at BS per cell below its position
+        if (self.camera is None) and not offset_y:
+            block.draw(self.screen)
+            return
+
+        squares = (
+            (shades, highlight, x, y + offset_y)
+            for shades, highlight, x, y in block.yield_squares_to_draw()
+        )
+        if self.camera is None:
+            blit_squares(self.screen, squares)
+            return
+        to_screen = self.camera.to_screen
+        blit_squares(
+            self.screen,
+            (
+                (shades, highlight, *to_screen(x, y))
+                for shades, highlight, x, y in squares
+            ),
+            self.camera.tile_size,
+        )
+
+    def draw_settled_blocks(self, screen: pygame.surface.Surface) -> None:
+        if self.camera is None:
+            self.board.draw_blocks(screen)
+            return
+
+        # only the blocks in view are drawn, they are looked up on the grid
+        to_screen = self.camera.to_screen
+        area = self.camera.get_visible_cells(self.board.width, self.board.height)
+        blit_squares(
+            screen,
+            (
+                (shades, highlight, *to_screen(x, y))
+                for block in self.board.get_blocks_in_area(*area)
+                for shades, highlight, x, y in block.yield_squares_to_draw()
+            ),
+            self.camera.tile_size,
+        )
+
     def _fill_block_queue(self) -> None:
         if len(self.block_queue) > len(BLOCKS_ALL):
             return
@@ -107,13 +221,54 @@ class Tetris:
         self.board.spawn_block(block)
         self.record(block.symbol, new_line=True)
         self.time_since_last_block_move = 0
-        # calculate score to highlight blocks
-        self.board.calculate_score()
 
-    def draw_blocks(self) -> None:
-        self.board.block_active.draw(self.screen)
-        for block in self.board.block_list:
-            block.draw(self.screen)
+    def draw_ghost(self) -> None:
+        # outline the position where the active block would land
+        block = self.board.block_active
+        distance = self.board.drop_distance(block)
+        if not distance:
+            return
+        for rect in block.get_rects():
+            rect.y += distance * BS
+            if self.camera is not None:
+                rect = self.camera.rect_to_screen(rect)
+            pygame.draw.rect(self.screen, self.gray_shade.light, rect, width=1)
+
+    def draw_layer(self) -> None:
+        # settled blocks only change when a block is added or highlights change, the
+        # board itself is replaced when loading a replay
+        version: tuple[int, ...] = id(self.board), *self.board.drawn_version
+        if self.camera is not None:
+            version += self.camera.state
+        if self.layer_version != version:
+            if self.layer is None:
+                self.layer = pygame.Surface(self.screen.get_size())
+                if pygame.display.get_surface() is not None:
+                    self.layer = self.layer.convert()
+            self.layer.fill(self.gray_shade.dark)
+            if self.palette is None:
+                self.draw_grid(self.layer)
+                self.draw_settled_blocks(self.layer)
+            else:
+                self.palette.draw_blocks(self.board, self.layer, self.camera)
+            self.layer_version = version
+            self.layer_renders += 1
+        assert self.layer is not None
+        self.screen.blit(self.layer, (0, 0))
+
+    def draw_blocks(self, alpha: float = 1.0) -> None:
+        if self.scorer is None:
+            self.board.update_highlights()
+        else:
+            self.scorer.update()
+        if self.camera is not None:
+            # keep the active block in view
+            self.camera.follow(self._get_block_rect(self.board.block_active))
+            self.camera.clamp(self.board.width, self.board.height)
+        self.draw_layer()
+        self.draw_ghost()
+        self.fall_offset = self.get_fall_offset(alpha)
+        self.draw_block(self.board.block_active, self.fall_offset)
         self.block_queue[0].draw(self.screen_preview)
 
     def player_input(self, block: Block, event: pygame.event.Event) -> None:
@@ -129,6 +284,15 @@ class Tetris:
             self.paused = True
             return
 
+        # zoom the camera in and out
+        if (self.camera is not None) and (event.type == pygame.KEYDOWN):
+            if event.key in (pygame.K_PLUS, pygame.K_EQUALS, pygame.K_KP_PLUS):
+                self.camera.zoom(2 * self.camera.tile_size)
+                return
+            if event.key in (pygame.K_MINUS, pygame.K_KP_MINUS):
+                self.camera.zoom(self.camera.tile_size // 2)
+                return
+
         # move block down
         if (event.type == pygame.KEYDOWN) and (event.key == pygame.K_DOWN):
             self.clock_block_move = CLOCKTICK
@@ -137,10 +301,21 @@ class Tetris:
             self.clock_block_move = CLOCK_BLOCK_MOVE
             return
 
+        if self.game_over:
+            return
+
+        # drop block to the bottom, it is fixed in the next frame
+        if (event.type == pygame.KEYDOWN) and (event.key == pygame.K_UP):
+            distance = self.board.drop_distance(block)
+            block.move_down(distance)
+            self.record("d" * distance)
+            self.time_since_touching_bottom = TIME_BEFORE_NEW_SPAWN
+            return
+
         # move left
         if (event.type == pygame.KEYDOWN) and (event.key == pygame.K_LEFT):
             # check left board border
-            if (block.x > 0) and not block.collides_left(self.board.rect_list):
+            if (block.x > 0) and not self.board.collides_left(block):
                 block.move_left()
                 self.record("l")
             return
@@ -150,7 +325,7 @@ class Tetris:
             # check right board border
             if (
                 block.get_rightmost_x() < self.board.width * BS
-            ) and not block.collides_right(self.board.rect_list):
+            ) and not self.board.collides_right(block):
                 block.move_right()
                 self.record("r")
             return
@@ -158,9 +333,9 @@ class Tetris:
         # rotate block
         if (event.type == pygame.KEYDOWN) and (event.key == pygame.K_SPACE):
             if not (
-                block.collides_left(self.board.rect_list)
-                or block.collides_right(self.board.rect_list)
-                or block.collides_bottom(self.board.rect_list)
+                self.board.collides_left(block)
+                or self.board.collides_right(block)
+                or self.board.collides_bottom(block)
             ):
                 block.rotate()
                 self.record("R")
@@ -180,22 +355,18 @@ class Tetris:
     def block_progress(self, block: Block) -> None:
         # if block hits the bottom of the board, spawn a new block
         hits_bottom = block.get_bottommost_y() >= (self.board.height * BS)
-        hits_block = block.collides_bottom(self.board.rect_list)
+        hits_block = self.board.collides_bottom(block)
         if hits_bottom or hits_block:
             if self.touches_ceiling(block):
-                # game over
+                # game over, frames keep running until the game stops
                 self.game_over = True
-                pygame.time.wait(TIME_BEFORE_GAME_OVER)
-                self.board.calculate_score()
-                self.running = False
+                self.scheduler.schedule(TIME_BEFORE_GAME_OVER, self._stop, "stop")
             else:
                 # give the player a bit of time to move the block, then fix block and spawn a new one
                 self.time_since_touching_bottom += CLOCKTICK
                 if self.time_since_touching_bottom > TIME_BEFORE_NEW_SPAWN:
                     self.time_since_touching_bottom = 0
-                    pygame.time.wait(TIME_BETWEEN_BLOCKS)
-                    self.spawn_block()
-                    logger.debug("\n" + repr(self.board))
+                    self._spawn_next()
         else:
             # move block down
             if self.time_since_last_block_move > self.clock_block_move:
@@ -203,26 +374,112 @@ class Tetris:
                 self.record("d")
                 self.time_since_last_block_move = 0
 
+    def _spawn_next(self) -> None:
+        self.spawn_block()
+        logger.debug("\n" + repr(self.board))
+        # the new block can be moved at once, it only starts to fall after the hold
+        self.block_held = True
+        self.scheduler.cancel("hold")
+        self.scheduler.schedule(TIME_BETWEEN_BLOCKS, self._release_block, "hold")
+
+    def _release_block(self) -> None:
+        self.block_held = False
+
+    def _stop(self) -> None:
+        self.running = False
+
     def calculate_score(self) -> Score:
-        return self.board.calculate_score()
+        return self.board.score()
+
+    def close(self) -> None:
+        if self.scorer is not None:
+            self.scorer.close()
 
-    def draw(self) -> None:
-        self.screen.fill(self.gray_shade.dark)
-        self.draw_grid()
-        self.draw_blocks()
+    def _get_block_rect(self, block: Block) -> pygame.Rect:
+        rects = block.get_rects()
+        return rects[0].unionall(rects[1:])
 
-    def update(self, tick: int) -> tuple[bool, bool]:
+    def get_active_rect(self) -> pygame.Rect:
+        """Get the area of the active block and its ghost in window coordinates"""
+        block = self.board.block_active
+        rect = self._get_block_rect(block)
+        rect.height += self.board.drop_distance(block) * BS
+        rect.union_ip(rect.move(0, self.fall_offset))
+        if self.camera is not None:
+            rect = self.camera.rect_to_screen(rect).clip(self.screen.get_rect())
+        return rect.move(self.screen.get_abs_offset())
+
+    def _update_dirty_rects(self, layer_changed: bool) -> None:
+        active_rect = self.get_active_rect()
+        if layer_changed or (self._active_rect is None):
+            self.dirty_rects = [get_window_rect(self.screen)]
+        elif active_rect != self._active_rect:
+            self.dirty_rects = [self._active_rect, active_rect]
+        else:
+            self.dirty_rects = []
+        self._active_rect = active_rect
+
+        if self.block_queue[0] is not self._preview_block:
+            self.dirty_rects.append(get_window_rect(self.screen_preview))
+            self._preview_block = self.block_queue[0]
+
+    def get_fall_offset(self, alpha: float) -> int:
+        """Get how far below its position the active block is drawn, in pixels at BS
+        per cell
+
+        When the last step moved the block down, it is drawn between its position
+        before and after that step, alpha of the way, so the offset is negative.
+
+        """
+        if self._fall is None:
+            return 0
+        block, y_before, y_after = self._fall
+        # the block was dropped or has settled since
+        if (block is not self.board.block_active) or (block.y != y_after):
+            return 0
+        return round((y_before - y_after) * (1 - min(max(alpha, 0.0), 1.0)))
+
+    def draw(self, alpha: float = 1.0) -> None:
+        # the background and the grid are part of the cached layer
+        layer_renders = self.layer_renders
+        self.draw_blocks(alpha)
+        self._update_dirty_rects(self.layer_renders != layer_renders)
+
+    def step(self, tick: int) -> None:
+        """Advance the game logic by tick milliseconds"""
+        self._fall = None
+        if self.paused:
+            return
+        self.game_time += tick
+        self.scheduler.poll()
+        block = self.board.block_active
+        self.time_since_last_block_move += tick
+
+        # move block down, spawn new if hits bottom, end game if hits top
+        if not (self.game_over or self.block_held):
+            y = block.y
+            self.block_progress(block)
+            if block.y != y:
+                self._fall = block, y, block.y
+
+    def update(
+        self, tick: int, steps: int = 1, alpha: float = 1.0
+    ) -> tuple[bool, bool]:
+        """Handle the player input, run steps logic steps of tick milliseconds and
+        draw a frame
+
+        alpha is the part of the next step that already passed, see FixedTimestep,
+        1 draws the blocks where they are.
+
+        """
         block = self.board.block_active
-        if not self.paused:
-            self.time_since_last_block_move += tick
 
         # player input
         for event in pygame.event.get():
             self.player_input(block, event)
 
-        # move block down, spawn new if hits bottom, end game if hits top
-        if not self.paused:
-            self.block_progress(block)
+        for _ in range(steps):
+            self.step(tick)
 
-        self.draw()
+        self.draw(alpha)
         return self.running, self.paused
@@ -0,0 +1,58 @@
+"""Cache of rendered text surfaces
+
+Rasterizing text with a font is slow compared to blitting, and the texts of the
+score panel and the menus rarely change. Rendered texts are therefore kept in a
+bounded least recently used cache.
+
+"""
+
+from collections import OrderedDict
+
+import pygame
+
+from citytetris.constants import FONT
+
+ColorValue = pygame.Color | tuple[int, int, int] | tuple[int, int, int, int]
+
+
+class TextCache:
+    """Rendered text surfaces keyed by text, color, antialias and font"""
+
+    def __init__(self, maxsize: int = 256) -> None:
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._surfaces: OrderedDict[
+            tuple[str, tuple[int, ...], bool, pygame.font.Font], pygame.surface.Surface
+        ] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._surfaces)
+
+    def render(
+        self,
+        text: str,
+        color: ColorValue,
+        antialias: bool = True,
+        font: pygame.font.Font = FONT,
+    ) -> pygame.surface.Surface:
+        """Get the text rendered like font.render, the surface must not be changed"""
+        key = (text, tuple(pygame.Color(color)), antialias, font)
+        surface = self._surfaces.get(key)
+        if surface is not None:
+            self.hits += 1
+            self._surfaces.move_to_end(key)
+            return surface
+
+        self.misses += 1
+        surface = font.render(text, antialias, color)
+        self._surfaces[key] = surface
+        if len(self._surfaces) > self.maxsize:
+            self._surfaces.popitem(last=False)
+        return surface
+
+    def clear(self) -> None:
+        self._surfaces.clear()
+
+
+TEXTS = TextCache()
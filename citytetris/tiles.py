@@ -0,0 +1,88 @@
+"""Pre-rendered tiles of block squares
+
+Drawing a square takes a rect and four lines (and one more rect if highlighted).
+Instead, each combination of color shade and highlight is drawn once onto a tile
+surface and the squares are drawn by blitting these tiles, batched with
+Surface.blits.
+
+"""
+
+from typing import Iterable
+
+import pygame
+
+from citytetris.colors import ColorShade
+from citytetris.constants import BS
+
+
+def draw_square(
+    screen: pygame.surface.Surface,
+    shades: ColorShade,
+    x: int,
+    y: int,
+    highlight: bool = False,
+) -> None:
+    """Draw a single square of a block, x and y are in pixels"""
+    pygame.draw.rect(screen, shades.fill, (x, y, BS, BS))
+    if highlight:
+        # draw a smaller rect into the center of the rect
+        pygame.draw.rect(
+            screen, shades.light, (x + BS // 2, y + BS // 2, BS // 2, BS // 2)
+        )
+
+    # draw block borders
+    width = 3  # line width
+    pygame.draw.line(screen, shades.light, (x, y), (x + BS, y), width=width)
+    pygame.draw.line(screen, shades.light, (x, y), (x, y + BS), width=width)
+    pygame.draw.line(screen, shades.dark, (x + BS, y), (x + BS, y + BS), width=width)
+    pygame.draw.line(screen, shades.dark, (x, y + BS), (x + BS, y + BS), width=width)
+
+
+class TileAtlas:
+    """One tile per color shade, highlight and size, created on first use
+
+    Tiles of another size than BS x BS are scaled from the BS x BS tile.
+
+    """
+
+    def __init__(self) -> None:
+        self.tiles: dict[tuple[int, bool, int], pygame.surface.Surface] = {}
+
+    def get_tile(
+        self, shades: ColorShade, highlight: bool = False, size: int = BS
+    ) -> pygame.surface.Surface:
+        # shades are shared per block type, so they are identified by their id
+        key = id(shades), highlight, size
+        tile = self.tiles.get(key)
+        if tile is None:
+            if size == BS:
+                tile = pygame.Surface((BS, BS))
+                draw_square(tile, shades, 0, 0, highlight)
+            else:
+                tile = pygame.transform.scale(
+                    self.get_tile(shades, highlight), (size, size)
+                )
+            if pygame.display.get_surface() is not None:
+                # same pixel format as the screen, which makes blitting faster
+                tile = tile.convert()
+            self.tiles[key] = tile
+        return tile
+
+
+TILES = TileAtlas()
+
+
+def blit_squares(
+    screen: pygame.surface.Surface,
+    squares: Iterable[tuple[ColorShade, bool, int, int]],
+    size: int = BS,
+) -> None:
+    """Draw squares given as (shades, highlight, x, y), x and y are in pixels"""
+    get_tile = TILES.get_tile
+    screen.blits(
+        [
+            (get_tile(shades, highlight, size), (x, y))
+            for shades, highlight, x, y in squares
+        ],
+        doreturn=False,
+    )
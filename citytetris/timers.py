@@ -0,0 +1,69 @@
+"""Deadline based timers that the game loop polls
+
+Waiting with pygame.time.wait freezes input and rendering. Instead, a delayed action
+is scheduled with a deadline and the loop keeps running until poll finds the
+deadline passed and runs the action. The clock is wall time by default, the game
+passes its own game time so that the timers follow the logic steps.
+
+"""
+
+import heapq
+import itertools
+import time
+from dataclasses import dataclass, field
+from typing import Callable
+
+
+def get_milliseconds() -> int:
+    return int(1000 * time.monotonic())
+
+
+@dataclass(order=True)
+class Timer:
+    deadline: int
+    # timers with the same deadline run in the order they were scheduled
+    number: int
+    name: str = field(compare=False)
+    callback: Callable[[], None] = field(compare=False)
+    cancelled: bool = field(default=False, compare=False)
+
+
+class Scheduler:
+    """Run callbacks once their deadline, in milliseconds of clock, has passed"""
+
+    def __init__(self, clock: Callable[[], int] = get_milliseconds) -> None:
+        self.clock = clock
+        self._timers: list[Timer] = []
+        self._numbers = itertools.count()
+
+    def __len__(self) -> int:
+        return sum(not timer.cancelled for timer in self._timers)
+
+    def schedule(
+        self, delay: int, callback: Callable[[], None], name: str = ""
+    ) -> Timer:
+        """Run callback delay milliseconds from now, on the first poll after that"""
+        timer = Timer(self.clock() + delay, next(self._numbers), name, callback)
+        heapq.heappush(self._timers, timer)
+        return timer
+
+    def is_pending(self, name: str) -> bool:
+        return any(
+            (timer.name == name) and not timer.cancelled for timer in self._timers
+        )
+
+    def cancel(self, name: str) -> None:
+        for timer in self._timers:
+            if timer.name == name:
+                timer.cancelled = True
+
+    def poll(self) -> int:
+        """Run the callbacks of all timers that are due, returns their number"""
+        now = self.clock()
+        num_run = 0
+        while self._timers and (self._timers[0].deadline <= now):
+            timer = heapq.heappop(self._timers)
+            if not timer.cancelled:
+                timer.callback()
+                num_run += 1
+        return num_run
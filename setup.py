@@ -14,6 +14,7 @@ python_requires = '>=3.8'
 
 tests_require = [
     'black',
+    'networkx',
     'pytest',
     'pytest-cov',
 ]
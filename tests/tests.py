@@ -1,10 +1,68 @@
+import copy
+import itertools
 import os
+import random
+import subprocess
+import sys
 from functools import wraps
 
+import numpy as np
+import pygame
 import pytest
 
-from citytetris.network import blocks_touch
-from citytetris.replay import create_board_from_script, load_tetris
+from citytetris.background import BackgroundScorer
+from citytetris.blocks import BLOCKS_ALL, IBlock, OBlock, TBlock
+from citytetris.board import Board
+from citytetris.camera import Camera
+from citytetris.chunks import ChunkedBoard, ChunkedGrid
+from citytetris.constants import (
+    BS,
+    CLOCK_BLOCK_MOVE,
+    CLOCKTICK,
+    FONT,
+    SCORES,
+    SCREEN_HEIGHT,
+    SCREEN_WIDTH,
+    TIME_BEFORE_GAME_OVER,
+    TIME_BEFORE_NEW_SPAWN,
+    TIME_BETWEEN_BLOCKS,
+)
+from citytetris.display import OVERLAY_COLOR, DisplayUpdater
+from citytetris.graph import Graph, label_components
+from citytetris.incremental import ScoreTracker
+from citytetris.labels import (
+    calculate_score_and_highlights as calculate_score_and_highlights_labels,
+)
+from citytetris.pacing import FixedTimestep
+from citytetris.palette import HIGHLIGHT_OFFSET, PaletteRenderer, get_color_indices
+from citytetris.network import (
+    blocks_touch,
+    get_edges,
+    get_graph,
+    get_longest_I_block_distance,
+    make_piece_ids,
+)
+from citytetris.replay import create_board_from_script, load_replay, load_tetris
+from citytetris.rules import RULES, Rule, register_rule
+from citytetris.score import Score
+from citytetris.store import BlockStore, StoreBoard
+from citytetris.striped import calculate_score as calculate_score_striped
+from citytetris.striped import (
+    calculate_score_and_highlights as calculate_score_and_highlights_striped,
+)
+from citytetris.screens import GameOverScreen, PauseScreen, StartScreen
+from citytetris.tetris import Tetris
+from citytetris.text import TEXTS, TextCache
+from citytetris.tiles import TILES, draw_square
+from citytetris.timers import Scheduler
+
+try:
+    import networkx as nx
+except ImportError:
+    nx = None
+
+# networkx is only used as a reference implementation, it is not a dependency
+requires_networkx = pytest.mark.skipif(nx is None, reason="networkx not installed")
 
 
 def verify_board(func):
@@ -21,6 +79,53 @@ def verify_board(func):
     return wrapper
 
 
+def make_random_board(seed, num_blocks=80, width=10, height=20):
+    """Drop random blocks, each at the lowest of a few random positions"""
+    rng = random.Random(seed)
+    board = Board(width=width, height=height, centered=False)
+    for _ in range(num_blocks):
+        candidates = []
+        for _ in range(4):
+            block = rng.choice(BLOCKS_ALL)()
+            block.rotation = rng.randrange(4)
+            block.move_right(rng.randrange(width - max(x for x, _ in block.squares)))
+            if not any(board.is_occupied(*index) for index in block.yield_indices()):
+                candidates.append((board.drop_distance(block), block))
+        if not candidates:
+            break
+        distance, block = max(candidates, key=lambda candidate: candidate[0])
+        block.move_down(distance)
+        board.add_block(block)
+    return board
+
+
+class TestBlock:
+    @pytest.mark.parametrize('block_cls', BLOCKS_ALL)
+    def test_kind_is_shared(self, block_cls):
+        block0, block1 = block_cls(), block_cls()
+        assert block0.kind is block1.kind
+        assert block0.shades is block1.shades
+        assert not hasattr(block0, '__dict__')
+
+    @pytest.mark.parametrize('block_cls', BLOCKS_ALL)
+    def test_indices_follow_moves(self, block_cls):
+        block = block_cls()
+        for move in [block.move_right, block.move_down, block.rotate, block.move_left]:
+            block.indices  # fill the cache
+            move()
+            offset_x, offset_y = block.x // BS, block.y // BS
+            expected = tuple((x + offset_x, y + offset_y) for x, y in block.squares)
+            assert block.indices == expected
+
+        block.x += 2 * BS
+        block.y -= BS
+        block.rotation = 3
+        offset_x, offset_y = block.x // BS, block.y // BS
+        assert block.indices == tuple(
+            (x + offset_x, y + offset_y) for x, y in block.squares
+        )
+
+
 class TestScoreFullLines:
     @verify_board
     def test_zero_full_lines_0(self):
@@ -300,6 +405,120 @@ class TestBlocksTouching:
 
         return board
 
+    @pytest.mark.parametrize(
+        'instructions',
+        [
+            [],
+            ['Ollll', 'JRl', 'IRllll', 'Illl', 'IRr'],
+            ['TRRllll', 'TRRl', 'Zrrl', 'Zrrr', 'TRlRlRllR', 'TRl', 'Zrrrlr', 'TrR'],
+        ],
+    )
+    def test_edges_same_as_blocks_touch(self, instructions):
+        board = create_board_from_script(instructions, centered=True)
+        edges_expected = {
+            (i, j)
+            for (i, block0), (j, block1) in itertools.combinations(
+                enumerate(board.block_list), 2
+            )
+            if blocks_touch(block0, block1)
+        }
+        edges_board = set(map(tuple, get_edges(board.piece_ids).tolist()))
+        edges_blocks = set(
+            map(tuple, get_edges(make_piece_ids(board.block_list)).tolist())
+        )
+        assert edges_board == edges_expected
+        assert edges_blocks == edges_expected
+
+    def test_touch_table_same_as_coordinates(self):
+        def touch_by_coordinates(block0, block1):
+            return any(
+                abs(x0 - x1) + abs(y0 - y1) == 1
+                for (x0, y0), (x1, y1) in itertools.product(
+                    block0.yield_indices(), block1.yield_indices()
+                )
+            )
+
+        for block_cls0, block_cls1 in itertools.product(BLOCKS_ALL, BLOCKS_ALL):
+            for rotation0, rotation1 in itertools.product(range(4), range(4)):
+                block0 = block_cls0()
+                block0.rotation = rotation0
+                block0.move_right(6)
+                block0.move_down(6)
+                for x, y in itertools.product(range(1, 12), range(1, 12)):
+                    block1 = block_cls1()
+                    block1.rotation = rotation1
+                    block1.move_right(x)
+                    block1.move_down(y)
+                    expected = touch_by_coordinates(block0, block1)
+                    assert blocks_touch(block0, block1) == expected
+
+
+class TestCollisions:
+    @pytest.fixture
+    def board(self):
+        instructions = ['Ollll', 'JRl', 'IRllll', 'Illl', 'IRr', 'IRrrr', 'IRrrrr']
+        return create_board_from_script(instructions, centered=True)
+
+    def test_occupancy_grid(self, board):
+        assert board.occupancy.astype(bool).sum() == 4 * len(board.block_list)
+        for piece_id, block in enumerate(board.block_list):
+            for x, y in block.yield_indices():
+                assert board.occupancy[y, x] == block.code
+                assert board.piece_ids[y, x] == piece_id
+
+    def test_collisions_same_as_rects(self, board):
+        rect_list = board.rect_list
+        for block_cls in BLOCKS_ALL:
+            for rotation in range(4):
+                for x in range(board.width - 1):
+                    for y in range(board.height - 1):
+                        block = block_cls()
+                        block.rotation = rotation
+                        block.move_right(x)
+                        block.move_down(y)
+                        assert board.collides_left(block) == block.collides_left(
+                            rect_list
+                        )
+                        assert board.collides_right(block) == block.collides_right(
+                            rect_list
+                        )
+                        assert board.collides_bottom(block) == block.collides_bottom(
+                            rect_list
+                        )
+
+    def test_drop_distance_same_as_step_by_step(self, board):
+        def drop_step_by_step(block):
+            distance = 0
+            while not (
+                block.get_bottommost_y() >= board.height * BS
+                or board.collides_bottom(block)
+            ):
+                block.move_down()
+                distance += 1
+            return distance
+
+        for block_cls in BLOCKS_ALL:
+            for rotation in range(4):
+                for x in range(board.width - 1):
+                    for y in range(board.height - 1):
+                        block = block_cls()
+                        block.rotation = rotation
+                        block.move_right(x)
+                        block.move_down(y)
+                        if any(
+                            board.is_occupied(*idx) for idx in block.yield_indices()
+                        ):
+                            continue
+                        # also covers blocks that slid below an overhang
+                        distance = board.drop_distance(block)
+                        assert distance == drop_step_by_step(block)
+
+    def test_column_tops(self, board):
+        for x in range(board.width):
+            (rows,) = board.occupancy[:, x].nonzero()
+            expected = rows[0] if len(rows) else board.height
+            assert board.column_tops[x] == expected
+
 
 class TestLongestRoad:
     def test_no_blocks(self):
@@ -455,6 +674,37 @@ class TestLongestRoad:
         assert score.longest_road == 7
         return board
 
+    def test_single_long_road(self):
+        board = Board(width=200, height=1, centered=False)
+        for i in range(50):
+            block = IBlock()
+            block.move_right(4 * i)
+            board.add_block(block)
+        distance, blocks = get_longest_I_block_distance(board.block_list)
+        assert distance == 199
+        assert blocks == set(board.block_list)
+
+    @pytest.mark.parametrize('seed', range(10))
+    def test_highlights_longest_component(self, seed):
+        board = make_random_board(seed, num_blocks=120)
+        distance, blocks = get_longest_I_block_distance(
+            board.block_list, board.piece_ids
+        )
+        assert distance == board.score().longest_road
+
+        # compare with the bounding box of every component
+        graph, nodes = get_graph(board.block_list, (IBlock,), board.piece_ids)
+        distances = {}
+        for component in graph.connected_components():
+            component = frozenset(nodes[node] for node in component.tolist())
+            if len(component) > 1:
+                xs, ys = zip(*(idx for block in component for idx in block.indices))
+                distances[component] = max(xs) - min(xs) + max(ys) - min(ys)
+        if not distances:
+            assert blocks == set()
+        else:
+            assert distances[frozenset(blocks)] == max(distances.values())
+
 
 class TestLJCommunities:
     @verify_board
@@ -822,6 +1072,1096 @@ class TestTCommunity:
         return board
 
 
+class TestScoreTracker:
+    @pytest.mark.parametrize('seed', range(20))
+    def test_same_score_as_recalculation(self, seed):
+        board = make_random_board(seed)
+        assert board.tracker.score() == board.recalculate_score()
+
+    def test_same_score_after_every_block(self):
+        board = make_random_board(0)
+        block_list = board.block_list
+        board = Board(width=board.width, height=board.height, centered=False)
+        for block in block_list:
+            board.add_block(block)
+            assert board.tracker.score() == board.recalculate_score()
+
+    def test_prefilled_block_list(self):
+        block_list = make_random_board(0).block_list
+        board = Board(block_list=block_list[:], centered=False)
+        assert board.tracker.score() == board.recalculate_score()
+
+    def test_arrays_grow(self):
+        board = make_random_board(0)
+        tracker = ScoreTracker(board.width, board.height, capacity=1)
+        for block in board.block_list:
+            # the blocks added so far
+            neighbor_ids = board._get_neighbor_ids(block)
+            tracker.add_block(block, [i for i in neighbor_ids if i < len(tracker)])
+        assert len(tracker) == len(board.block_list)
+        assert tracker.score() == board.tracker.score()
+        assert np.array_equal(tracker.sizes, board.tracker.sizes)
+        # bytes per block
+        assert sum(array.itemsize for array in tracker._arrays.values()) == 27
+
+    @pytest.mark.parametrize('filename', ['replay-01.json', 'replay-02.json'])
+    def test_replays(self, filename):
+        tetris = load_tetris(os.path.join('tests', filename))
+        assert tetris.board.tracker.score() == tetris.board.recalculate_score()
+        assert (
+            tetris.board.tracker.score()
+            == load_replay(os.path.join('tests', filename)).score
+        )
+
+
+class TestGraph:
+    @pytest.fixture
+    def graph(self):
+        # components: {0, 2, 5}, {1, 3, 4}, {6}
+        edges = np.array([[3, 4], [0, 5], [1, 4], [5, 2], [2, 0]])
+        return Graph(7, edges)
+
+    def test_neighbors(self, graph):
+        assert graph.neighbors(0).tolist() == [2, 5]
+        assert graph.neighbors(4).tolist() == [1, 3]
+        assert graph.neighbors(6).tolist() == []
+
+    def test_connected_components(self, graph):
+        components = [c.tolist() for c in graph.connected_components()]
+        assert components == [[0, 2, 5], [1, 3, 4], [6]]
+
+    def test_node_connected_component(self, graph):
+        assert graph.node_connected_component(5).tolist() == [0, 2, 5]
+        assert graph.node_connected_component(6).tolist() == [6]
+
+    def test_empty_graph(self):
+        graph = Graph(0, np.zeros((0, 2)))
+        assert len(graph) == 0
+        assert graph.connected_components() == []
+
+    @requires_networkx
+    @pytest.mark.parametrize('seed', range(10))
+    def test_same_components_as_networkx(self, seed):
+        rng = np.random.default_rng(seed)
+        edges = rng.integers(0, 100, size=(80, 2))
+        graph = Graph(100, edges)
+        graph_nx = nx.Graph()
+        graph_nx.add_nodes_from(range(100))
+        graph_nx.add_edges_from(edges.tolist())
+
+        components = {frozenset(c.tolist()) for c in graph.connected_components()}
+        expected = {frozenset(c) for c in nx.connected_components(graph_nx)}
+        assert components == expected
+        for node in range(0, 100, 7):
+            component = graph.node_connected_component(node).tolist()
+            assert set(component) == nx.node_connected_component(graph_nx, node)
+
+    def test_networkx_not_imported(self):
+        code = "import sys, citytetris.tetris; assert 'networkx' not in sys.modules"
+        subprocess.run([sys.executable, "-c", code], check=True)
+
+
+class TestLabelsScore:
+    def test_label_components(self):
+        edges = np.array([[3, 4], [0, 5], [1, 4], [2, 2]])
+        labels = label_components(7, edges)
+        assert labels.tolist() == [0, 1, 2, 1, 1, 0, 6]
+
+    def test_label_components_long_chain(self):
+        nodes = np.arange(100)[::-1]
+        edges = np.sort(np.stack([nodes[:-1], nodes[1:]], axis=1), axis=1)
+        labels = label_components(101, edges)
+        assert labels.tolist() == [0] * 100 + [100]
+
+    @pytest.mark.parametrize('seed', range(20))
+    def test_same_score_as_other_methods(self, seed):
+        board = make_random_board(seed)
+        score = board.calculate_score(method="labels")
+        assert score == board.calculate_score(method="incremental")
+        assert score == board.calculate_score(method="network")
+
+    @pytest.mark.parametrize('filename', ['replay-01.json', 'replay-02.json'])
+    def test_replays(self, filename):
+        tetris = load_tetris(os.path.join('tests', filename))
+        score = tetris.board.calculate_score(method="labels")
+        assert score == load_replay(os.path.join('tests', filename)).score
+
+    def test_empty_board(self):
+        board = Board(centered=False)
+        score = board.calculate_score(method="labels")
+        assert score == board.calculate_score(method="network")
+
+    @pytest.mark.parametrize('seed', range(10))
+    def test_same_highlights_as_rules(self, seed):
+        board = make_random_board(seed, num_blocks=150, width=15, height=30)
+        highlighted = board.get_blocks_to_highlight()
+        expected = [block in highlighted for block in board.block_list]
+        board = Board(15, 30, block_list=board.block_list, centered=False)
+        board.calculate_score(method="labels")
+        assert [block.highlight for block in board.block_list] == expected
+        # the highlights did not go through the rules
+        assert not any(board.rule_evaluations.values())
+        assert board.highlights_up_to_date
+
+    def test_unknown_method_raises(self):
+        board = Board(centered=False)
+        with pytest.raises(ValueError, match="unknown score method"):
+            board.calculate_score(method="foo")
+
+
+class TestStripedScore:
+    @pytest.mark.parametrize('seed', range(10))
+    @pytest.mark.parametrize('num_stripes', [1, 2, 3, 7, 20])
+    def test_same_score_as_serial(self, seed, num_stripes):
+        board = make_random_board(seed, num_blocks=100)
+        score = calculate_score_striped(
+            board.occupancy, board.piece_ids, len(board.block_list), 1, num_stripes
+        )
+        assert score == board.score()
+
+    @pytest.mark.parametrize('filename', ['replay-01.json', 'replay-02.json'])
+    def test_replays(self, filename):
+        tetris = load_tetris(os.path.join('tests', filename))
+        score = tetris.board.calculate_score(method="striped")
+        assert score == load_replay(os.path.join('tests', filename)).score
+
+    @pytest.mark.parametrize('seed', range(5))
+    @pytest.mark.parametrize('num_stripes', [2, 3, 7])
+    def test_same_highlights_as_serial(self, seed, num_stripes):
+        board = make_random_board(seed, num_blocks=150, width=15, height=30)
+        grids = board.occupancy, board.piece_ids, len(board.block_list)
+        _, highlights = calculate_score_and_highlights_labels(*grids)
+        _, highlights_striped = calculate_score_and_highlights_striped(
+            *grids, 1, num_stripes
+        )
+        assert np.array_equal(highlights_striped, highlights)
+
+    def test_worker_processes(self):
+        board = make_random_board(0, num_blocks=200, width=20, height=40)
+        score = board.calculate_score(method="striped", num_workers=2)
+        assert score == board.score()
+
+    def test_empty_board(self):
+        board = Board(centered=False)
+        assert board.calculate_score(method="striped") == board.score()
+
+
+class TestRules:
+    @pytest.mark.parametrize('seed', range(10))
+    def test_same_score_as_incremental(self, seed):
+        board = make_random_board(seed)
+        assert board.calculate_score(method="rules") == board.score()
+
+    def test_same_score_after_every_block(self):
+        block_list = make_random_board(0).block_list
+        board = Board(centered=False)
+        for block in block_list:
+            board.add_block(block)
+            assert board.calculate_score(method="rules") == board.score()
+
+    def test_only_invalidated_rules_are_run(self):
+        board = make_random_board(0)
+        board.evaluate_rules()
+        evaluations = board.rule_evaluations.copy()
+
+        board.add_block(OBlock())
+        board.evaluate_rules()
+        # full rows are updated incrementally, nothing else is affected by an O block
+        assert board.rule_evaluations == {
+            **evaluations,
+            'full_rows': evaluations['full_rows'] + 1,
+        }
+
+        board.add_block(TBlock())
+        board.evaluate_rules()
+        assert board.rule_evaluations == {
+            **evaluations,
+            'full_rows': evaluations['full_rows'] + 2,
+            't_community': evaluations['t_community'] + 1,
+        }
+        assert all(seconds > 0 for seconds in board.rule_timings.values())
+
+    def test_custom_rule(self):
+        rule = Rule(
+            name="o_blocks",
+            calculate=lambda board: (
+                sum(isinstance(block, OBlock) for block in board.block_list),
+                set(),
+            ),
+            invalidated_by=(OBlock,),
+            weight=2,
+        )
+        board = make_random_board(0)
+        board = Board(block_list=board.block_list, rules=[*RULES, rule])
+        num_o_blocks = sum(isinstance(block, OBlock) for block in board.block_list)
+        assert board.evaluate_rules()['o_blocks'] == (num_o_blocks, set())
+
+        # the rule adds its points to the total score
+        score = board.score()
+        assert score['o_blocks'] == num_o_blocks
+        assert score.get_total_score(board.rules) == (
+            score.get_total_score() + 2 * num_o_blocks
+        )
+        for method in ['network', 'labels', 'rules', 'striped']:
+            assert board.calculate_score(method=method) == score
+
+    def test_weights(self):
+        assert [rule.points for rule in RULES] == [
+            SCORES.full_rows,
+            SCORES.longest_road,
+            SCORES.l_j_communities,
+            SCORES.t_community,
+        ]
+        assert RULES[2].title == "L-J communities"
+        rule = Rule(name="o_blocks", calculate=lambda board: (0, set()))
+        assert (rule.points, rule.title) == (0, "O blocks")
+
+        score = Score(full_rows=1, longest_road=2, l_j_communities=0, t_community=3)
+        assert score.get_total_score() == 3 * 1 + 1 * 2 + 6 * 3
+        values = {
+            'full_rows': 1,
+            'longest_road': 2,
+            'l_j_communities': 0,
+            't_community': 3,
+            'o_blocks': 4,
+        }
+        assert Score.from_values(values) == Score(
+            full_rows=1,
+            longest_road=2,
+            l_j_communities=0,
+            t_community=3,
+            extra={'o_blocks': 4},
+        )
+
+    def test_some_rules(self):
+        rules = [rule for rule in RULES if rule.name != "t_community"]
+        blocks = make_random_board(0).block_list
+        board = Board(block_list=blocks, centered=False, rules=rules)
+        score = board.score()
+        score_rules = board.calculate_score(method="rules")
+        assert score_rules.t_community == 0
+        for rule in board.rules:
+            assert score_rules[rule.name] == score[rule.name]
+        assert score_rules.get_total_score(board.rules) == score.get_total_score(
+            board.rules
+        )
+
+    def test_register_rule_twice_raises(self):
+        with pytest.raises(ValueError, match="already registered"):
+            register_rule(RULES[0])
+
+
+class TestHighlights:
+    def test_score_does_not_highlight(self):
+        board = make_random_board(0)
+        assert board.score() == board.recalculate_score()
+        assert not any(block.highlight for block in board.block_list)
+        assert board.highlight_cache_misses == 0
+
+    def test_highlight_cache_hits_and_misses(self):
+        board = make_random_board(0)
+        block = board.block_list.pop()
+        board = Board(block_list=board.block_list, centered=False)
+        version = board.version
+
+        blocks = board.get_blocks_to_highlight()
+        assert board.get_blocks_to_highlight() is blocks
+        board.update_highlights()
+        board.update_highlights()
+        assert (board.highlight_cache_hits, board.highlight_cache_misses) == (3, 1)
+
+        board.add_block(block)
+        assert board.version == version + 1
+        board.update_highlights()
+        assert (board.highlight_cache_hits, board.highlight_cache_misses) == (3, 2)
+
+    def test_update_highlights(self):
+        board = make_random_board(0)
+        board.update_highlights()
+        highlighted = {block for block in board.block_list if block.highlight}
+        assert highlighted
+        assert highlighted == board.get_blocks_to_highlight()
+
+        # calculate_score still highlights the blocks
+        for block in board.block_list:
+            block.highlight = False
+        board.version += 1
+        assert board.calculate_score() == board.score()
+        assert {block for block in board.block_list if block.highlight} == highlighted
+
+
+class TestBackgroundScorer:
+    @pytest.fixture(params=[Board, StoreBoard])
+    def board(self, request):
+        block_list = make_random_board(0).block_list
+        return request.param(block_list=block_list, centered=False)
+
+    @pytest.fixture
+    def scorer(self, board):
+        scorer = BackgroundScorer(board)
+        yield scorer
+        scorer.close()
+
+    def get_highlights(self, board):
+        return [block.highlight for block in board.block_list]
+
+    def get_expected(self, board):
+        block_list = [copy.copy(block) for block in board.block_list]
+        expected = Board(block_list=block_list, centered=False)
+        expected.update_highlights()
+        return expected
+
+    def test_same_highlights_as_sync(self, board, scorer):
+        expected = self.get_expected(board)
+        assert not scorer.update()
+        assert scorer.pending
+        assert not any(self.get_highlights(board))
+        scorer.wait()
+        assert not scorer.pending
+        assert board.highlights_up_to_date
+        assert self.get_highlights(board) == self.get_highlights(expected)
+        assert board.score() == expected.score()
+
+    def test_stale_result_is_discarded(self, board, scorer):
+        scorer.update()
+        block = IBlock()
+        block.move_down(board.drop_distance(block))
+        board.add_block(block)
+        scorer.wait()
+        assert scorer.stale_results == 1
+
+        expected = self.get_expected(board)
+        assert self.get_highlights(board) == self.get_highlights(expected)
+
+    def test_snapshot_is_independent(self, board):
+        snapshot = board.snapshot()
+        board.add_block(IBlock())
+        assert snapshot.version == board.version - 1
+        assert len(snapshot.block_list) == len(board.block_list) - 1
+        assert (snapshot.piece_ids != board.piece_ids).any()
+
+    def test_adopt_stale_snapshot_raises(self, board):
+        snapshot = board.snapshot()
+        board.add_block(IBlock())
+        with pytest.raises(ValueError, match="stale"):
+            board.adopt_snapshot(snapshot)
+
+
+class TestTiles:
+    @pytest.mark.parametrize('block_type', BLOCKS_ALL)
+    @pytest.mark.parametrize('highlight', [False, True])
+    def test_tile_same_as_drawn_square(self, block_type, highlight):
+        shades = block_type.kind.shades
+        screen = pygame.Surface((BS, BS))
+        draw_square(screen, shades, 0, 0, highlight)
+        tile = TILES.get_tile(shades, highlight)
+        assert pygame.image.tostring(tile, 'RGB') == pygame.image.tostring(
+            screen, 'RGB'
+        )
+
+    def test_tiles_are_cached(self):
+        shades = IBlock.kind.shades
+        assert TILES.get_tile(shades) is TILES.get_tile(shades)
+        assert TILES.get_tile(shades) is not TILES.get_tile(shades, True)
+
+    def test_block_draws_tiles(self):
+        block = TBlock()
+        block.move_right(2)
+        block.move_down(3)
+        block.highlight = True
+        screen = pygame.Surface((10 * BS, 10 * BS))
+        block.draw(screen)
+
+        tile = TILES.get_tile(block.kind.shades, True)
+        for x, y in block.indices:
+            square = screen.subsurface((x * BS, y * BS, BS, BS))
+            assert pygame.image.tostring(square, 'RGB') == pygame.image.tostring(
+                tile, 'RGB'
+            )
+
+
+class TestLayer:
+    @pytest.fixture
+    def tetris(self):
+        screen = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+        tetris = Tetris(screen=screen, seed=0)
+        for block in make_random_board(0, num_blocks=30).block_list:
+            tetris.board.add_block(block)
+        return tetris
+
+    def test_layer_only_rendered_on_change(self, tetris):
+        tetris.draw()
+        tetris.draw()
+        tetris.board.block_active.move_down()
+        tetris.draw()
+        assert tetris.layer_renders == 1
+
+        tetris.spawn_block()
+        tetris.draw()
+        tetris.draw()
+        assert tetris.layer_renders == 2
+
+    def test_highlight_change_renders_layer(self):
+        screen = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+        tetris = Tetris(screen=screen, seed=0, async_scoring=True)
+        for block in make_random_board(0, num_blocks=30).block_list:
+            tetris.board.add_block(block)
+
+        # the highlights are applied once the background scorer is done
+        tetris.draw()
+        tetris.scorer.wait()
+        tetris.draw()
+        tetris.draw()
+        tetris.close()
+        assert tetris.layer_renders == 2
+
+    def test_same_as_drawing_everything(self, tetris):
+        tetris.draw()
+        tetris.board.block_active.move_down(2)
+        tetris.draw()
+
+        screen = pygame.Surface(tetris.screen.get_size())
+        screen.fill(tetris.gray_shade.dark)
+        tetris.draw_grid(screen)
+        tetris.board.draw_blocks(screen)
+        tetris.screen, screen_game = screen, tetris.screen
+        tetris.draw_ghost()
+        tetris.board.block_active.draw(screen)
+        assert pygame.image.tostring(screen_game, 'RGB') == pygame.image.tostring(
+            screen, 'RGB'
+        )
+
+
+class TestTextCache:
+    def test_same_as_font_render(self):
+        color = pygame.Color(128, 128, 128)
+        text = TextCache().render("Full rows: 3", color)
+        assert pygame.image.tostring(text, 'RGBA') == pygame.image.tostring(
+            FONT.render("Full rows: 3", True, color), 'RGBA'
+        )
+
+    def test_texts_are_cached(self):
+        cache = TextCache()
+        text = cache.render("TOTAL SCORE: 0", (128, 128, 128))
+        assert cache.render("TOTAL SCORE: 0", pygame.Color(128, 128, 128)) is text
+        assert cache.render("TOTAL SCORE: 0", (255, 255, 255)) is not text
+        assert cache.render("TOTAL SCORE: 0", (128, 128, 128), False) is not text
+        assert (cache.hits, cache.misses) == (1, 3)
+
+    def test_least_recently_used_evicted(self):
+        cache = TextCache(maxsize=2)
+        color = (128, 128, 128)
+        text_a = cache.render("a", color)
+        text_b = cache.render("b", color)
+        cache.render("a", color)
+        cache.render("c", color)
+        assert len(cache) == 2
+        assert cache.render("a", color) is text_a
+        assert cache.render("b", color) is not text_b
+
+    def test_screens_render_texts_once(self):
+        PauseScreen()
+        misses = TEXTS.misses
+        PauseScreen()
+        assert TEXTS.misses == misses
+
+
+class TestScreens:
+    def make_screen(self):
+        screen = pygame.Surface((SCREEN_WIDTH // 2, SCREEN_HEIGHT))
+        screen.fill((40, 80, 120))
+        pygame.draw.rect(screen, (200, 30, 30), (50, 50, 200, 300))
+        return screen
+
+    @pytest.mark.parametrize('screen_type', [PauseScreen, GameOverScreen])
+    def test_overlay_same_as_drawing_everything(self, screen_type):
+        menu = screen_type()
+        screen = self.make_screen()
+        menu.draw(screen)
+
+        expected = self.make_screen()
+        overlay = pygame.Surface(expected.get_size(), pygame.SRCALPHA)
+        overlay.fill(pygame.Color(0, 0, 0, 150))
+        expected.blit(overlay, (0, 0))
+        if screen_type is PauseScreen:
+            menu.draw_pause(expected)
+            menu.draw_resume(expected)
+            menu.draw_home(expected)
+            menu.draw_quit(expected)
+        else:
+            menu.draw_game(expected)
+            menu.draw_press_any_button(expected)
+        assert pygame.image.tostring(screen, 'RGB') == pygame.image.tostring(
+            expected, 'RGB'
+        )
+
+    def test_start_screen_same_as_drawing_everything(self):
+        menu = StartScreen()
+        screen = self.make_screen()
+        menu.draw(screen)
+
+        expected = self.make_screen()
+        expected.fill(menu.color.dark)
+        menu.draw_title(expected)
+        menu.draw_start(expected)
+        menu.draw_seed_text(expected)
+        menu.draw_seed_input(expected)
+        menu.draw_highscore(expected)
+        menu.draw_quit(expected)
+        assert pygame.image.tostring(screen, 'RGB') == pygame.image.tostring(
+            expected, 'RGB'
+        )
+
+    def test_composed_once(self):
+        menu = PauseScreen()
+        menu.draw(self.make_screen())
+        foreground = menu.foreground
+        menu.draw(self.make_screen())
+        assert menu.foreground is foreground
+
+        menu.draw(pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT)))
+        assert menu.foreground is not foreground
+
+
+class TestDisplay:
+    @pytest.fixture
+    def window(self, monkeypatch):
+        monkeypatch.setenv('SDL_VIDEODRIVER', 'dummy')
+        yield pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+        pygame.display.quit()
+
+    def test_rects_clipped_and_counted(self, window):
+        display = DisplayUpdater()
+        display.add(pygame.Rect(-10, 0, 20, 10))
+        display.add(pygame.Rect(SCREEN_WIDTH, 0, 10, 10))
+        display.add_surface(window.subsurface((BS, BS, BS, BS)))
+        assert display.update() == [
+            pygame.Rect(0, 0, 10, 10),
+            pygame.Rect(BS, BS, BS, BS),
+        ]
+        assert display.pixels_pushed == 100 + BS * BS
+        assert display.update() == []
+        assert display.pixels_pushed == 100 + BS * BS
+
+    def test_debug_overlay(self, window):
+        window.fill((0, 0, 0))
+        display = DisplayUpdater(debug_overlay=True)
+        display.add(pygame.Rect(BS, BS, BS, BS))
+        display.update()
+        assert window.get_at((BS, BS)) == OVERLAY_COLOR
+        assert window.get_at((2 * BS - 1, 2 * BS - 1)) == OVERLAY_COLOR
+        assert window.get_at((BS + 1, BS + 1)) == (0, 0, 0)
+
+    def test_tetris_dirty_rects(self):
+        screen = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+        tetris = Tetris(screen=screen, seed=0)
+        board_rect = pygame.Rect(
+            tetris.screen.get_abs_offset(), tetris.screen.get_size()
+        )
+
+        # the first frame pushes the whole board and the preview
+        tetris.draw()
+        assert tetris.dirty_rects[0] == board_rect
+        assert len(tetris.dirty_rects) == 2
+        tetris.draw()
+        assert tetris.dirty_rects == []
+
+        # moving the active block only pushes its old and new area
+        rect_before = tetris.get_active_rect()
+        tetris.board.block_active.move_down()
+        tetris.draw()
+        assert tetris.dirty_rects == [rect_before, tetris.get_active_rect()]
+        assert board_rect.contains(tetris.dirty_rects[1])
+
+        # settling the block changes the layer and the preview
+        tetris.spawn_block()
+        tetris.draw()
+        assert tetris.dirty_rects[0] == board_rect
+        assert len(tetris.dirty_rects) == 2
+
+
+class TestPalette:
+    @pytest.fixture
+    def board(self):
+        board = make_random_board(0, num_blocks=30)
+        board.update_highlights()
+        return board
+
+    def test_color_indices(self, board):
+        indices = get_color_indices(board)
+        assert np.array_equal(indices == 0, board.occupancy == 0)
+        for block in board.block_list:
+            code = block.code + HIGHLIGHT_OFFSET * block.highlight
+            for x, y in block.indices:
+                if board._in_bounds(x, y):
+                    assert indices[y, x] == code
+
+    def test_store_board_same_indices(self, board):
+        board_store = StoreBoard(
+            width=board.width,
+            height=board.height,
+            block_list=board.block_list,
+            centered=False,
+        )
+        board_store.update_highlights()
+        assert np.array_equal(get_color_indices(board_store), get_color_indices(board))
+
+    def test_cells_scaled_to_screen(self, board):
+        background = pygame.Color(25, 25, 25)
+        screen = pygame.Surface((board.width * BS, board.height * BS))
+        PaletteRenderer(background).draw_blocks(board, screen)
+        for y, x in itertools.product(range(board.height), range(board.width)):
+            piece_id = board.piece_ids[y, x]
+            if piece_id < 0:
+                expected = background
+            else:
+                block = board.block_list[piece_id]
+                shades = block.kind.shades
+                expected = shades.light if block.highlight else shades.fill
+            assert screen.get_at((x * BS, y * BS)) == expected
+            assert screen.get_at((x * BS + BS - 1, y * BS + BS - 1)) == expected
+
+    def test_tetris_draws_with_palette(self):
+        screen = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+        tetris = Tetris(screen=screen, seed=0, draw_method="palette")
+        block = OBlock()
+        block.move_down(tetris.board.height - 2)
+        tetris.board.add_block(block)
+        tetris.draw()
+        x, y = block.indices[0]
+        assert tetris.screen.get_at((x * BS + 1, y * BS + 1)) == block.kind.shades.fill
+        assert tetris.screen.get_at((BS * 9, 0)) == tetris.gray_shade.dark
+
+
+class TestCamera:
+    def test_visible_cells(self):
+        camera = Camera(100, 50, x=45, y=0, tile_size=10)
+        assert camera.get_visible_cells(20, 20) == (4, 0, 15, 5)
+        assert camera.get_visible_cells(12, 3) == (4, 0, 12, 3)
+
+    def test_to_screen(self):
+        camera = Camera(100, 50, x=45, y=5, tile_size=10)
+        assert camera.to_screen(4 * BS, 1 * BS) == (-5, 5)
+        assert camera.rect_to_screen(pygame.Rect(0, 0, BS, 2 * BS)) == pygame.Rect(
+            -45, -5, 10, 20
+        )
+
+    def test_zoom_keeps_anchor(self):
+        camera = Camera(100, 100, x=200, y=100)
+        camera.zoom(2 * BS, anchor=(10, 20))
+        assert camera.state == (410, 220, 2 * BS)
+        camera.zoom(1000)
+        assert camera.tile_size == camera.max_tile_size
+
+    def test_clamp(self):
+        camera = Camera(100, 100, x=-50, y=500, tile_size=10)
+        camera.clamp(50, 5)
+        # the board is wider than the view and lower than it, so it is centered
+        assert (camera.x, camera.y) == (0, -25)
+
+    def test_follow(self):
+        camera = Camera(100, 100, tile_size=10)
+        camera.follow(pygame.Rect(0, 20 * BS, BS, BS), margin=1)
+        assert camera.y == 120
+        camera.follow(pygame.Rect(0, 0, BS, BS), margin=0)
+        assert camera.y == 0
+
+    @pytest.mark.parametrize('seed', range(3))
+    def test_blocks_in_area(self, seed):
+        board = make_random_board(seed, width=30, height=30, num_blocks=150)
+        area = 5, 10, 17, 21
+        expected = [
+            block
+            for block in board.block_list
+            if any((5 <= x < 17) and (10 <= y < 21) for x, y in block.yield_indices())
+        ]
+        assert board.get_blocks_in_area(*area) == expected
+
+    @pytest.mark.parametrize('draw_method', ['tiles', 'palette'])
+    def test_same_as_without_camera(self, draw_method):
+        # the board fits into the view, so the camera centers it like without one
+        images = []
+        for use_camera in [False, True]:
+            screen = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+            tetris = Tetris(
+                screen=screen, seed=0, draw_method=draw_method, use_camera=use_camera
+            )
+            for block in make_random_board(0, num_blocks=30).block_list:
+                tetris.board.add_block(copy.copy(block))
+            tetris.board.block_active.move_down(3)
+            tetris.draw()
+            if not use_camera:
+                area = pygame.Rect(
+                    tetris.screen.get_abs_offset(), tetris.screen.get_size()
+                )
+            images.append(pygame.image.tostring(screen.subsurface(area), 'RGB'))
+        assert images[0] == images[1]
+
+    def test_only_visible_blocks_drawn(self):
+        screen = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+        tetris = Tetris(screen=screen, seed=0, use_camera=True)
+        tetris.board = make_random_board(0, width=60, height=100, num_blocks=1000)
+        tetris.board.spawn_block(tetris.get_random_block())
+        tetris.draw()
+        camera = tetris.camera
+        # the view followed the active block to the top of the board
+        assert camera.y == 0
+
+        area = camera.get_visible_cells(tetris.board.width, tetris.board.height)
+        assert area[3] < tetris.board.height
+        for block in tetris.board.get_blocks_in_area(*area):
+            x, y = next(
+                (x, y)
+                for x, y in block.yield_indices()
+                if (area[0] <= x < area[2]) and (area[1] <= y < area[3])
+            )
+            x_screen, y_screen = camera.to_screen(x * BS, y * BS)
+            if (0 <= x_screen) and (0 <= y_screen):
+                tile = TILES.get_tile(block.kind.shades, block.highlight)
+                assert tetris.screen.get_at((x_screen + 5, y_screen + 5)) == (
+                    tile.get_at((5, 5))
+                )
+
+
+class TestChunkedBoard:
+    @pytest.fixture(params=range(3))
+    def boards(self, request):
+        board = make_random_board(request.param, width=20, height=70, num_blocks=250)
+        board_chunked = ChunkedBoard(
+            width=board.width,
+            height=board.height,
+            block_list=board.block_list,
+            centered=False,
+            chunk_size=8,
+            compact_distance=0,
+        )
+        return board, board_chunked
+
+    @pytest.mark.parametrize('spill', [False, True])
+    def test_grid_same_as_array(self, spill, tmp_path):
+        rng = np.random.default_rng(0)
+        cells = np.full((50, 30), -1, dtype=np.int32)
+        grid = ChunkedGrid(
+            50, 30, np.int32, -1, chunk_size=8, spill_dir=tmp_path if spill else None
+        )
+        for y, x in rng.integers(0, (50, 30), size=(200, 2)).tolist():
+            cells[y, x] = grid[y, x] = rng.integers(100)
+        nbytes = grid.nbytes
+        assert grid.compact(16) == 5 * 4
+        assert (len(grid.spilled) > 0) == spill
+        assert grid.nbytes < nbytes
+
+        assert np.array_equal(np.asarray(grid), cells)
+        for index in [
+            (3, 4),
+            (-1, -2),
+            (slice(5, 30), 7),
+            (9, slice(None)),
+            (slice(10, 45), slice(3, 29)),
+        ]:
+            assert np.array_equal(grid[index], cells[index])
+        # writing a compacted chunk loads it again
+        grid[40, 20] = cells[40, 20] = 1000
+        assert np.array_equal(np.asarray(grid.copy()), cells)
+
+        for x, row in itertools.product(range(30), range(0, 50, 7)):
+            (rows,) = np.nonzero(cells[row:, x] != -1)
+            expected = row + int(rows[0]) if len(rows) else None
+            assert grid.find_in_column(x, row) == expected
+
+    def test_same_board(self, boards):
+        board, board_chunked = boards
+        assert board_chunked.compacted_chunks > 0
+        assert np.array_equal(np.asarray(board_chunked.occupancy), board.occupancy)
+        assert np.array_equal(np.asarray(board_chunked.piece_ids), board.piece_ids)
+        assert np.array_equal(board_chunked.column_tops, board.column_tops)
+
+    @pytest.mark.parametrize('method', ['incremental', 'network', 'labels', 'rules'])
+    def test_same_score(self, boards, method):
+        board, board_chunked = boards
+        assert board_chunked.calculate_score(method) == board.calculate_score(method)
+
+    def test_same_drop_distance(self, boards):
+        board, board_chunked = boards
+        for block_type, x in itertools.product(BLOCKS_ALL, range(0, 15, 3)):
+            block = block_type()
+            block.move_right(x)
+            assert board_chunked.drop_distance(block) == board.drop_distance(block)
+
+    def test_same_drop_distance_under_overhang(self, boards):
+        board, board_chunked = boards
+        num_under = 0
+        for x, y in itertools.product(range(0, 17, 2), range(0, 67, 3)):
+            block = IBlock()
+            block.move_right(x)
+            block.move_down(y)
+            indices = list(block.yield_indices())
+            if any(board.occupancy[j, i] for i, j in indices):
+                continue
+            num_under += any(board.column_tops[i] <= j for i, j in indices)
+            assert board_chunked.drop_distance(block) == board.drop_distance(block)
+        assert num_under > 0
+
+    @pytest.mark.parametrize(
+        'method', ['incremental', 'network', 'labels', 'striped', 'rules']
+    )
+    def test_scoring_without_whole_grid(self, boards, method, monkeypatch):
+        board, board_chunked = boards
+
+        def no_array(*args, **kwargs):
+            raise AssertionError("the whole grid was made dense")
+
+        monkeypatch.setattr(ChunkedGrid, '__array__', no_array)
+        assert board_chunked.calculate_score(method) == board.calculate_score(method)
+        board.update_highlights()
+        board_chunked.update_highlights()
+        assert [block.highlight for block in board_chunked.block_list] == [
+            block.highlight for block in board.block_list
+        ]
+
+    def test_endless_city(self):
+        board = ChunkedBoard(centered=False)
+        rng = random.Random(0)
+        for _ in range(300):
+            block = board.block_active
+            block.move_right(rng.randrange(board.width - 3))
+            block.move_down(board.drop_distance(block))
+            board.spawn_block(rng.choice(BLOCKS_ALL)())
+
+        # blocks spawn above the building front, and memory only grows with it
+        assert board.block_active.y // BS == board.get_spawn_row()
+        assert board.get_building_front() > board.height - 300
+        assert board.nbytes < 100_000
+        assert board.score() == board.recalculate_score()
+        lines = repr(board).splitlines()
+        assert lines[0].startswith(f"# rows {board.get_building_front()} to")
+        assert lines[1] == lines[-1] == "#" * (2 * board.width + 1)
+
+    def test_endless_tetris(self):
+        screen = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+        tetris = Tetris(screen=screen, seed=0, size="endless")
+        assert isinstance(tetris.board, ChunkedBoard)
+        tetris.board.block_active.move_down(
+            tetris.board.drop_distance(tetris.board.block_active)
+        )
+        tetris.spawn_block()
+        tetris.draw()
+        # the camera followed the blocks to the bottom of the board
+        block = tetris.board.block_active
+        assert tetris.camera.y > 0
+        x, y = tetris.camera.to_screen(*block.get_rects()[0].topleft)
+        tile = TILES.get_tile(block.kind.shades, block.highlight)
+        assert tetris.screen.get_at((x + 5, y + 5)) == tile.get_at((5, 5))
+
+
+class TestTimers:
+    @pytest.fixture
+    def clock(self):
+        # fake milliseconds that the tests advance by hand
+        return [0]
+
+    @pytest.fixture
+    def tetris(self, monkeypatch):
+        monkeypatch.setenv('SDL_VIDEODRIVER', 'dummy')
+        window = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+        yield Tetris(screen=window, seed=0)
+        pygame.display.quit()
+
+    def test_order_and_cancel(self, clock):
+        scheduler = Scheduler(clock=lambda: clock[0])
+        calls = []
+        scheduler.schedule(20, lambda: calls.append("b"), "b")
+        scheduler.schedule(10, lambda: calls.append("a"), "a")
+        scheduler.schedule(20, lambda: calls.append("c"), "c")
+        scheduler.schedule(10, lambda: calls.append("x"), "x")
+        scheduler.cancel("x")
+        assert len(scheduler) == 3
+        assert scheduler.poll() == 0
+        clock[0] = 15
+        assert scheduler.poll() == 1
+        assert scheduler.is_pending("b") and not scheduler.is_pending("a")
+        clock[0] = 20
+        assert scheduler.poll() == 2
+        assert calls == ["a", "b", "c"]
+        assert len(scheduler) == 0
+
+    def test_spawn_takes_input(self, tetris):
+        block = tetris.board.block_active
+        block.move_down(tetris.board.drop_distance(block))
+        tetris.time_since_touching_bottom = TIME_BEFORE_NEW_SPAWN
+        num_blocks = len(tetris.board.block_list)
+        tetris.update(CLOCKTICK)
+        assert len(tetris.board.block_list) == num_blocks + 1
+        block = tetris.board.block_active
+        assert tetris.block_held
+
+        # a key pressed during the hold moves the new block, which does not fall yet
+        x, y = block.x, block.y
+        tetris.time_since_last_block_move = CLOCK_BLOCK_MOVE
+        pygame.event.post(pygame.event.Event(pygame.KEYDOWN, key=pygame.K_LEFT))
+        assert tetris.update(CLOCKTICK) == (True, False)
+        assert (block.x, block.y) == (x - BS, y)
+
+        # the hold runs on game time, several steps in one frame catch up
+        tetris.update(CLOCKTICK, steps=TIME_BETWEEN_BLOCKS // CLOCKTICK)
+        assert not tetris.block_held
+        assert block.y == y + BS
+
+    def test_timers_wait_while_paused(self, tetris):
+        tetris._spawn_next()
+        tetris.paused = True
+        for _ in range(10):
+            tetris.step(CLOCKTICK)
+        assert tetris.block_held
+        tetris.paused = False
+        while tetris.block_held:
+            tetris.step(CLOCKTICK)
+        assert tetris.game_time >= TIME_BETWEEN_BLOCKS
+
+    def test_game_over_ends_later(self, tetris):
+        tetris.board.block_active.y = 0
+        tetris.board.collides_bottom = lambda block: True
+        assert tetris.update(CLOCKTICK) == (True, False)
+        assert tetris.game_over
+        # keys are ignored after game over
+        x = tetris.board.block_active.x
+        pygame.event.post(pygame.event.Event(pygame.KEYDOWN, key=pygame.K_LEFT))
+        steps = -(-TIME_BEFORE_GAME_OVER // CLOCKTICK)
+        assert tetris.update(CLOCKTICK, steps=steps - 1) == (True, False)
+        assert tetris.board.block_active.x == x
+        assert tetris.update(CLOCKTICK) == (False, False)
+
+
+class TestPacing:
+    def test_steps_follow_real_time(self):
+        timestep = FixedTimestep(1000 / CLOCKTICK)
+        steps = [timestep.advance(1000 / 60) for _ in range(120)]
+        assert sum(steps) in (2 * CLOCKTICK - 1, 2 * CLOCKTICK)
+        assert set(timestep.steps_per_frame) == {0, 1}
+        assert 0 <= timestep.alpha < 1
+
+        report = timestep.report()
+        assert report.startswith("120 frames in 2.0 s (60.0 fps)")
+        assert "1 steps: 30 frames" in report
+
+    def test_stall_dropped(self):
+        # after a stall the game does not try to catch up at once
+        timestep = FixedTimestep(50, max_steps=5)
+        assert timestep.advance(1030) == 5
+        assert timestep.dropped_steps == 15
+        assert timestep.alpha == pytest.approx(0.6)
+        assert "5 logic steps, 5.00 per frame, 15 dropped" in timestep.report()
+
+    def test_falling_block_interpolated(self):
+        screen = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+        tetris = Tetris(screen=screen, seed=0)
+        block = tetris.board.block_active
+        y = block.y
+        tetris.time_since_last_block_move = CLOCK_BLOCK_MOVE
+        tetris.step(CLOCKTICK)
+        assert block.y == y + BS
+
+        # halfway through the next step, the block is drawn halfway up
+        tetris.draw(0.5)
+        assert tetris.fall_offset == -BS // 2
+        rect = tetris.get_active_rect()
+        assert rect.top == tetris.screen.get_abs_offset()[1] + y + BS // 2
+        tetris.draw(0.0)
+        assert tetris.fall_offset == -BS
+        tetris.draw()
+        assert tetris.fall_offset == 0
+
+        # a step without a move ends the interpolation
+        tetris.step(CLOCKTICK)
+        tetris.draw(0.0)
+        assert tetris.fall_offset == 0
+
+
+class TestStoreBoard:
+    @pytest.fixture(params=range(5))
+    def boards(self, request):
+        board = make_random_board(request.param)
+        board_store = StoreBoard(
+            width=board.width,
+            height=board.height,
+            block_list=board.block_list,
+            centered=False,
+        )
+        return board, board_store
+
+    def test_same_board(self, boards):
+        board, board_store = boards
+        assert repr(board_store) == repr(board)
+        assert (board_store.occupancy == board.occupancy).all()
+        assert (board_store.piece_ids == board.piece_ids).all()
+        assert len(board_store.block_list) == len(board.block_list)
+        for block, block_stored in zip(board.block_list, board_store.block_list):
+            assert type(block_stored) is type(block)
+            assert block_stored.indices == block.indices
+
+    def test_same_score(self, boards):
+        board, board_store = boards
+        assert board_store.score() == board.score()
+        assert board_store.recalculate_score() == board.recalculate_score()
+        assert board_store._calculate_full_rows() == board._calculate_full_rows()
+
+    def test_same_highlights(self, boards):
+        board, board_store = boards
+        board.update_highlights()
+        board_store.update_highlights()
+        highlights = [block.highlight for block in board.block_list]
+        assert board_store.store.highlights.tolist() == highlights
+        assert [block.highlight for block in board_store.block_list] == highlights
+
+    def test_rules_only_create_highlighted_blocks(self, boards, monkeypatch):
+        board, board_store = boards
+        get_block = board_store.store.get_block
+        created = []
+        monkeypatch.setattr(
+            board_store.store,
+            'get_block',
+            lambda piece_id: created.append(piece_id) or get_block(piece_id),
+        )
+        results = board_store.evaluate_rules()
+        assert {name: value for name, (value, _) in results.items()} == {
+            name: value for name, (value, _) in board.evaluate_rules().items()
+        }
+        num_highlighted = sum(len(blocks) for _, blocks in results.values())
+        assert len(created) == num_highlighted < len(board_store.block_list)
+
+    def test_same_drawing(self, boards):
+        board, board_store = boards
+        board.update_highlights()
+        board_store.update_highlights()
+        size = board.width * BS, board.height * BS
+        screen, screen_store = pygame.Surface(size), pygame.Surface(size)
+        board.draw_blocks(screen)
+        board_store.draw_blocks(screen_store)
+        assert pygame.image.tostring(screen, 'RGB') == pygame.image.tostring(
+            screen_store, 'RGB'
+        )
+
+    def test_store_grows(self):
+        store = BlockStore(capacity=2)
+        blocks = make_random_board(0).block_list
+        for piece_id, block in enumerate(blocks):
+            assert store.append(block) == piece_id
+        assert len(store) == len(blocks)
+        assert store.capacity >= len(blocks)
+        assert store.nbytes == store.capacity * store.itemsize
+        assert store.itemsize == 11
+
+    def test_replay(self):
+        moves = load_replay(os.path.join('tests', 'replay-01.json')).moves
+        board = create_board_from_script(moves, width=10, height=20, centered=True)
+        board_store = create_board_from_script(
+            moves, width=10, height=20, centered=True, board_cls=StoreBoard
+        )
+        assert isinstance(board_store, StoreBoard)
+        assert repr(board_store) == repr(board)
+        assert board_store.score() == board.score()
+
+
 class TestReplay:
     @pytest.fixture(scope='class')
     def tetris1(self):